@@ -0,0 +1,61 @@
+"""
+Бенчмарк вычислительных ядер: Numba против NumPy
+
+Для m устройств из {1e2, ..., 1e6} меряет жадное распределение, построчные
+суммы платежей и коэффициент Джини (лучшее из нескольких повторов, после
+прогревочного вызова с JIT-компиляцией).
+
+    python experiments/benchmark_kernels.py --num-edges 16 --max-devices 1000000
+"""
+
+import argparse
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.mechanisms import kernels
+
+def best_time(function, repeats: int) -> float:
+    """Лучшее время из repeats вызовов (с)"""
+    function()  # прогрев (компиляция Numba)
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+def run_benchmark(num_edges: int, max_devices: int, repeats: int):
+    rng = np.random.default_rng(0)
+    sizes = [10 ** p for p in range(2, 7) if 10 ** p <= max_devices]
+
+    print(f"Бэкенды: {', '.join(kernels.BACKENDS)}; узлов: {num_edges}")
+    print(f"{'m':>9} {'ядро':>14} " + " ".join(f"{b + ' (мс)':>12}" for b in kernels.BACKENDS))
+    for m in sizes:
+        valuations = rng.uniform(0.3, 1.0, (m, num_edges))
+        costs = rng.uniform(0.1, 0.9, (m, num_edges))
+        edge = kernels.greedy_edges(valuations, costs, backend='numpy')
+        allocation = np.zeros((m, num_edges), dtype=int)
+        accepted = np.flatnonzero(edge >= 0)
+        allocation[accepted, edge[accepted]] = 1
+        payments = rng.exponential(1.0, m)
+
+        cases = {
+            'greedy_edges': lambda b: kernels.greedy_edges(valuations, costs, backend=b),
+            'row_dot': lambda b: kernels.row_dot(allocation, valuations, np.dtype(np.float64), backend=b),
+            'gini': lambda b: kernels.gini(payments, backend=b),
+        }
+        for name, case in cases.items():
+            timings = [best_time(lambda: case(b), repeats) * 1e3 for b in kernels.BACKENDS]
+            print(f"{m:>9} {name:>14} " + " ".join(f"{t:>12.3f}" for t in timings))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--num-edges', type=int, default=16)
+    parser.add_argument('--max-devices', type=int, default=10 ** 6)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+    run_benchmark(args.num_edges, args.max_devices, args.repeats)
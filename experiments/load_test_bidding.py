@@ -0,0 +1,66 @@
+"""
+Нагрузочный тест сбора ставок: тысячи одновременных устройств
+
+Каждое устройство отправляет ставки в цикле (с небольшой случайной паузой),
+сервис собирает их в раунды по окну времени/размера. В конце печатаются
+перцентили задержки раунда и ставки и пропускная способность.
+
+    python experiments/load_test_bidding.py --devices 5000 --edges 20 --bids 5
+"""
+
+import argparse
+import asyncio
+import time
+import numpy as np
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.mechanisms.bid_collector import Bid, BidCollector
+from src.mechanisms.vcg_auction import VCGAuction
+
+async def device(collector: BidCollector, device_id: int, num_edges: int, bids: int,
+                 think_time: float, latencies: list):
+    """Симулированное устройство: bids ставок подряд"""
+    rng = np.random.default_rng(device_id)
+    for _ in range(bids):
+        await asyncio.sleep(rng.uniform(0, think_time))
+        bid = Bid(device_id, rng.uniform(0.3, 1.0, num_edges), rng.uniform(0.1, 0.8, num_edges))
+        started = time.perf_counter()
+        await collector.submit(bid)
+        latencies.append(time.perf_counter() - started)
+
+async def run_load_test(args):
+    auction = VCGAuction(args.devices, args.edges,
+                         edge_capacity=None if args.capacity is None else np.full(args.edges, args.capacity))
+    collector = BidCollector(auction, max_batch=args.max_batch, max_wait=args.max_wait)
+    await collector.start()
+
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        device(collector, i, args.edges, args.bids, args.think_time, latencies)
+        for i in range(args.devices)
+    ])
+    elapsed = time.perf_counter() - started
+    await collector.stop()
+
+    rounds = collector.latency_percentiles((50, 99))
+    bid_p50, bid_p99 = np.percentile(latencies, [50, 99])
+    print(f"Устройств: {args.devices}, узлов: {args.edges}, ставок: {len(latencies)}")
+    print(f"Раундов: {len(collector.round_sizes)}, средний размер: {np.mean(collector.round_sizes):.1f}")
+    print(f"Задержка раунда: p50={rounds['p50'] * 1e3:.2f} мс, p99={rounds['p99'] * 1e3:.2f} мс")
+    print(f"Задержка ставки: p50={bid_p50 * 1e3:.2f} мс, p99={bid_p99 * 1e3:.2f} мс")
+    print(f"Пропускная способность: {len(latencies) / elapsed:.0f} ставок/с")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--devices', type=int, default=5000)
+    parser.add_argument('--edges', type=int, default=20)
+    parser.add_argument('--bids', type=int, default=5)
+    parser.add_argument('--max-batch', type=int, default=1024)
+    parser.add_argument('--max-wait', type=float, default=0.005)
+    parser.add_argument('--think-time', type=float, default=0.05)
+    parser.add_argument('--capacity', type=int, default=None)
+    asyncio.run(run_load_test(parser.parse_args()))
@@ -14,11 +14,15 @@ setup(
     packages=find_packages(),
     install_requires=[
         "numpy>=1.21.0",
+        "scipy>=1.7.0",
         "torch>=1.10.0",
         "matplotlib>=3.4.0",
         "seaborn>=0.11.0",
         "pandas>=1.3.0",
     ],
+    extras_require={
+        "jit": ["numba>=0.56"],  # JIT-ядра аукциона (src/mechanisms/kernels.py)
+    },
     python_requires=">=3.8",
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -1,49 +1,243 @@
 import numpy as np
-from collections import deque
-from typing import Tuple
+import torch
+from typing import Dict, Optional, Tuple
+
+# Поля наблюдений, квантуемые при сжатии
+OBSERVATION_FIELDS = ('states', 'next_states')
 
 class ExperienceBuffer:
-    """Буфер для хранения опыта взаимодействия с окружением"""
-    
-    def __init__(self, max_size: int = 10000):
+    """
+    Буфер для хранения опыта взаимодействия с окружением
+
+    Переходы хранятся в кольцевом буфере: по предвыделенному массиву на поле
+    [max_size x ...] и курсор записи. Массивы создаются при первом add по
+    формам полей перехода.
+
+    Сжатие (compression):
+        None - поля хранятся в типах FIELDS
+        'float16' - наблюдения в float16
+        'int8' - наблюдения в int8 с масштабом и сдвигом на каждый признак
+            (последняя ось, общие для агентов); диапазон признака расширяется
+            по мере записи (с запасом), уже записанные наблюдения при этом
+            переквантуются
+    При сжатии действия хранятся в uint8, флаги done - битами. Распаковка
+    выполняется векторно при выборке.
+    """
+
+    # Поле батча -> тип хранения
+    FIELDS = {
+        'states': np.float32,
+        'actions': np.int64,
+        'rewards': np.float32,
+        'next_states': np.float32,
+        'dones': np.float32,
+    }
+
+    COMPRESSIONS = (None, 'float16', 'int8')
+    RANGE_MARGIN = 0.25  # запас при расширении диапазона int8 (доля ширины)
+
+    def __init__(self, max_size: int = 10000, seed: Optional[int] = None, compression: Optional[str] = None):
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f"unknown replay compression '{compression}'")
         self.max_size = max_size
-        self.buffer = deque(maxlen=max_size)
-    
+        self.compression = compression
+        self.storage: Dict[str, np.ndarray] = {}
+        self.field_shapes: Dict[str, Tuple[int, ...]] = {}  # формы полей одного перехода
+        self.ranges: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # диапазоны признаков для int8
+        self._quantization: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}  # шаг и сдвиг кодов
+        self.cursor = 0  # позиция следующей записи
+        self._size = 0
+        self._rng = np.random.default_rng(seed)
+
+    def _field_spec(self, name: str, shape: Tuple[int, ...]) -> Tuple[Tuple[int, ...], np.dtype]:
+        """Форма и тип массива хранения поля с формой перехода shape"""
+        if self.compression is not None:
+            if name in OBSERVATION_FIELDS:
+                return (self.max_size,) + shape, np.dtype(np.float16 if self.compression == 'float16' else np.int8)
+            if name == 'actions':
+                return (self.max_size,) + shape, np.dtype(np.uint8)
+            if name == 'dones':  # упакованные биты
+                return ((self.max_size * int(np.prod(shape)) + 7) // 8,), np.dtype(np.uint8)
+        return (self.max_size,) + shape, np.dtype(self.FIELDS[name])
+
+    def _allocate(self, transition: Dict[str, np.ndarray]):
+        """Выделить массивы полей по формам первого перехода"""
+        self.field_shapes = {name: np.shape(value) for name, value in transition.items()}
+        self.storage = {}
+        for name, shape in self.field_shapes.items():
+            storage_shape, dtype = self._field_spec(name, shape)
+            self.storage[name] = np.zeros(storage_shape, dtype=dtype)
+
     def add(self, state, actions, rewards, next_state, done):
-        """Добавить переход в буфер"""
-        self.buffer.append({
-            'state': state,
+        """Добавить переход в буфер (O(1), перезаписывает самый старый)"""
+        transition = {
+            'states': state,
             'actions': actions,
             'rewards': rewards,
-            'next_state': next_state,
-            'done': done,
-        })
-    
-    def sample(self, batch_size: int) -> Tuple:
-        """Выборка мини-батча из буфера"""
-        indices = np.random.choice(len(self.buffer), batch_size, replace=False)
-        
-        batch = {
-            'states': [],
-            'actions': [],
-            'rewards': [],
-            'next_states': [],
-            'dones': [],
+            'next_states': next_state,
+            'dones': done,
+        }
+        if not self.storage:
+            self._allocate(transition)
+        if self.compression is None:
+            for name, value in transition.items():
+                self.storage[name][self.cursor] = value
+        else:
+            self._store(np.array([self.cursor]), {name: np.asarray(value)[None] for name, value in transition.items()})
+        self.cursor = (self.cursor + 1) % self.max_size
+        self._size = min(self._size + 1, self.max_size)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Добавить k переходов (например, шаг VecEdgeNetwork) - по одной записи на поле"""
+        transitions = {
+            'states': np.asarray(states),
+            'actions': np.asarray(actions),
+            'rewards': np.asarray(rewards),
+            'next_states': np.asarray(next_states),
+            'dones': np.asarray(dones),
         }
-        
-        for i in indices:
-            transition = self.buffer[i]
-            batch['states'].append(transition['state'])
-            batch['actions'].append(transition['actions'])
-            batch['rewards'].append(transition['rewards'])
-            batch['next_states'].append(transition['next_state'])
-            batch['dones'].append(transition['done'])
-        
+        if not self.storage:
+            self._allocate({name: value[0] for name, value in transitions.items()})
+        if len(transitions['states']) > self.max_size:  # остаются только последние max_size
+            transitions = {name: value[-self.max_size:] for name, value in transitions.items()}
+        k = len(transitions['states'])
+        positions = (self.cursor + np.arange(k)) % self.max_size
+        self._store(positions, transitions)
+        self.cursor = (self.cursor + k) % self.max_size
+        self._size = min(self._size + k, self.max_size)
+
+    def _store(self, positions: np.ndarray, transitions: Dict[str, np.ndarray]):
+        """Записать переходы [k x ...] в позиции positions (со сжатием полей)"""
+        if not len(positions):
+            return
+        for name, value in transitions.items():
+            if self.compression is None:
+                self.storage[name][positions] = value
+            elif name in OBSERVATION_FIELDS:
+                self.storage[name][positions] = self._encode(name, value)
+            elif name == 'actions':
+                if value.size and (value.min() < 0 or value.max() > 255):
+                    raise ValueError("compressed replay stores actions as uint8 (0..255)")
+                self.storage[name][positions] = value
+            elif name == 'dones':
+                self._store_bits(positions, value)
+            else:
+                self.storage[name][positions] = value
+
+    def _bit_indices(self, indices: np.ndarray) -> np.ndarray:
+        """Номера битов флагов done переходов indices [len x n]"""
+        n = int(np.prod(self.field_shapes['dones']))
+        return indices[:, None] * n + np.arange(n)
+
+    def _store_bits(self, positions: np.ndarray, dones: np.ndarray):
+        column = self.storage['dones']
+        if dones.size == 1 and len(positions) == 1:  # одиночный add
+            bit = int(positions[0])
+            if dones.item():
+                column[bit >> 3] |= 1 << (bit & 7)
+            else:
+                column[bit >> 3] &= ~(1 << (bit & 7)) & 0xFF
+            return
+        bits = self._bit_indices(positions).ravel()
+        flags = dones.reshape(-1).astype(bool)
+        masks = (1 << (bits & 7)).astype(np.uint8)
+        np.bitwise_or.at(column, bits[flags] >> 3, masks[flags])
+        np.bitwise_and.at(column, bits[~flags] >> 3, ~masks[~flags])
+
+    def _encode(self, name: str, value: np.ndarray) -> np.ndarray:
+        """Сжать наблюдения [k x ...] в тип хранения"""
+        if self.compression == 'float16':
+            return value.astype(np.float16)
+        features = value.reshape(-1, value.shape[-1] if value.ndim > 1 else 1)
+        if name not in self.ranges:
+            self._set_range(name, *self._widen(features.min(axis=0), features.max(axis=0)))
+        codes = self._quantize(name, value)
+        if codes.min() < -128 or codes.max() > 127:  # значения вне диапазона - расширить его
+            old_low, old_high = self.ranges[name]
+            low, high = np.minimum(features.min(axis=0), old_low), np.maximum(features.max(axis=0), old_high)
+            # Ширина вышедших признаков растёт хотя бы вдвое: переквантований O(log),
+            # накопленная ошибка - не больше шага
+            width = np.maximum(2 * (old_high - old_low), (1 + 2 * self.RANGE_MARGIN) * (high - low))
+            extra = (width - (high - low)) / 2
+            grown = (low < old_low) | (high > old_high)
+            self._requantize(name, np.where(grown, low - extra, old_low), np.where(grown, high + extra, old_high))
+            codes = np.clip(self._quantize(name, value), -128, 127)
+        return codes.astype(np.int8)
+
+    def _quantize(self, name: str, value: np.ndarray) -> np.ndarray:
+        """Коды int8 (ещё в float) по текущему диапазону: x ≈ code · scale + offset"""
+        scale, offset = self._quantization[name]
+        return np.rint((value - offset) / scale)
+
+    def _widen(self, low: np.ndarray, high: np.ndarray):
+        """Диапазон с запасом; ширина не меньше 1e-3 от модуля признака (шаг выше точности float32)"""
+        width = np.maximum(high - low, 1e-3 * np.maximum(np.abs(low), np.abs(high)) + 1e-6)
+        margin = self.RANGE_MARGIN * width
+        return low - margin, high + margin
+
+    def _set_range(self, name: str, low: np.ndarray, high: np.ndarray):
+        """Задать диапазон признаков поля и его шаг и сдвиг квантования"""
+        low, high = np.asarray(low, dtype=np.float64), np.asarray(high, dtype=np.float64)
+        self.ranges[name] = (low, high)
+        scale = (high - low) / 255
+        self._quantization[name] = (scale.astype(np.float32), (low + 128 * scale).astype(np.float32))
+
+    def _decode(self, name: str, codes: np.ndarray) -> np.ndarray:
+        """Распаковать наблюдения в float32"""
+        if self.compression == 'float16':
+            return codes.astype(np.float32)
+        scale, offset = self._quantization[name]
+        return codes.astype(np.float32) * scale + offset
+
+    def _requantize(self, name: str, low: np.ndarray, high: np.ndarray):
+        """Расширить диапазон признаков и переквантовать записанные наблюдения"""
+        column = self.storage[name]
+        stored = self._decode(name, column[:self._size])
+        self._set_range(name, low, high)
+        column[:self._size] = np.clip(self._quantize(name, stored), -128, 127)
+
+    def _gather(self, indices: np.ndarray) -> Dict[str, torch.Tensor]:
+        """Собрать поля переходов indices (с распаковкой сжатых полей)"""
+        if self.compression is None:
+            return {name: torch.from_numpy(column[indices]) for name, column in self.storage.items()}
+        batch = {}
+        for name, column in self.storage.items():
+            if name in OBSERVATION_FIELDS:
+                value = self._decode(name, column[indices])
+            elif name == 'actions':
+                value = column[indices].astype(np.int64)
+            elif name == 'dones':
+                bits = self._bit_indices(indices)
+                flags = (column[bits >> 3] >> (bits & 7).astype(np.uint8)) & 1
+                value = flags.astype(np.float32).reshape((len(indices),) + self.field_shapes['dones'])
+            else:
+                value = column[indices]
+            batch[name] = torch.from_numpy(value)
         return batch
-    
+
+    def sample(self, batch_size: int) -> Dict[str, torch.Tensor]:
+        """
+        Выборка мини-батча без повторов
+
+        Returns:
+            словарь тензоров [batch_size x ...] (states, actions, rewards,
+            next_states, dones); одна выборка индексами на поле, тензоры
+            разделяют память с собранными массивами (torch.from_numpy)
+        """
+        indices = self._rng.choice(self._size, batch_size, replace=False)
+        return self._gather(indices)
+
+    def memory_usage(self) -> int:
+        """Байт в массивах хранения"""
+        return sum(column.nbytes for column in self.storage.values())
+
     def __len__(self):
-        return len(self.buffer)
-    
+        return self._size
+
+    def size(self) -> int:
+        """Число переходов в буфере"""
+        return self._size
+
     def is_ready(self, batch_size: int) -> bool:
         """Достаточно ли опыта для обучения?"""
-        return len(self.buffer) >= batch_size
+        return self._size >= batch_size
@@ -0,0 +1,216 @@
+"""
+Буфер опыта на диске (np.memmap)
+Каталог буфера: meta.json (ёмкость, сжатие, формы и типы полей, диапазоны
+квантования), файл <поле>.bin на каждое поле и state.bin - курсор записи
+и число переходов. Случайное чтение батча обращается только к нужным страницам
+(кэш страниц ОС), буфер переживает перезапуск обучения, а другие процессы
+могут открыть его только для чтения.
+"""
+
+import json
+import os
+import numpy as np
+import torch
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from .experience_buffer import ExperienceBuffer
+
+MEMMAP_VERSION = 1
+META_FILE = 'meta.json'
+STATE_FILE = 'state.bin'
+
+class MemmapExperienceBuffer(ExperienceBuffer):
+    """
+    ExperienceBuffer с полями в файлах np.memmap
+
+    Режимы:
+        'a' - открыть существующий буфер для дописывания или создать новый
+        'w' - создать заново (существующие файлы перезаписываются)
+        'r' - только чтение: sample видит переходы, записанные другим процессом
+
+    Курсор и размер хранятся в state.bin и обновляются после записи полей.
+    Сжатие (compression) задаётся при создании буфера; открытый буфер берёт
+    его и диапазоны квантования из meta.json.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_size: int = 10000,
+        mode: str = 'a',
+        seed: Optional[int] = None,
+        compression: Optional[str] = None
+    ):
+        if mode not in ('a', 'w', 'r'):
+            raise ValueError(f"unknown buffer mode '{mode}'")
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f"unknown replay compression '{compression}'")
+        self.path = Path(path)
+        self.readonly = mode == 'r'
+        self.storage: Dict[str, np.ndarray] = {}
+        self.field_shapes: Dict[str, Tuple[int, ...]] = {}
+        self.ranges: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._quantization: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._rng = np.random.default_rng(seed)
+        self._meta_stamp = None
+        self._generations: Dict[str, int] = {}  # поколение файла поля
+
+        meta_path = self.path / META_FILE
+        if mode == 'w' or (mode == 'a' and not meta_path.exists()):
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.max_size = max_size
+            self.compression = compression
+            self.meta = {'version': MEMMAP_VERSION, 'max_size': max_size, 'compression': compression,
+                         'fields': {}, 'ranges': {}}
+            self._write_meta()
+            self._state = np.memmap(self.path / STATE_FILE, dtype=np.int64, mode='w+', shape=(2,))
+            return
+
+        self._load_meta()
+        if self.meta['version'] != MEMMAP_VERSION:
+            raise ValueError(f"unsupported replay buffer version {self.meta['version']}")
+        self.max_size = self.meta['max_size']
+        self.compression = self.meta.get('compression')
+        self._state = np.memmap(self.path / STATE_FILE, dtype=np.int64, mode='r' if self.readonly else 'r+', shape=(2,))
+        self._load()
+
+    @property
+    def cursor(self) -> int:
+        return int(self._state[0])
+
+    @cursor.setter
+    def cursor(self, value: int):
+        self._state[0] = value
+
+    @property
+    def _size(self) -> int:
+        return int(self._state[1])
+
+    @_size.setter
+    def _size(self, value: int):
+        self._state[1] = value
+
+    def _field_path(self, name: str, generation: int) -> Path:
+        """Файл поля; при переквантовании поле пишется в файл следующего поколения"""
+        return self.path / (f"{name}.bin" if generation == 0 else f"{name}.{generation}.bin")
+
+    def _open_field(self, name: str, shape: Tuple[int, ...], mode: str, generation: int = 0) -> np.memmap:
+        storage_shape, dtype = self._field_spec(name, shape)
+        return np.memmap(self._field_path(name, generation), dtype=dtype, mode=mode, shape=storage_shape)
+
+    def _stamp(self):
+        """Версия meta.json (файл заменяется целиком при каждой записи)"""
+        stat = os.stat(self.path / META_FILE)
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _load_meta(self):
+        meta_path = self.path / META_FILE
+        self._meta_stamp = self._stamp()
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+        for name, (low, high) in self.meta.get('ranges', {}).items():
+            super()._set_range(name, low, high)
+
+    def _open_fields(self):
+        """Открыть новые поля и поля, сменившие поколение файла"""
+        mode = 'r' if self.readonly else 'r+'
+        for name, field in self.meta['fields'].items():
+            generation = field.get('generation', 0)
+            if name not in self.storage or self._generations[name] != generation:
+                self.field_shapes[name] = tuple(field['shape'])
+                self.storage[name] = self._open_field(name, self.field_shapes[name], mode, generation)
+                self._generations[name] = generation
+
+    def _load(self):
+        """Прочитать meta.json и открыть поля (повтор, если писатель успел сменить поколение)"""
+        while True:
+            self._load_meta()
+            try:
+                self._open_fields()
+                return
+            except FileNotFoundError:
+                if self._stamp() == self._meta_stamp:
+                    raise
+
+    def _write_meta(self):
+        """Записать метаданные атомарно (через временный файл)"""
+        tmp_path = self.path / (META_FILE + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp_path, self.path / META_FILE)
+
+    def _allocate(self, transition: Dict[str, np.ndarray]):
+        """Создать файлы полей по формам первого перехода"""
+        for name, value in transition.items():
+            self.field_shapes[name] = np.shape(value)
+            self.storage[name] = self._open_field(name, self.field_shapes[name], 'w+')
+            self._generations[name] = 0
+            self.meta['fields'][name] = {'dtype': self.storage[name].dtype.str, 'shape': list(np.shape(value))}
+        self._write_meta()
+
+    def _set_range(self, name: str, low: np.ndarray, high: np.ndarray):
+        """Диапазон квантования int8 сохраняется в meta.json для читателей и продолжения"""
+        super()._set_range(name, low, high)
+        self.meta['ranges'][name] = [self.ranges[name][0].tolist(), self.ranges[name][1].tolist()]
+        self._write_meta()
+
+    def _requantize(self, name: str, low: np.ndarray, high: np.ndarray):
+        """
+        Переквантовать поле в файл следующего поколения
+
+        Новые коды и диапазон публикуются вместе одной заменой meta.json,
+        после записи файла; до этого читатели и продолжение после сбоя видят
+        прежний файл с прежним диапазоном. Старый файл удаляется последним
+        (открытые читателями отображения остаются действительными).
+        """
+        stored = self._decode(name, self.storage[name][:self._size])
+        generation = self._generations[name] + 1
+        super()._set_range(name, low, high)  # без записи meta.json
+        column = self._open_field(name, self.field_shapes[name], 'w+', generation)
+        column[:self._size] = np.clip(self._quantize(name, stored), -128, 127)
+        column.flush()
+
+        old_path = self._field_path(name, self._generations[name])
+        self.meta['fields'][name]['generation'] = generation
+        self.meta['ranges'][name] = [self.ranges[name][0].tolist(), self.ranges[name][1].tolist()]
+        self._write_meta()
+        self.storage[name], self._generations[name] = column, generation
+        os.remove(old_path)
+
+    def add(self, state, actions, rewards, next_state, done):
+        self._check_writable()
+        super().add(state, actions, rewards, next_state, done)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        self._check_writable()
+        super().add_batch(states, actions, rewards, next_states, dones)
+
+    def _check_writable(self):
+        if self.readonly:
+            raise RuntimeError(f"replay buffer {self.path} is opened read-only")
+
+    def flush(self):
+        """Сбросить изменённые страницы полей и курсор на диск"""
+        if self.readonly:
+            return
+        for column in self.storage.values():
+            column.flush()
+        self._state.flush()
+
+    def refresh(self):
+        """Перечитать meta.json, если писатель изменил его (новые поля, переквантование)"""
+        if self._stamp() != self._meta_stamp:
+            self._load()
+
+    def sample(self, batch_size: int) -> Dict[str, torch.Tensor]:
+        """
+        Выборка мини-батча без повторов (как ExperienceBuffer.sample)
+
+        Индексы сортируются: чтение идёт по файлу в одну сторону, соседние
+        переходы попадают в одни страницы.
+        """
+        size = self._size  # до refresh: строки [0, size) уже есть в файлах из meta.json
+        if self.readonly:
+            self.refresh()
+        indices = np.sort(self._rng.choice(size, batch_size, replace=False))
+        return self._gather(indices)
@@ -1,6 +1,8 @@
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+from typing import Optional
+from torch.nn.utils.rnn import pack_padded_sequence
 
 class GRUAgent(nn.Module):
     """Агент с GRU для запоминания истории"""
@@ -38,27 +40,71 @@ class GRUAgent(nn.Module):
         q_values = self.fc2(x)
         
         return q_values, hidden.squeeze(0)
+    
+    def unroll(
+        self,
+        obs: torch.Tensor,
+        hidden: torch.Tensor = None,
+        burn_in: torch.Tensor = None,
+        burn_in_lengths: torch.Tensor = None
+    ):
+        """
+        Q-значения на каждом шаге последовательности (один вызов GRU)
+        
+        Args:
+            obs: [batch_size, seq_len, obs_size]
+            hidden: начальное состояние [batch_size, hidden_size] (None - нули)
+            burn_in: префикс прогрева [batch_size, burn_in, obs_size], выровненный влево;
+                по нему без градиента восстанавливается состояние перед obs
+            burn_in_lengths: длины префиксов [batch_size] (0 - без прогрева)
+        
+        Returns:
+            q_values: [batch_size, seq_len, action_size]
+            hidden: [batch_size, hidden_size]
+        """
+        if hidden is None:
+            hidden = torch.zeros(obs.size(0), self.hidden_size)
+        
+        if burn_in is not None and burn_in.size(1) > 0:
+            with torch.no_grad():
+                warm = burn_in_lengths > 0
+                if warm.any():
+                    # Префиксы разной длины - одним упакованным вызовом
+                    packed = pack_padded_sequence(
+                        burn_in[warm], burn_in_lengths[warm].cpu(), batch_first=True, enforce_sorted=False
+                    )
+                    _, warm_hidden = self.gru(packed, hidden[warm].unsqueeze(0).contiguous())
+                    hidden = hidden.clone()
+                    hidden[warm] = warm_hidden.squeeze(0)
+            hidden = hidden.detach()
+        
+        gru_out, hidden = self.gru(obs, hidden.unsqueeze(0).contiguous())
+        x = self.relu(self.fc1(gru_out))
+        q_values = self.fc2(x)
+        
+        return q_values, hidden.squeeze(0)
 
 class MixingNetwork(nn.Module):
     """Mixing Network для объединения локальных Q-функций в глобальную"""
     
-    def __init__(self, num_agents: int, num_actions: int, hidden_size: int):
+    def __init__(self, num_agents: int, action_size: int, hidden_size: int, state_size: Optional[int] = None):
         super().__init__()
         self.num_agents = num_agents
-        self.num_actions = num_actions
+        self.num_actions = action_size
+        self.state_size = num_agents if state_size is None else state_size  # вход гиперсетей
         
         # Гиперсеть для генерации весов
-        self.hyper_w = nn.Linear(num_agents, num_agents * hidden_size)
-        self.hyper_b = nn.Linear(num_agents, hidden_size)
+        self.hyper_w = nn.Linear(self.state_size, num_agents * hidden_size)
+        self.hyper_b = nn.Linear(self.state_size, hidden_size)
         
         # Финальный слой
-        self.fc = nn.Linear(hidden_size, num_actions)
+        self.fc = nn.Linear(hidden_size, action_size)
     
     def forward(self, q_values: torch.Tensor, state: torch.Tensor = None):
         """
         Args:
             q_values: [batch_size, num_agents, num_actions]
-            state: [batch_size, state_size] (опционально)
+            state: [batch_size, state_size] - вход гиперсетей
         
         Returns:
             global_q: [batch_size, num_actions]
@@ -0,0 +1,138 @@
+"""
+Приоритетный буфер опыта (Prioritized Experience Replay)
+Вероятность выборки перехода пропорциональна p_i = (|δ_i| + ε)^α, где δ_i -
+последняя TD-ошибка; смещение компенсируется весами важности
+w_i = (N · P(i))^(-β) / max w с β, растущим до 1 за время обучения.
+Приоритеты хранятся в дереве сумм: выборка и обновление - O(log n) на
+переход (проходы по дереву - agents/sum_tree.py, Numba или NumPy).
+"""
+
+import numpy as np
+import torch
+from typing import Dict, Optional
+from .experience_buffer import ExperienceBuffer
+from . import sum_tree
+
+class SumTree:
+    """
+    Дерево сумм (и минимумов) над capacity листьями в плоском массиве
+
+    Узел k имеет детей 2k и 2k + 1, корень - 1, листья - [size, 2 · size),
+    size - ближайшая сверху степень двойки.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.size = 1 << max(capacity - 1, 0).bit_length()
+        self.sums = np.zeros(2 * self.size)
+        self.mins = np.full(2 * self.size, np.inf)  # для нормировки весов важности
+
+    @property
+    def total(self) -> float:
+        return float(self.sums[1])
+
+    @property
+    def min(self) -> float:
+        return float(self.mins[1])
+
+    def __getitem__(self, indices) -> np.ndarray:
+        return self.sums[self.size + np.asarray(indices)]
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray):
+        """Записать приоритеты листьев и пересчитать предков"""
+        sum_tree.sum_tree_update(self.sums, self.mins, self.size + np.asarray(indices, dtype=np.int64), priorities)
+
+    def update_one(self, index: int, priority: float):
+        """Записать приоритет одного листа (путь к корню без операций над массивами)"""
+        sums, mins = self.sums, self.mins
+        node = self.size + index
+        sums[node] = mins[node] = priority
+        while node > 1:
+            node >>= 1
+            left = 2 * node
+            sums[node] = sums[left] + sums[left + 1]
+            mins[node] = min(mins[left], mins[left + 1])
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """Листья, на префиксные суммы которых приходятся values"""
+        return np.minimum(sum_tree.sum_tree_find(self.sums, values), self.capacity - 1)
+
+class PrioritizedExperienceBuffer(ExperienceBuffer):
+    """
+    Буфер опыта с пропорциональной приоритетной выборкой
+
+    Новые переходы получают максимальный из встречавшихся приоритетов;
+    sample дополнительно возвращает indices (для update_priorities) и
+    weights - нормированные веса важности.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10000,
+        alpha: float = 0.6,
+        beta_start: float = 0.4,
+        beta_end: float = 1.0,
+        beta_steps: int = 100000,
+        epsilon: float = 1e-6,
+        seed: Optional[int] = None,
+        compression: Optional[str] = None
+    ):
+        super().__init__(max_size, seed, compression)
+        self.alpha = alpha
+        self.beta_start = beta_start
+        self.beta_end = beta_end
+        self.beta_steps = beta_steps
+        self.epsilon = epsilon
+        self.tree = SumTree(max_size)
+        self.max_priority = 1.0  # максимум |δ| + ε
+        self.num_samples = 0     # вызовов sample (для отжига β)
+
+    @property
+    def beta(self) -> float:
+        """Показатель весов важности: линейно от beta_start до beta_end за beta_steps выборок"""
+        fraction = min(self.num_samples / self.beta_steps, 1.0) if self.beta_steps > 0 else 1.0
+        return self.beta_start + fraction * (self.beta_end - self.beta_start)
+
+    def add(self, state, actions, rewards, next_state, done):
+        """Добавить переход с максимальным приоритетом"""
+        position = self.cursor
+        super().add(state, actions, rewards, next_state, done)
+        self.tree.update_one(position, self.max_priority ** self.alpha)
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """Добавить k переходов с максимальным приоритетом"""
+        k = min(len(states), self.max_size)
+        positions = (self.cursor + len(states) - k + np.arange(k)) % self.max_size
+        super().add_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(positions, np.full(k, self.max_priority ** self.alpha))
+
+    def sample(self, batch_size: int) -> Dict[str, torch.Tensor]:
+        """
+        Стратифицированная выборка пропорционально приоритетам
+
+        Returns:
+            поля батча (как ExperienceBuffer.sample), а также
+            indices [batch_size] (int64) и weights [batch_size] (float32)
+        """
+        total = self.tree.total
+        bounds = np.arange(batch_size) * (total / batch_size)
+        values = bounds + self._rng.uniform(0, total / batch_size, batch_size)
+        indices = self.tree.find(values)
+
+        beta = self.beta
+        probabilities = self.tree[indices] / total
+        weights = (self._size * probabilities) ** -beta
+        weights /= (self._size * self.tree.min / total) ** -beta  # максимальный вес - 1
+        self.num_samples += 1
+
+        batch = self._gather(indices)
+        batch['indices'] = torch.from_numpy(indices)
+        batch['weights'] = torch.from_numpy(weights.astype(np.float32))
+        return batch
+
+    def update_priorities(self, indices, td_errors):
+        """Обновить приоритеты выбранных переходов по их TD-ошибкам (пакетом)"""
+        indices = np.asarray(indices, dtype=np.int64)
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
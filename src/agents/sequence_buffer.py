@@ -0,0 +1,148 @@
+"""
+Буфер последовательностей эпизодов для обучения рекуррентных агентов
+Эпизод режется на фрагменты по seq_len шагов; перед каждым фрагментом
+хранится префикс прогрева (burn-in) - последние burn_in шагов того же
+эпизода, по которым восстанавливается скрытое состояние GRU. Короткие
+фрагменты (конец эпизода) дополняются нулями и маскируются, поэтому все
+фрагменты лежат в плотных массивах [max_sequences x (burn_in + seq_len) x ...].
+"""
+
+import numpy as np
+import torch
+from typing import Dict, Optional
+from .experience_buffer import ExperienceBuffer
+
+class EpisodeSequenceBuffer:
+    """
+    Кольцевой буфер фрагментов эпизодов
+
+    Раскладка фрагмента по времени: [0, burn_in) - префикс прогрева,
+    выровненный влево (длина burn_in_lengths, у первого фрагмента эпизода 0);
+    [burn_in, burn_in + seq_len) - шаги обучения, выровненные влево (длина
+    lengths, остальное - нули). При store_hidden хранится скрытое состояние
+    перед первым шагом фрагмента (начало префикса или шагов обучения).
+    """
+
+    FIELDS = dict(ExperienceBuffer.FIELDS, hidden=np.float32)
+
+    def __init__(
+        self,
+        max_sequences: int = 1000,
+        seq_len: int = 16,
+        burn_in: int = 0,
+        store_hidden: bool = False,
+        seed: Optional[int] = None
+    ):
+        self.max_sequences = max_sequences
+        self.seq_len = seq_len
+        self.burn_in = burn_in
+        self.store_hidden = store_hidden
+        self.length = burn_in + seq_len
+
+        self.storage: Dict[str, np.ndarray] = {}
+        self.lengths = np.zeros(max_sequences, dtype=np.int64)
+        self.burn_in_lengths = np.zeros(max_sequences, dtype=np.int64)
+        self.cursor = 0
+        self._size = 0
+        self._rng = np.random.default_rng(seed)
+
+        # Текущий фрагмент эпизода в той же раскладке
+        self._chunk: Dict[str, np.ndarray] = {}
+        self._num_steps = 0   # шагов обучения в текущем фрагменте
+        self._num_prefix = 0  # шагов префикса прогрева
+
+    def _allocate(self, step: Dict[str, np.ndarray]):
+        """Выделить массивы полей по формам первого шага"""
+        for name, value in step.items():
+            shape = (self.length,) + np.shape(value)
+            self._chunk[name] = np.zeros(shape, dtype=self.FIELDS[name])
+            if name == 'hidden':  # хранится одно состояние на фрагмент
+                shape = shape[1:]
+            self.storage[name] = np.zeros((self.max_sequences,) + shape, dtype=self.FIELDS[name])
+
+    def add(self, state, actions, rewards, next_state, done, hidden=None):
+        """
+        Добавить шаг текущего эпизода (hidden - скрытое состояние агентов
+        перед шагом, нужно при store_hidden)
+
+        Фрагмент записывается в буфер, когда набрано seq_len шагов или эпизод
+        закончился (done).
+        """
+        step = {
+            'states': state,
+            'actions': actions,
+            'rewards': rewards,
+            'next_states': next_state,
+            'dones': done,
+        }
+        if self.store_hidden:
+            if hidden is None:
+                raise ValueError("store_hidden=True requires hidden for every step")
+            step['hidden'] = hidden
+        if not self.storage:
+            self._allocate(step)
+
+        position = self.burn_in + self._num_steps
+        for name, value in step.items():
+            self._chunk[name][position] = value
+        self._num_steps += 1
+
+        if done or self._num_steps == self.seq_len:
+            self._flush()
+            if done:
+                for column in self._chunk.values():
+                    column[:self.burn_in] = 0
+                self._num_prefix = 0
+            else:
+                self._shift_prefix()
+            self._num_steps = 0
+
+    def _flush(self):
+        """Записать текущий фрагмент в кольцевой буфер"""
+        for name, column in self._chunk.items():
+            column[self.burn_in + self._num_steps:] = 0  # дополнение короткого фрагмента
+            if name == 'hidden':
+                self.storage[name][self.cursor] = column[0 if self._num_prefix else self.burn_in]
+            else:
+                self.storage[name][self.cursor] = column
+        self.lengths[self.cursor] = self._num_steps
+        self.burn_in_lengths[self.cursor] = self._num_prefix
+        self.cursor = (self.cursor + 1) % self.max_sequences
+        self._size = min(self._size + 1, self.max_sequences)
+
+    def _shift_prefix(self):
+        """Префикс следующего фрагмента - последние burn_in шагов эпизода"""
+        num_prefix = min(self.burn_in, self._num_prefix + self._num_steps)
+        for column in self._chunk.values():
+            valid = np.concatenate([column[:self._num_prefix],
+                                    column[self.burn_in:self.burn_in + self._num_steps]])
+            column[:num_prefix] = valid[len(valid) - num_prefix:]
+            column[num_prefix:self.burn_in] = 0
+        self._num_prefix = num_prefix
+
+    def sample(self, batch_size: int) -> Dict[str, torch.Tensor]:
+        """
+        Выборка фрагментов без повторов
+
+        Returns:
+            поля [batch_size x (burn_in + seq_len) x ...] (hidden - [batch_size x ...],
+            состояние перед первым шагом фрагмента), mask [batch_size x seq_len]
+            (1 - реальный шаг обучения) и burn_in_lengths [batch_size]
+        """
+        indices = self._rng.choice(self._size, batch_size, replace=False)
+        batch = {name: torch.from_numpy(column[indices]) for name, column in self.storage.items()}
+        mask = np.arange(self.seq_len) < self.lengths[indices, None]
+        batch['mask'] = torch.from_numpy(mask.astype(np.float32))
+        batch['burn_in_lengths'] = torch.from_numpy(self.burn_in_lengths[indices])
+        return batch
+
+    def __len__(self):
+        return self._size
+
+    def size(self) -> int:
+        """Число фрагментов в буфере"""
+        return self._size
+
+    def is_ready(self, batch_size: int) -> bool:
+        """Достаточно ли фрагментов для обучения?"""
+        return self._size >= batch_size
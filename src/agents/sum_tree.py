@@ -0,0 +1,90 @@
+"""
+Проходы по дереву сумм приоритетного буфера опыта (agents/prioritized_buffer.py):
+запись приоритетов листьев с пересчётом предков и спуск по префиксным суммам
+
+Бэкенд (Numba или NumPy) выбирается как у ядер аукциона - аргументом backend
+или функцией utils.jit.set_backend.
+"""
+
+import numpy as np
+from typing import Optional
+from ..utils.jit import NUMBA_AVAILABLE, jit as _jit, resolve as _resolve
+
+def sum_tree_update(
+    sums: np.ndarray,        # [2 · size]: суммы поддеревьев (корень - 1)
+    mins: np.ndarray,        # [2 · size]: минимумы поддеревьев
+    nodes: np.ndarray,       # [k]: узлы-листья (size + индекс)
+    priorities: np.ndarray,  # [k]
+    backend: Optional[str] = None
+):
+    """Записать приоритеты листьев и пересчитать их предков (на месте)"""
+    nodes = np.asarray(nodes, dtype=np.int64)
+    priorities = np.asarray(priorities, dtype=np.float64)
+    if _resolve(backend) == 'numba':
+        _sum_tree_update_numba(sums, mins, nodes, priorities)
+        return
+
+    sums[nodes] = priorities
+    mins[nodes] = priorities
+    # Общие предки пересчитываются несколько раз одним значением - сортировка не нужна
+    nodes = nodes.copy()
+    while nodes.size and nodes[0] > 1:
+        nodes >>= 1
+        left = 2 * nodes
+        sums[nodes] = sums[left] + sums[left + 1]
+        mins[nodes] = np.minimum(mins[left], mins[left + 1])
+
+def sum_tree_find(
+    sums: np.ndarray,    # [2 · size]
+    values: np.ndarray,  # [k]: префиксные суммы в [0, sums[1])
+    backend: Optional[str] = None
+) -> np.ndarray:
+    """
+    Спуск по дереву сумм: лист, на который приходится каждое из values
+
+    Пустое правое поддерево не выбирается даже при ошибке округления.
+
+    Returns:
+        индексы листьев [k] (узел - size)
+    """
+    size = len(sums) // 2
+    values = np.array(values, dtype=np.float64)
+    if _resolve(backend) == 'numba':
+        return _sum_tree_find_numba(sums, values, size)
+
+    nodes = np.ones(len(values), dtype=np.int64)
+    for _ in range(size.bit_length() - 1):
+        left = 2 * nodes
+        go_right = (values >= sums[left]) & (sums[left + 1] > 0)
+        values -= np.where(go_right, sums[left], 0.0)
+        nodes = left + go_right
+    return nodes - size
+
+if NUMBA_AVAILABLE:
+    @_jit
+    def _sum_tree_update_numba(sums, mins, nodes, priorities):
+        for k in range(len(nodes)):
+            node = nodes[k]
+            sums[node] = priorities[k]
+            mins[node] = priorities[k]
+            while node > 1:
+                node >>= 1
+                left = 2 * node
+                sums[node] = sums[left] + sums[left + 1]
+                mins[node] = min(mins[left], mins[left + 1])
+
+    @_jit
+    def _sum_tree_find_numba(sums, values, size):
+        leaves = np.empty(len(values), dtype=np.int64)
+        for k in range(len(values)):
+            value = values[k]
+            node = 1
+            while node < size:
+                left = 2 * node
+                if value >= sums[left] and sums[left + 1] > 0:
+                    value -= sums[left]
+                    node = left + 1
+                else:
+                    node = left
+            leaves[k] = node - size
+        return leaves
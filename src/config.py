@@ -3,7 +3,7 @@
 """
 
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Optional
 
 @dataclass
 class EnvironmentConfig:
@@ -15,6 +15,22 @@ class EnvironmentConfig:
     min_task_value: float = 0.1
     max_processing_time: int = 100  # максимум ms
     min_processing_time: int = 10
+    device_recent_tasks: int = 64  # Окно последних задач устройства (DeviceTable, для отладки)
+
+@dataclass
+class TaskConfig:
+    """Конфигурация генерации задач"""
+    cpu_min: int = 50  # Требуемые CPU циклы
+    cpu_max: int = 500
+    memory_min: int = 128  # Требуемая память (MB)
+    memory_max: int = 1024
+
+@dataclass
+class EdgeConfig:
+    """Конфигурация edge-узла"""
+    cpu_capacity: int = 1000  # CPU циклов за шаг
+    memory_capacity: int = 8192  # MB
+    bandwidth: float = 100.0  # Мбит/с
 
 @dataclass
 class TrainingConfig:
@@ -29,6 +45,16 @@ class TrainingConfig:
     epsilon_start: float = 1.0  # Epsilon-greedy exploration
     epsilon_end: float = 0.05
     epsilon_decay: float = 0.995
+    prioritized_replay: bool = False  # PrioritizedExperienceBuffer вместо равномерной выборки
+    priority_alpha: float = 0.6  # Степень приоритетов
+    priority_beta_start: float = 0.4  # Показатель весов важности (отжиг до 1)
+    priority_beta_steps: int = 100000  # Шагов обучения до beta = 1
+    sequence_replay: bool = False  # Обучение GRU на фрагментах эпизодов (EpisodeSequenceBuffer)
+    sequence_length: int = 16  # Шагов обучения во фрагменте
+    burn_in: int = 8  # Шагов прогрева скрытого состояния перед фрагментом
+    store_hidden: bool = False  # Хранить скрытое состояние в начале фрагмента
+    replay_dir: Optional[str] = None  # Каталог буфера на диске (MemmapExperienceBuffer), продолжает прежний
+    replay_compression: Optional[str] = None  # Сжатие переходов: None, 'float16' или 'int8'
 
 @dataclass
 class NetworkConfig:
@@ -81,3 +107,7 @@ class ENV_CONFIG(EnvironmentConfig, TrainingConfig, NetworkConfig, AuctionConfig
 
 # Создать глобальный объект конфигурации
 ENV_CONFIG = ENV_CONFIG()
+TASK_CONFIG = TaskConfig()
+EDGE_CONFIG = EdgeConfig()
+QMIX_CONFIG = TrainingConfig()
+VCG_CONFIG = AuctionConfig()
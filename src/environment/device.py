@@ -1,5 +1,6 @@
-from typing import List, Optional
-from .task import Task
+import numpy as np
+from typing import List, Optional, Union, Tuple
+from .task import PRIORITIES, Task, TaskBatch
 
 class Device:
     """Класс для представления мобильного устройства"""
@@ -7,7 +8,9 @@ class Device:
     def __init__(self, device_id: int, importance: float = 1.0):
         self.device_id = device_id
         self.importance = importance  # От 0 до 1 (влияет на polarity)
-        self.submitted_tasks: List[Task] = []
+        # Отправленные задачи: Task или (TaskBatch, строки) - объекты создаются лениво
+        self._submissions: List[Union[Task, Tuple[TaskBatch, np.ndarray]]] = []
+        self.num_submitted = 0
         self.completed_tasks: List[Task] = []
         self.rejected_tasks: List[Task] = []
         self.total_payment: float = 0.0
@@ -15,7 +18,25 @@ class Device:
     
     def submit_task(self, task: Task):
         """Отправить задачу в систему"""
-        self.submitted_tasks.append(task)
+        self._submissions.append(task)
+        self.num_submitted += 1
+    
+    def submit_batch(self, batch: TaskBatch, rows: np.ndarray):
+        """Отправить задачи rows из пакета (без создания объектов Task)"""
+        self._submissions.append((batch, rows))
+        self.num_submitted += len(rows)
+    
+    @property
+    def submitted_tasks(self) -> List[Task]:
+        """Все отправленные задачи (объекты Task создаются при обращении)"""
+        tasks = []
+        for submission in self._submissions:
+            if isinstance(submission, Task):
+                tasks.append(submission)
+            else:
+                batch, rows = submission
+                tasks.extend(batch[k] for k in rows)
+        return tasks
     
     def task_completed(self, task: Task):
         """Задача успешно выполнена"""
@@ -33,9 +54,9 @@ class Device:
     @property
     def success_rate(self) -> float:
         """Процент успешно завершённых задач"""
-        if len(self.submitted_tasks) == 0:
+        if self.num_submitted == 0:
             return 0.0
-        return len(self.completed_tasks) / len(self.submitted_tasks)
+        return len(self.completed_tasks) / self.num_submitted
     
     @property
     def avg_payment(self) -> float:
@@ -43,3 +64,165 @@ class Device:
         if len(self.completed_tasks) == 0:
             return 0.0
         return self.total_payment / len(self.completed_tasks)
+
+class DeviceTable:
+    """
+    Учёт всех устройств в массивах NumPy (память не растёт со временем)
+
+    Для каждого устройства хранятся счётчики задач и суммы платежей; список
+    задач заменён кольцевым окном последних recent_window отправленных задач
+    [num_devices x recent_window] (0 - окно не хранится).
+    """
+
+    # Столбцы TaskBatch, сохраняемые в окне (device_id - номер строки)
+    RECENT_COLUMNS = ('id', 'cpu_required', 'memory_required', 'priority', 'arrival_time', 'importance')
+
+    def __init__(self, num_devices: int, importance=1.0, recent_window: int = 0):
+        self.num_devices = num_devices
+        self.recent_window = recent_window
+        self.importance = np.broadcast_to(np.asarray(importance, dtype=np.float64), (num_devices,)).copy()
+        self.num_submitted = np.zeros(num_devices, dtype=np.int64)
+        self.num_completed = np.zeros(num_devices, dtype=np.int64)
+        self.num_rejected = np.zeros(num_devices, dtype=np.int64)
+        self.total_payment = np.zeros(num_devices, dtype=np.float64)
+        self.received_payment = np.zeros(num_devices, dtype=np.float64)  # последний платёж
+
+        empty = TaskBatch.empty()
+        self._recent = {
+            name: np.zeros((num_devices, recent_window), dtype=getattr(empty, name).dtype)
+            for name in self.RECENT_COLUMNS
+        }
+
+    def submit_batch(self, batch: TaskBatch):
+        """Учесть отправку задач пакета (всех устройств сразу)"""
+        if len(batch) == 0:
+            return
+        counts = np.bincount(batch.device_id, minlength=self.num_devices)
+        if self.recent_window > 0:
+            self._record_recent(batch, counts)
+        self.num_submitted += counts
+
+    def _record_recent(self, batch: TaskBatch, counts: np.ndarray):
+        """Дописать задачи в кольцевые окна (из пакета - не больше окна на устройство)"""
+        order = np.argsort(batch.device_id, kind='stable')
+        devices = batch.device_id[order]
+        rank = np.arange(len(order)) - np.searchsorted(devices, devices, side='left')
+        keep = rank >= counts[devices] - self.recent_window
+        rows, devices, rank = order[keep], devices[keep], rank[keep]
+        positions = (self.num_submitted[devices] + rank) % self.recent_window
+        for name, column in self._recent.items():
+            column[devices, positions] = getattr(batch, name)[rows]
+
+    def task_completed(self, device_ids: np.ndarray):
+        """Учесть выполненные задачи (device_id каждой задачи)"""
+        self.num_completed += np.bincount(device_ids, minlength=self.num_devices)
+
+    def task_rejected(self, device_ids: np.ndarray):
+        """Учесть отклонённые задачи (device_id каждой задачи)"""
+        self.num_rejected += np.bincount(device_ids, minlength=self.num_devices)
+
+    def receive_payment(self, device_ids: np.ndarray, amounts: np.ndarray):
+        """Учесть платежи устройствам"""
+        np.add.at(self.total_payment, device_ids, amounts)
+        self.received_payment[device_ids] = amounts
+
+    def success_rate(self) -> np.ndarray:
+        """Доля успешно завершённых задач каждого устройства [num_devices]"""
+        return np.divide(self.num_completed, self.num_submitted,
+                         out=np.zeros(self.num_devices), where=self.num_submitted > 0)
+
+    def avg_payment(self) -> np.ndarray:
+        """Средний платёж за выполненную задачу каждого устройства [num_devices]"""
+        return np.divide(self.total_payment, self.num_completed,
+                         out=np.zeros(self.num_devices), where=self.num_completed > 0)
+
+    def recent_tasks(self, device_id: int) -> List[Task]:
+        """Последние отправленные задачи устройства (по времени отправки)"""
+        n = min(int(self.num_submitted[device_id]), self.recent_window)
+        if n == 0:
+            return []
+        positions = (self.num_submitted[device_id] - n + np.arange(n)) % self.recent_window
+        batch = TaskBatch(
+            device_id=np.full(n, device_id, dtype=np.int64),
+            **{name: column[device_id, positions] for name, column in self._recent.items()}
+        )
+        return list(batch)
+
+class DeviceView:
+    """
+    Устройство DeviceTable с интерфейсом Device
+
+    Вместо списков задач - счётчики; submitted_tasks содержит только окно
+    последних задач.
+    """
+
+    def __init__(self, table: DeviceTable, device_id: int):
+        self.table = table
+        self.device_id = device_id
+
+    @property
+    def importance(self) -> float:
+        return float(self.table.importance[self.device_id])
+
+    @property
+    def num_submitted(self) -> int:
+        return int(self.table.num_submitted[self.device_id])
+
+    @property
+    def num_completed(self) -> int:
+        return int(self.table.num_completed[self.device_id])
+
+    @property
+    def num_rejected(self) -> int:
+        return int(self.table.num_rejected[self.device_id])
+
+    @property
+    def total_payment(self) -> float:
+        return float(self.table.total_payment[self.device_id])
+
+    @property
+    def received_payment(self) -> float:
+        return float(self.table.received_payment[self.device_id])
+
+    @property
+    def submitted_tasks(self) -> List[Task]:
+        """Последние отправленные задачи (не больше recent_window)"""
+        return self.table.recent_tasks(self.device_id)
+
+    def submit_task(self, task: Task):
+        """Отправить задачу в систему"""
+        self.table.submit_batch(TaskBatch(
+            id=np.array([task.id]),
+            device_id=np.array([self.device_id]),
+            cpu_required=np.array([task.cpu_required]),
+            memory_required=np.array([task.memory_required]),
+            priority=np.array([PRIORITIES.index(task.priority)], dtype=np.int8),
+            arrival_time=np.array([task.arrival_time]),
+            importance=np.array([task.importance])
+        ))
+
+    def task_completed(self, task: Task):
+        """Задача успешно выполнена"""
+        self.table.task_completed(np.array([self.device_id]))
+
+    def task_rejected(self, task: Task):
+        """Задача отклонена"""
+        self.table.task_rejected(np.array([self.device_id]))
+
+    def receive_payment(self, amount: float):
+        """Получить платёж"""
+        self.table.receive_payment(np.array([self.device_id]), np.array([amount]))
+
+    @property
+    def success_rate(self) -> float:
+        """Процент успешно завершённых задач"""
+        if self.num_submitted == 0:
+            return 0.0
+        return self.num_completed / self.num_submitted
+
+    @property
+    def avg_payment(self) -> float:
+        """Средний платёж за задачу"""
+        if self.num_completed == 0:
+            return 0.0
+        return self.total_payment / self.num_completed
@@ -0,0 +1,202 @@
+"""
+Векторизованное (struct-of-arrays) состояние edge-узлов
+Ресурсы всех узлов и все выполняющиеся задачи хранятся в плоских массивах
+NumPy: шаг моделирования, поиск завершённых задач и освобождение ресурсов
+выполняются операциями над целыми массивами
+"""
+
+import numpy as np
+from typing import List, Optional, Tuple
+from .task import Task
+from .task_registry import TaskRegistry
+
+class EdgeArrays:
+    """
+    Состояние num_edges узлов и выполняющихся на них задач
+
+    Выполняющиеся задачи занимают префикс [0, num_executing) массивов task_*;
+    завершённые удаляются сжатием по маске, новые дописываются в конец
+    (массивы растут удвоением). Ресурсы задач хранятся в TaskRegistry,
+    task_slot - слот задачи в нём.
+    """
+
+    def __init__(
+        self,
+        num_edges: int,
+        cpu_capacity,     # int или [num_edges]
+        memory_capacity,  # int или [num_edges]
+        bandwidth=0.0,
+        initial_tasks: int = 1024,
+        registry: Optional[TaskRegistry] = None
+    ):
+        self.num_edges = num_edges
+        self.cpu_capacity = np.broadcast_to(np.asarray(cpu_capacity, dtype=np.int64), (num_edges,)).copy()
+        self.memory_capacity = np.broadcast_to(np.asarray(memory_capacity, dtype=np.int64), (num_edges,)).copy()
+        self.bandwidth = np.broadcast_to(np.asarray(bandwidth, dtype=np.float64), (num_edges,)).copy()
+        self.cpu_used = np.zeros(num_edges, dtype=np.int64)
+        self.memory_used = np.zeros(num_edges, dtype=np.int64)
+
+        self.registry = registry if registry is not None else TaskRegistry(initial_tasks)
+        self.num_executing = 0
+        self.task_slot = np.empty(initial_tasks, dtype=np.int64)
+        self.task_node = np.empty(initial_tasks, dtype=np.int32)
+        self.task_remaining = np.empty(initial_tasks, dtype=np.float64)
+
+    @property
+    def cpu_available(self) -> np.ndarray:
+        return self.cpu_capacity - self.cpu_used
+
+    @property
+    def memory_available(self) -> np.ndarray:
+        return self.memory_capacity - self.memory_used
+
+    @property
+    def load(self) -> np.ndarray:
+        """Нормализованная нагрузка узлов (0..1) [num_edges]"""
+        return (self.cpu_used / self.cpu_capacity +
+                self.memory_used / self.memory_capacity) / 2
+
+    def can_accept(self, nodes: np.ndarray, cpu: np.ndarray, memory: np.ndarray) -> np.ndarray:
+        """Поместится ли каждая задача на свой узел по отдельности (без учёта соседних)"""
+        return ((self.cpu_available[nodes] >= cpu) &
+                (self.memory_available[nodes] >= memory))
+
+    def allocate(
+        self,
+        nodes: np.ndarray,     # [k]: узел задачи
+        task_ids: np.ndarray,  # [k]
+        cpu: np.ndarray,       # [k]: требуемые CPU циклы
+        memory: np.ndarray,    # [k]: требуемая память
+        device_ids=-1          # [k]: устройства-владельцы (-1 - неизвестно)
+    ):
+        """
+        Выделить ресурсы и начать выполнение k задач
+
+        Время обработки - cpu / cpu_capacity узла (как Task.get_processing_time).
+        Проверка ёмкости - на вызывающей стороне (can_accept).
+        """
+        nodes = np.asarray(nodes, dtype=np.int32)
+        k = len(nodes)
+        if self.num_executing + k > len(self.task_slot):
+            self._grow(self.num_executing + k)
+
+        cpu = np.broadcast_to(np.asarray(cpu, dtype=np.int64), (k,))
+        memory = np.broadcast_to(np.asarray(memory, dtype=np.int64), (k,))
+        new = slice(self.num_executing, self.num_executing + k)
+        self.task_slot[new] = self.registry.register(
+            np.asarray(task_ids), nodes, np.broadcast_to(device_ids, (k,)), cpu, memory
+        )
+        self.task_node[new] = nodes
+        self.task_remaining[new] = cpu / self.cpu_capacity[nodes]
+        self.num_executing += k
+
+        self.cpu_used += np.bincount(nodes, weights=cpu, minlength=self.num_edges).astype(np.int64)
+        self.memory_used += np.bincount(nodes, weights=memory, minlength=self.num_edges).astype(np.int64)
+
+    def step(self, dt: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Продвинуть время на dt: завершить задачи и освободить их ресурсы
+
+        Returns:
+            completed_ids: идентификаторы завершённых задач
+            completed_nodes: узлы, на которых они выполнялись
+        """
+        executing = slice(0, self.num_executing)
+        remaining = self.task_remaining[executing]
+        remaining -= dt
+        done = remaining <= 0
+        if not done.any():
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+
+        # Освободить ресурсы завершённых задач пакетом по их слотам
+        slots = self.task_slot[executing][done]
+        completed_ids = self.registry.task_id[slots]
+        completed_nodes, _, cpu, memory = self.registry.release(slots)
+        self.cpu_used -= np.bincount(completed_nodes, weights=cpu, minlength=self.num_edges).astype(np.int64)
+        self.memory_used -= np.bincount(completed_nodes, weights=memory, minlength=self.num_edges).astype(np.int64)
+
+        # Сжать выполняющиеся задачи в префикс
+        keep = ~done
+        kept = int(keep.sum())
+        for column in (self.task_slot, self.task_node, self.task_remaining):
+            column[:kept] = column[executing][keep]
+        self.num_executing = kept
+        return completed_ids, completed_nodes
+
+    def _grow(self, required: int):
+        """Увеличить массивы задач минимум до required"""
+        capacity = max(required, 2 * len(self.task_slot))
+        for name in ('task_slot', 'task_node', 'task_remaining'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.num_executing] = old[:self.num_executing]
+            setattr(self, name, new)
+
+class EdgeNodeView:
+    """
+    Узел векторизованного движка с интерфейсом EdgeNode
+
+    Атрибуты читаются из EdgeArrays (без копирования состояния), поэтому
+    код, работающий со списком env.edges, не зависит от движка.
+    """
+
+    def __init__(self, arrays: EdgeArrays, node_id: int):
+        self.arrays = arrays
+        self.node_id = node_id
+        self.task_queue: List[Task] = []
+
+    @property
+    def cpu_capacity(self) -> int:
+        return int(self.arrays.cpu_capacity[self.node_id])
+
+    @property
+    def memory_capacity(self) -> int:
+        return int(self.arrays.memory_capacity[self.node_id])
+
+    @property
+    def bandwidth(self) -> float:
+        return float(self.arrays.bandwidth[self.node_id])
+
+    @property
+    def cpu_used(self) -> int:
+        return int(self.arrays.cpu_used[self.node_id])
+
+    @property
+    def memory_used(self) -> int:
+        return int(self.arrays.memory_used[self.node_id])
+
+    @property
+    def cpu_available(self) -> int:
+        return self.cpu_capacity - self.cpu_used
+
+    @property
+    def memory_available(self) -> int:
+        return self.memory_capacity - self.memory_used
+
+    @property
+    def load(self) -> float:
+        """Нормализованная нагрузка узла (0..1)"""
+        return (self.cpu_used / self.cpu_capacity +
+                self.memory_used / self.memory_capacity) / 2
+
+    @property
+    def executing_tasks(self) -> dict:
+        """task_id -> remaining_time (копия, как EdgeNode.executing_tasks)"""
+        executing = slice(0, self.arrays.num_executing)
+        on_node = self.arrays.task_node[executing] == self.node_id
+        task_ids = self.arrays.registry.task_id[self.arrays.task_slot[executing][on_node]]
+        return dict(zip(task_ids.tolist(),
+                        self.arrays.task_remaining[executing][on_node].tolist()))
+
+    def can_accept_task(self, task: Task) -> bool:
+        """Может ли узел принять задачу?"""
+        return (self.cpu_available >= task.cpu_required and
+                self.memory_available >= task.memory_required)
+
+    def allocate_task(self, task: Task):
+        """Выделить ресурсы для задачи"""
+        self.arrays.allocate(
+            np.array([self.node_id]), np.array([task.id]),
+            np.array([task.cpu_required]), np.array([task.memory_required]),
+            np.array([task.device_id])
+        )
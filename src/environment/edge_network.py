@@ -1,14 +1,46 @@
-import random
+import heapq
 import numpy as np
 from typing import List, Tuple, Dict, Optional
-from .task import Task, TaskPriority
-from .device import Device
+from .task import PRIORITIES, Task, TaskBatch, TaskPriority
+from .device import DeviceTable, DeviceView
+from .history import NetworkHistory
+from .edge_arrays import EdgeArrays, EdgeNodeView
+from .task_registry import TaskRegistry
+from .workload import ArrivalSchedule, sample_tasks
 from ..config import ENV_CONFIG, TASK_CONFIG, EDGE_CONFIG
+from ..learning.reward_manager import RewardManager
+
+# Действия агента-узла над задачами, пришедшими за шаг
+ACTION_ACCEPT = 0       # Принять все, что помещаются
+ACTION_REJECT = 1       # Отклонить все
+ACTION_ACCEPT_HIGH = 2  # Принять только задачи с приоритетом HIGH
+ACTION_ACCEPT_LOW = 3   # Принять только задачи LOW и MEDIUM
+
+_HIGH = PRIORITIES.index(TaskPriority.HIGH)  # индекс HIGH в TaskBatch.priority
+
+# Наблюдение узла: загрузка CPU, загрузка памяти, выполняющиеся задачи, предложенные задачи
+OBS_FEATURES = 4
 
 class EdgeNode:
-    """Класс для представления edge-узла"""
+    """
+    Класс для представления edge-узла
     
-    def __init__(self, node_id: int, config: EDGE_CONFIG):
+    В событийном режиме (event_driven=True) время завершения задачи известно
+    при размещении и кладётся в кучу; шаг обрабатывает только наступившие
+    завершения - O(события · log n) вместо обхода всех выполняющихся задач.
+    executing_tasks тогда хранит время завершения по часам узла (clock).
+    
+    Ресурсы выполняющихся задач записаны в TaskRegistry (общем для узлов
+    сети или собственном), по слоту задачи они освобождаются за O(1).
+    """
+    
+    def __init__(
+        self,
+        node_id: int,
+        config: EDGE_CONFIG,
+        event_driven: bool = False,
+        registry: Optional[TaskRegistry] = None
+    ):
         self.node_id = node_id
         self.cpu_capacity = config.cpu_capacity
         self.memory_capacity = config.memory_capacity
@@ -18,6 +50,12 @@ class EdgeNode:
         self.memory_used = 0
         self.task_queue: List[Task] = []
         self.executing_tasks: Dict[int, float] = {}  # task_id -> remaining_time
+        self.registry = registry if registry is not None else TaskRegistry()
+        self._slots: Dict[int, int] = {}  # task_id -> слот в registry
+        
+        self.event_driven = event_driven
+        self.clock = 0.0  # Модельное время узла (сумма шагов)
+        self._completions: List[Tuple[float, int]] = []  # (finish, task_id)
     
     @property
     def cpu_available(self) -> int:
@@ -40,95 +78,297 @@ class EdgeNode:
     
     def allocate_task(self, task: Task):
         """Выделить ресурсы для задачи"""
-        self.cpu_used += task.cpu_required
-        self.memory_used += task.memory_required
-        # Вычислить время обработки
-        processing_time = task.get_processing_time(self.cpu_capacity)
-        self.executing_tasks[task.id] = processing_time
-    
-    def step(self) -> Tuple[List[Task], float]:
-        """Выполнить один шаг моделирования"""
+        self.allocate(task.id, task.device_id, task.cpu_required, task.memory_required)
+    
+    def allocate(self, task_id: int, device_id: int, cpu: int, memory: int):
+        """Выделить ресурсы для задачи по её полям (строка TaskBatch, без объекта Task)"""
+        self.cpu_used += cpu
+        self.memory_used += memory
+        self._slots[task_id] = self.registry.register_one(task_id, self.node_id, device_id, cpu, memory)
+        # Время обработки - как Task.get_processing_time
+        processing_time = cpu / self.cpu_capacity
+        if self.event_driven:
+            finish_time = self.clock + processing_time
+            self.executing_tasks[task_id] = finish_time
+            heapq.heappush(self._completions, (finish_time, task_id))
+        else:
+            self.executing_tasks[task_id] = processing_time
+    
+    def next_completion_time(self) -> Optional[float]:
+        """Ближайшее время завершения по часам узла (только событийный режим)"""
+        return self._completions[0][0] if self._completions else None
+    
+    def step(self, dt: float = 1.0) -> Tuple[List[Task], float]:
+        """Выполнить один шаг моделирования длиной dt"""
+        self.clock += dt
+        if self.event_driven:
+            return self._step_events()
+        
         completed_tasks = []
         total_latency = 0.0
         
         # Обновить время выполнения задач
         for task_id in list(self.executing_tasks.keys()):
-            self.executing_tasks[task_id] -= 1
+            self.executing_tasks[task_id] -= dt
             if self.executing_tasks[task_id] <= 0:
                 # Задача завершена
                 completed_tasks.append(task_id)
                 del self.executing_tasks[task_id]
+                self._release(task_id)
                 total_latency += 0.0  # TODO: добавить расчёт latency
         
-        # Освободить ресурсы
-        for task_id in completed_tasks:
-            # Найти задачу и освободить ресурсы
-            # (требуется дополнительная логика)
-            pass
-        
         return completed_tasks, total_latency
+    
+    def _release(self, task_id: int):
+        """Освободить ресурсы завершённой задачи по её слоту"""
+        _, _, cpu, memory = self.registry.release_one(self._slots.pop(task_id))
+        self.cpu_used -= cpu
+        self.memory_used -= memory
+    
+    def _step_events(self) -> Tuple[List[int], float]:
+        """Обработать завершения, наступившие к текущему времени, и освободить ресурсы"""
+        completed_tasks = []
+        while self._completions and self._completions[0][0] <= self.clock:
+            _, task_id = heapq.heappop(self._completions)
+            del self.executing_tasks[task_id]
+            self._release(task_id)
+            completed_tasks.append(task_id)
+        return completed_tasks, 0.0
 
 class EdgeNetwork:
     """Класс для представления edge-сети"""
     
-    def __init__(self, config: ENV_CONFIG = None):
+    def __init__(
+        self,
+        config: ENV_CONFIG = None,
+        engine: str = 'object',
+        seed: Optional[int] = None,
+        schedule: Optional[ArrivalSchedule] = None,
+        history: Optional[NetworkHistory] = None
+    ):
+        """
+        Args:
+            config: конфигурация окружения
+            engine: 'object' - EdgeNode со словарями задач,
+                    'event' - EdgeNode с кучей событий завершения,
+                    'vectorized' - EdgeArrays (ресурсы и задачи в массивах NumPy)
+            seed: зерно собственного генератора случайных чисел
+                (None - глобальный np.random)
+            schedule: заранее заданные приходы эпизода (workload.build_schedule или
+                trace.TaskTrace.replay - любой объект с методом window(time));
+                None - пуассоновские приходы с интенсивностью lambda_arrival на каждом шаге
+            history: хранилище истории шагов (кольцевой буфер, сброс на диск, шаг записи);
+                None - NetworkHistory без ограничения длины
+        """
+        if engine not in ('object', 'event', 'vectorized'):
+            raise ValueError(f"unknown engine '{engine}'")
         self.config = config or ENV_CONFIG
+        self.engine = engine
+        self.arrays: Optional[EdgeArrays] = None
+        self.registry = TaskRegistry()  # Ресурсы выполняющихся задач всех узлов
         self.edges: List[EdgeNode] = []
-        self.devices: List[Device] = []
+        self.device_table: Optional[DeviceTable] = None
+        self.devices: List[DeviceView] = []
         self.current_time = 0
         self.task_counter = 0
+        self.schedule = schedule
+        self.new_tasks = TaskBatch.empty()  # Задачи, пришедшие на последнем шаге
+        self.offered = np.zeros(self.config.num_edges, dtype=np.int64)
+        self.reward_manager = RewardManager(self.config.num_edges, self.config.num_devices)
+        
+        # Независимый поток случайных чисел (интерфейс RandomState совпадает с np.random)
+        self._np_random = np.random if seed is None else np.random.RandomState(seed)
         
         # Инициализировать узлы и устройства
         self._initialize_network()
         
         # История для анализа
-        self.history = {
-            'time': [],
-            'accepted_tasks': [],
-            'rejected_tasks': [],
-            'avg_latency': [],
-            'social_welfare': [],
-            'load_per_node': [[] for _ in range(self.config.num_edges)],
-        }
+        self.history = NetworkHistory(self.config.num_edges) if history is None else history
+        
+        self._cpu_capacity = np.array([edge.cpu_capacity for edge in self.edges])
+        
+        # Агрегаты состояния: обновляются при размещении, завершении и постановке в очередь
+        self.pending_tasks = 0
+        self._node_loads = np.zeros(self.config.num_edges)
+        self._available = np.empty((self.config.num_edges, 2), dtype=np.int64)  # (cpu, memory)
+        for i in range(self.config.num_edges):
+            self._refresh_node(i)
+        # get_state отдаёт представления только для чтения (без копии)
+        self._state_views = {}
+        for name, array in (('node_loads', self._node_loads), ('available_resources', self._available)):
+            view = array.view()
+            view.flags.writeable = False
+            self._state_views[name] = view
     
     def _initialize_network(self):
         """Инициализировать сеть"""
         # Создать edge-узлы
-        for i in range(self.config.num_edges):
-            self.edges.append(EdgeNode(i, EDGE_CONFIG))
+        if self.engine == 'vectorized':
+            self.arrays = EdgeArrays(
+                self.config.num_edges,
+                EDGE_CONFIG.cpu_capacity,
+                EDGE_CONFIG.memory_capacity,
+                EDGE_CONFIG.bandwidth,
+                registry=self.registry
+            )
+            self.edges = [EdgeNodeView(self.arrays, i) for i in range(self.config.num_edges)]
+        else:
+            for i in range(self.config.num_edges):
+                self.edges.append(EdgeNode(i, EDGE_CONFIG, event_driven=self.engine == 'event',
+                                           registry=self.registry))
         
         # Создать устройства с распределением важности
-        importance_dist = np.random.beta(2, 5, self.config.num_devices)
-        for i in range(self.config.num_devices):
-            self.devices.append(Device(i, importance=float(importance_dist[i])))
+        importance_dist = self._np_random.beta(2, 5, self.config.num_devices)
+        self.device_table = DeviceTable(
+            self.config.num_devices, importance_dist,
+            recent_window=self.config.device_recent_tasks
+        )
+        self.devices = [DeviceView(self.device_table, i) for i in range(self.config.num_devices)]
     
     def generate_tasks(self):
-        """Сгенерировать новые задачи"""
-        # Пуассоновский процесс прихода задач
-        num_new_tasks = np.random.poisson(self.config.arrival_rate)
-        
-        for _ in range(num_new_tasks):
-            device_id = random.randint(0, self.config.num_devices - 1)
-            cpu = random.randint(TASK_CONFIG.cpu_min, TASK_CONFIG.cpu_max)
-            memory = random.randint(TASK_CONFIG.memory_min, TASK_CONFIG.memory_max)
-            priority = random.choice(list(TaskPriority))
-            importance = random.uniform(0.5, 1.0)
-            
-            task = Task(
-                id=self.task_counter,
-                device_id=device_id,
-                cpu_required=cpu,
-                memory_required=memory,
-                priority=priority,
-                arrival_time=self.current_time,
-                importance=importance
+        """Сгенерировать новые задачи (столбцами TaskBatch, несколько вызовов генератора)"""
+        if self.schedule is not None:
+            # Приходы эпизода уже сгенерированы: взять окно текущего шага
+            batch = self.schedule.window(self.current_time)
+        else:
+            # Пуассоновский процесс прихода задач
+            num_new_tasks = self._np_random.poisson(self.config.lambda_arrival)
+            batch = sample_tasks(
+                self._np_random,
+                np.full(num_new_tasks, self.current_time),
+                self.task_counter,
+                self.config.num_devices
             )
-            
-            self.devices[device_id].submit_task(task)
-            self.task_counter += 1
+        self.new_tasks = batch
+        self.task_counter += len(batch)
+        
+        # Учесть отправку задач устройствами (счётчики и окна последних задач)
+        self.device_table.submit_batch(batch)
+    
+    def allocate_task(self, task: Task, node_id: int) -> bool:
+        """Разместить задачу на узле, если хватает ресурсов"""
+        edge = self.edges[node_id]
+        if not edge.can_accept_task(task):
+            return False
+        edge.allocate_task(task)
+        self._refresh_node(node_id)
+        return True
+    
+    def enqueue_task(self, task: Task, node_id: int):
+        """Поставить задачу в очередь узла"""
+        self.edges[node_id].task_queue.append(task)
+        self.pending_tasks += 1
+    
+    def _refresh_node(self, node_id: int):
+        """Обновить агрегаты состояния одного узла (O(1))"""
+        edge = self.edges[node_id]
+        self._node_loads[node_id] = edge.load
+        self._available[node_id] = (edge.cpu_available, edge.memory_available)
+    
+    def _refresh_arrays(self):
+        """Обновить агрегаты всех узлов векторизованного движка (в те же массивы)"""
+        arrays = self.arrays
+        np.subtract(arrays.cpu_capacity, arrays.cpu_used, out=self._available[:, 0])
+        np.subtract(arrays.memory_capacity, arrays.memory_used, out=self._available[:, 1])
+        np.divide(arrays.cpu_used, arrays.cpu_capacity, out=self._node_loads)
+        self._node_loads += arrays.memory_used / arrays.memory_capacity
+        self._node_loads /= 2
+    
+    def offer_tasks(self, actions: np.ndarray) -> Tuple[np.ndarray, int, int]:
+        """
+        Предложить пришедшие за шаг задачи узлам и применить действия агентов
+        
+        Задача устройства d предлагается узлу d % num_edges. Узел принимает
+        задачу, если это разрешает его действие и хватает ресурсов.
+        
+        Args:
+            actions: действие каждого узла [num_edges] (ACTION_*)
+        
+        Returns:
+            rewards: локальное вознаграждение узлов [num_edges] (RewardManager)
+            accepted: число принятых задач
+            rejected: число отклонённых задач
+        """
+        batch = self.new_tasks
+        num_edges = self.config.num_edges
+        nodes = batch.device_id % num_edges
+        self.offered[:] = np.bincount(nodes, minlength=num_edges)
+        
+        # Разрешение действием узла - по столбцам TaskBatch
+        node_actions = np.asarray(actions)[nodes]
+        high = batch.priority == _HIGH
+        allowed = ((node_actions == ACTION_ACCEPT) |
+                   ((node_actions == ACTION_ACCEPT_HIGH) & high) |
+                   ((node_actions == ACTION_ACCEPT_LOW) & ~high))
+        
+        # Проверка ресурсов последовательна (задача занимает ресурсы следующих) - цикл по строкам
+        rows = np.flatnonzero(allowed)
+        accept = np.zeros(len(batch), dtype=bool)
+        cpu_free = self._available[:, 0].tolist()
+        memory_free = self._available[:, 1].tolist()
+        for k, node, cpu, memory in zip(rows.tolist(), nodes[rows].tolist(),
+                                        batch.cpu_required[rows].tolist(), batch.memory_required[rows].tolist()):
+            if cpu <= cpu_free[node] and memory <= memory_free[node]:
+                cpu_free[node] -= cpu
+                memory_free[node] -= memory
+                accept[k] = True
+        self._allocate_rows(batch, nodes, accept)
+        
+        task_rewards = self.reward_manager.compute_local_rewards(
+            accept, batch.value, batch.cpu_required / self._cpu_capacity[nodes]
+        )
+        rewards = np.bincount(nodes, weights=task_rewards, minlength=num_edges)
+        self.device_table.task_rejected(batch.device_id[~accept].astype(np.int64))
+        accepted = int(accept.sum())
+        return rewards, accepted, len(batch) - accepted
+    
+    def _allocate_rows(self, batch: TaskBatch, nodes: np.ndarray, accept: np.ndarray):
+        """Разместить принятые задачи TaskBatch (ресурсы уже проверены) и обновить агрегаты"""
+        if not accept.any():
+            return
+        if self.arrays is not None:
+            self.arrays.allocate(nodes[accept], batch.id[accept], batch.cpu_required[accept],
+                                 batch.memory_required[accept], batch.device_id[accept])
+            self._refresh_arrays()
+            return
+        columns = (nodes[accept], batch.id[accept], batch.device_id[accept],
+                   batch.cpu_required[accept], batch.memory_required[accept])
+        for node, task_id, device_id, cpu, memory in zip(*(column.tolist() for column in columns)):
+            self.edges[node].allocate(task_id, device_id, cpu, memory)
+        for node in np.unique(nodes[accept]).tolist():
+            self._refresh_node(node)
+    
+    def get_observations(self) -> np.ndarray:
+        """Наблюдения агентов-узлов [num_edges x OBS_FEATURES]"""
+        obs = np.empty((self.config.num_edges, OBS_FEATURES))
+        if self.arrays is not None:
+            obs[:, 0] = self.arrays.cpu_used / self.arrays.cpu_capacity
+            obs[:, 1] = self.arrays.memory_used / self.arrays.memory_capacity
+            obs[:, 2] = np.bincount(
+                self.arrays.task_node[:self.arrays.num_executing], minlength=self.config.num_edges
+            )
+        else:
+            for i, edge in enumerate(self.edges):
+                obs[i, :3] = (edge.cpu_used / edge.cpu_capacity,
+                              edge.memory_used / edge.memory_capacity,
+                              len(edge.executing_tasks))
+        obs[:, 3] = self.offered
+        return obs
     
-    def step(self) -> Dict:
-        """Выполнить один шаг моделирования"""
+    def next_completion_time(self) -> Optional[float]:
+        """Ближайшее завершение задачи в сети (engine='event'), None - задач нет"""
+        times = [edge.next_completion_time() for edge in self.edges]
+        times = [t for t in times if t is not None]
+        return min(times) if times else None
+    
+    def step(self, actions: Optional[np.ndarray] = None) -> Dict:
+        """
+        Выполнить один шаг моделирования
+        
+        Args:
+            actions: действия узлов [num_edges] для пришедших задач (см. offer_tasks);
+                None - задачи только генерируются
+        """
         self.current_time += 1
         
         # Сгенерировать новые задачи
@@ -142,32 +382,41 @@ class EdgeNetwork:
             'avg_latency': 0,
         }
         
-        for edge in self.edges:
-            completed, latency = edge.step()
-            metrics['completed'] += len(completed)
-            metrics['avg_latency'] += latency
+        if self.arrays is not None:
+            # Все узлы за одну операцию над массивами
+            completed, _ = self.arrays.step()
+            metrics['completed'] = len(completed)
+            if len(completed):
+                self._refresh_arrays()
+        else:
+            for edge in self.edges:
+                completed, latency = edge.step()
+                metrics['completed'] += len(completed)
+                if completed:
+                    self._refresh_node(edge.node_id)
+                metrics['avg_latency'] += latency
         
-        # Записать в историю
-        self.history['time'].append(self.current_time)
-        self.history['accepted_tasks'].append(metrics['accepted'])
-        self.history['rejected_tasks'].append(metrics['rejected'])
-        self.history['avg_latency'].append(metrics['avg_latency'])
+        # Распределить пришедшие задачи по действиям агентов
+        if actions is not None:
+            metrics['rewards'], metrics['accepted'], metrics['rejected'] = self.offer_tasks(actions)
         
-        # Нагрузка на узлы
-        for i, edge in enumerate(self.edges):
-            self.history['load_per_node'][i].append(edge.load)
+        # Записать в историю
+        self.history.record(
+            self.current_time, metrics['accepted'], metrics['rejected'], metrics['avg_latency'], self._node_loads
+        )
         
         return metrics
     
     def get_state(self) -> Dict:
-        """Получить текущее состояние сети"""
-        state = {
+        """
+        Получить текущее состояние сети за O(1)
+        
+        node_loads [num_edges] и available_resources [num_edges x 2] (cpu, memory) -
+        представления только для чтения поддерживаемых сетью массивов: они
+        отражают последующие шаги, для снимка нужна копия.
+        """
+        return {
             'time': self.current_time,
-            'pending_tasks': sum(len(edge.task_queue) for edge in self.edges),
-            'node_loads': [edge.load for edge in self.edges],
-            'available_resources': [
-                (edge.cpu_available, edge.memory_available) 
-                for edge in self.edges
-            ],
+            'pending_tasks': self.pending_tasks,
+            **self._state_views,
         }
-        return state
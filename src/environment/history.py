@@ -0,0 +1,119 @@
+"""
+История моделирования edge-сети
+Метрики шагов хранятся в предвыделенных столбцах NumPy (нагрузка узлов -
+матрица [T x num_edges]), поэтому память ограничена размером буфера, а не
+длиной эпизода
+"""
+
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from ..utils.column_ring import ColumnRing
+
+# Скалярные метрики шага: столбец -> тип
+SCALAR_COLUMNS = {
+    'time': np.int64,
+    'accepted_tasks': np.int64,
+    'rejected_tasks': np.int64,
+    'avg_latency': np.float64,
+    'social_welfare': np.float64,
+}
+
+class NetworkHistory:
+    """
+    История шагов EdgeNetwork в предвыделенных массивах (utils/column_ring.py)
+
+    Режимы:
+        max_steps=None, spill_dir=None - хранить всё (массивы растут удвоением)
+        max_steps=N                    - кольцевой буфер последних N записей
+        spill_dir=...                  - заполненный буфер (max_steps или chunk_size
+                                         записей) сбрасывается на диск в .npz
+
+    Записывается каждый stride-й шаг. Доступ по ключам прежнего словаря
+    истории: history['accepted_tasks'], history['load_per_node'] ([num_edges x T]).
+    """
+
+    load_chunk = staticmethod(ColumnRing.load_chunk)
+
+    def __init__(
+        self,
+        num_edges: int,
+        max_steps: Optional[int] = None,
+        spill_dir: Optional[Union[str, Path]] = None,
+        chunk_size: int = 4096,
+        stride: int = 1
+    ):
+        if stride < 1:
+            raise ValueError("stride must be >= 1")
+        self.num_edges = num_edges
+        self.max_steps = max_steps
+        self.stride = stride
+        columns = {name: (dtype, ()) for name, dtype in SCALAR_COLUMNS.items()}
+        columns['load'] = (np.float64, (num_edges,))
+        self._steps = ColumnRing(columns, max_size=max_steps, spill_dir=spill_dir,
+                                 chunk_size=chunk_size, spill_prefix='network_history')
+        self._steps_seen = 0
+
+    def record(
+        self,
+        time: int,
+        accepted: int,
+        rejected: int,
+        avg_latency: float,
+        load: np.ndarray,  # [num_edges]
+        social_welfare: float = np.nan
+    ):
+        """Записать шаг (пропускается, если это не stride-й шаг)"""
+        self._steps_seen += 1
+        if (self._steps_seen - 1) % self.stride:
+            return
+        self._steps.append({
+            'time': time,
+            'accepted_tasks': accepted,
+            'rejected_tasks': rejected,
+            'avg_latency': avg_latency,
+            'social_welfare': social_welfare,
+            'load': load,
+        })
+
+    def spill(self):
+        """Сбросить записи из памяти на диск (один .npz на сброс)"""
+        self._steps.spill()
+
+    @property
+    def spill_dir(self) -> Optional[Path]:
+        return self._steps.spill_dir
+
+    @property
+    def spilled_chunks(self) -> List[Path]:
+        return self._steps.spilled_chunks
+
+    @property
+    def load(self) -> np.ndarray:
+        """Нагрузка узлов записей в памяти [T x num_edges] в хронологическом порядке"""
+        return self._steps['load']
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        if name == 'load_per_node':
+            return self.load.T
+        if name not in SCALAR_COLUMNS:
+            raise KeyError(name)
+        return self._steps[name]
+
+    def keys(self) -> List[str]:
+        return list(SCALAR_COLUMNS) + ['load_per_node']
+
+    def as_dict(self) -> Dict[str, np.ndarray]:
+        """
+        Плоские столбцы для экспорта (например, pandas.DataFrame(history.as_dict())):
+        скалярные метрики и load_<i> - столбцы матрицы нагрузки.
+        Пока кольцевой буфер не перекручен, все столбцы - представления без копии.
+        """
+        columns = {name: self[name] for name in SCALAR_COLUMNS}
+        load = self.load
+        for i in range(self.num_edges):
+            columns[f"load_{i}"] = load[:, i]
+        return columns
+
+    def __len__(self) -> int:
+        return len(self._steps)
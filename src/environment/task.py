@@ -1,6 +1,7 @@
 import dataclasses
+import numpy as np
 from enum import Enum
-from typing import Optional
+from typing import Iterator, Optional
 
 class TaskPriority(Enum):
     LOW = 0.5
@@ -32,3 +33,55 @@ class Task:
     def get_processing_time(self, cpu_capacity: int) -> float:
         """Оценка времени обработки на узле с заданной CPU"""
         return self.cpu_required / cpu_capacity  # в условных единицах времени
+
+# Индекс приоритета в TaskBatch.priority -> TaskPriority
+PRIORITIES = tuple(TaskPriority)
+PRIORITY_VALUES = np.array([p.value for p in PRIORITIES])
+
+@dataclasses.dataclass
+class TaskBatch:
+    """
+    Задачи в столбцовом виде: по массиву NumPy на поле
+
+    Объекты Task создаются только по запросу (индексация, итерация).
+    """
+    id: np.ndarray               # [k] int64
+    device_id: np.ndarray        # [k]
+    cpu_required: np.ndarray     # [k]
+    memory_required: np.ndarray  # [k]
+    priority: np.ndarray         # [k] int8: индекс в PRIORITIES
+    arrival_time: np.ndarray     # [k]
+    importance: np.ndarray       # [k]
+
+    @classmethod
+    def empty(cls) -> 'TaskBatch':
+        return cls(*(np.empty(0, dtype=dtype) for dtype in (
+            np.int64, np.int64, np.int64, np.int64, np.int8, np.int64, np.float64
+        )))
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    @property
+    def value(self) -> np.ndarray:
+        """Ценность задач для устройств [k] (как Task.value)"""
+        return PRIORITY_VALUES[self.priority] * self.importance
+
+    def select(self, rows) -> 'TaskBatch':
+        """Подмножество задач rows (для среза - представления без копии)"""
+        return TaskBatch(*(getattr(self, field.name)[rows] for field in dataclasses.fields(self)))
+
+    def __getitem__(self, k: int) -> Task:
+        return Task(
+            id=int(self.id[k]),
+            device_id=int(self.device_id[k]),
+            cpu_required=int(self.cpu_required[k]),
+            memory_required=int(self.memory_required[k]),
+            priority=PRIORITIES[self.priority[k]],
+            arrival_time=int(self.arrival_time[k]),
+            importance=float(self.importance[k])
+        )
+
+    def __iter__(self) -> Iterator[Task]:
+        for k in range(len(self)):
+            yield self[k]
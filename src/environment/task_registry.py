@@ -0,0 +1,101 @@
+"""
+Реестр выполняющихся задач
+Slot map: ресурсы, узел и устройство каждой задачи лежат в массивах по
+номеру слота, освобождённые слоты переиспользуются через стек свободных.
+Слот выдаётся при размещении задачи и хранится у узла, поэтому
+освобождение ресурсов при завершении - O(1) на задачу (или одна операция
+над массивами для пакета).
+"""
+
+import numpy as np
+from typing import Tuple
+
+class TaskRegistry:
+    """Ресурсы выполняющихся задач по слотам (массивы растут удвоением)"""
+
+    def __init__(self, initial_slots: int = 1024):
+        self.num_active = 0
+        self.task_id = np.empty(initial_slots, dtype=np.int64)
+        self.node = np.empty(initial_slots, dtype=np.int32)
+        self.device_id = np.empty(initial_slots, dtype=np.int64)
+        self.cpu = np.empty(initial_slots, dtype=np.int64)
+        self.memory = np.empty(initial_slots, dtype=np.int64)
+        # Свободные слоты: стек в _free[:_num_free] (сверху - младшие)
+        self._free = np.arange(initial_slots - 1, -1, -1, dtype=np.int64)
+        self._num_free = initial_slots
+
+    def __len__(self) -> int:
+        return self.num_active
+
+    def register(
+        self,
+        task_ids: np.ndarray,   # [k]
+        nodes: np.ndarray,      # [k]: узел, на котором выполняется задача
+        device_ids: np.ndarray, # [k]: устройство-владелец
+        cpu: np.ndarray,        # [k]
+        memory: np.ndarray      # [k]
+    ) -> np.ndarray:
+        """Занять k слотов под задачи, вернуть номера слотов [k]"""
+        k = len(task_ids)
+        if k > self._num_free:
+            self._grow(self.num_active + k)
+        slots = self._free[self._num_free - k:self._num_free][::-1].copy()
+        self._num_free -= k
+        self.task_id[slots] = task_ids
+        self.node[slots] = nodes
+        self.device_id[slots] = device_ids
+        self.cpu[slots] = cpu
+        self.memory[slots] = memory
+        self.num_active += k
+        return slots
+
+    def register_one(self, task_id: int, node: int, device_id: int, cpu: int, memory: int) -> int:
+        """Занять слот под одну задачу"""
+        if self._num_free == 0:
+            self._grow(self.num_active + 1)
+        self._num_free -= 1
+        slot = int(self._free[self._num_free])
+        self.task_id[slot] = task_id
+        self.node[slot] = node
+        self.device_id[slot] = device_id
+        self.cpu[slot] = cpu
+        self.memory[slot] = memory
+        self.num_active += 1
+        return slot
+
+    def release(self, slots: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Освободить слоты пакета завершённых задач
+
+        Returns:
+            node, device_id, cpu, memory: ресурсы освобождённых задач [k]
+        """
+        footprint = (self.node[slots], self.device_id[slots], self.cpu[slots], self.memory[slots])
+        k = len(slots)
+        self._free[self._num_free:self._num_free + k] = slots
+        self._num_free += k
+        self.num_active -= k
+        return footprint
+
+    def release_one(self, slot: int) -> Tuple[int, int, int, int]:
+        """Освободить слот одной задачи, вернуть (node, device_id, cpu, memory)"""
+        self._free[self._num_free] = slot
+        self._num_free += 1
+        self.num_active -= 1
+        return int(self.node[slot]), int(self.device_id[slot]), int(self.cpu[slot]), int(self.memory[slot])
+
+    def _grow(self, required: int):
+        """Увеличить число слотов минимум до required"""
+        old_capacity = len(self.task_id)
+        capacity = max(required, 2 * old_capacity)
+        for name in ('task_id', 'node', 'device_id', 'cpu', 'memory'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:old_capacity] = old
+            setattr(self, name, new)
+        free = np.empty(capacity, dtype=np.int64)
+        added = capacity - old_capacity
+        free[:added] = np.arange(capacity - 1, old_capacity - 1, -1)  # новые слоты - под существующими
+        free[added:added + self._num_free] = self._free[:self._num_free]
+        self._free = free
+        self._num_free += added
@@ -0,0 +1,287 @@
+"""
+Записанные трассы прихода задач
+Трасса - каталог с бинарным файлом на каждый столбец (сырые массивы NumPy
+фиксированного типа, строки отсортированы по времени прихода) и meta.json.
+Столбцы открываются через np.memmap, поэтому воспроизведение трассы из
+миллионов задач читает с диска только окна текущих шагов.
+"""
+
+import csv
+import json
+import math
+import os
+import numpy as np
+from itertools import islice
+from typing import Dict, Optional
+from .task import PRIORITIES, TaskBatch
+
+TRACE_VERSION = 1
+META_FILE = 'meta.json'
+
+# Столбец трассы -> тип хранения (id задачи - номер строки, не хранится)
+TRACE_COLUMNS = {
+    'arrival_time': np.dtype('<f8'),  # время прихода в единицах трассы (например, секунды)
+    'device_id': np.dtype('<i4'),
+    'cpu_required': np.dtype('<i4'),
+    'memory_required': np.dtype('<i4'),
+    'priority': np.dtype('i1'),       # индекс в PRIORITIES
+    'importance': np.dtype('<f4'),
+}
+
+_PRIORITY_INDEX = {p.name: i for i, p in enumerate(PRIORITIES)}
+
+class TraceWriter:
+    """
+    Запись трассы порциями (дописывание в файлы столбцов)
+
+    Порции должны идти по неубыванию времени прихода; meta.json
+    записывается в close(). Если блок with завершился исключением, трасса
+    не публикуется: файлы столбцов удаляются (abort).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, META_FILE)):  # прежняя трасса в каталоге недействительна
+            os.remove(os.path.join(path, META_FILE))
+        self.num_tasks = 0
+        self.start_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+        self._files = {name: open(os.path.join(path, f"{name}.bin"), 'wb') for name in TRACE_COLUMNS}
+
+    def append(self, columns: Dict[str, np.ndarray]):
+        """Дописать порцию задач (importance по умолчанию 1.0)"""
+        arrival_time = np.asarray(columns['arrival_time'], dtype=TRACE_COLUMNS['arrival_time'])
+        if len(arrival_time) == 0:
+            return
+        if np.any(np.diff(arrival_time) < 0) or (self.end_time is not None and arrival_time[0] < self.end_time):
+            raise ValueError("trace rows must be sorted by arrival_time")
+
+        # Сначала проверить все столбцы: отклонённая порция не должна попасть в файлы
+        k = len(arrival_time)
+        chunk = {}
+        for name, dtype in TRACE_COLUMNS.items():
+            if name == 'importance' and name not in columns:
+                values = np.ones(k, dtype=dtype)
+            elif name not in columns:
+                raise ValueError(f"missing trace column '{name}'")
+            else:
+                values = np.asarray(columns[name]).astype(dtype, copy=False)
+            if len(values) != k:
+                raise ValueError(f"column '{name}' has {len(values)} rows, expected {k}")
+            if name == 'priority':
+                _check_priority(columns[name])
+            chunk[name] = values
+        for name, values in chunk.items():
+            values.tofile(self._files[name])
+
+        if self.start_time is None:
+            self.start_time = float(arrival_time[0])
+        self.end_time = float(arrival_time[-1])
+        self.num_tasks += k
+
+    def close(self):
+        """Закрыть файлы столбцов и записать метаданные"""
+        for f in self._files.values():
+            f.close()
+        meta = {
+            'version': TRACE_VERSION,
+            'num_tasks': self.num_tasks,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'columns': {name: dtype.str for name, dtype in TRACE_COLUMNS.items()},
+        }
+        with open(os.path.join(self.path, META_FILE), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+    def abort(self):
+        """Закрыть файлы столбцов и удалить их без записи метаданных"""
+        for f in self._files.values():
+            f.close()
+            os.remove(f.name)
+        try:
+            os.rmdir(self.path)  # каталог, если в нём больше ничего нет
+        except OSError:
+            pass
+
+    def __enter__(self) -> 'TraceWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+def _check_priority(values):
+    """Приоритет - индекс в PRIORITIES"""
+    values = np.asarray(values)
+    if values.size and (values.min() < 0 or values.max() >= len(PRIORITIES)):
+        raise ValueError(f"trace priority must be in [0, {len(PRIORITIES)})")
+
+def _parse_priority(values) -> np.ndarray:
+    """Приоритеты CSV: имя TaskPriority ('HIGH') или индекс в PRIORITIES"""
+    indices = np.array([_PRIORITY_INDEX[v] if v in _PRIORITY_INDEX else int(v) for v in values], dtype=np.int64)
+    _check_priority(indices)
+    return indices.astype(np.int8)
+
+def convert_csv(
+    csv_path: str,
+    trace_path: str,
+    chunk_size: int = 100_000,
+    columns: Optional[Dict[str, str]] = None,
+    delimiter: str = ','
+) -> 'TaskTrace':
+    """
+    Преобразовать CSV (с заголовком) в бинарную трассу, читая по chunk_size строк
+
+    Args:
+        csv_path: исходный CSV, строки отсортированы по времени прихода
+        trace_path: каталог трассы
+        chunk_size: строк в порции (ограничивает память конвертации)
+        columns: столбец трассы -> имя столбца CSV (по умолчанию совпадают);
+            importance может отсутствовать (1.0)
+        delimiter: разделитель CSV
+
+    Returns:
+        TaskTrace: открытая трасса
+    """
+    columns = {name: (columns or {}).get(name, name) for name in TRACE_COLUMNS}
+    with open(csv_path, newline='') as f, TraceWriter(trace_path) as writer:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        missing = [name for name, source in columns.items()
+                   if source not in reader.fieldnames and name != 'importance']
+        if missing:
+            raise ValueError(f"CSV has no columns for {missing}")
+        has_importance = columns['importance'] in reader.fieldnames
+
+        while rows := list(islice(reader, chunk_size)):
+            chunk = {
+                name: np.array([row[columns[name]] for row in rows], dtype=dtype)
+                for name, dtype in TRACE_COLUMNS.items()
+                if name not in ('priority', 'importance')
+            }
+            chunk['priority'] = _parse_priority([row[columns['priority']] for row in rows])
+            if has_importance:
+                chunk['importance'] = np.array([row[columns['importance']] for row in rows],
+                                               dtype=TRACE_COLUMNS['importance'])
+            writer.append(chunk)
+    return TaskTrace(trace_path)
+
+class TaskTrace:
+    """Трасса, открытая только для чтения (столбцы - np.memmap)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != TRACE_VERSION:
+            raise ValueError(f"unsupported trace version {self.meta['version']}")
+
+        self.num_tasks = self.meta['num_tasks']
+        self.columns: Dict[str, np.ndarray] = {}
+        for name, dtype in self.meta['columns'].items():
+            if self.num_tasks == 0:  # пустой файл нельзя отобразить в память
+                self.columns[name] = np.empty(0, dtype=dtype)
+            else:
+                self.columns[name] = np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype,
+                                               mode='r', shape=(self.num_tasks,))
+
+    def __len__(self) -> int:
+        return self.num_tasks
+
+    @property
+    def arrival_time(self) -> np.ndarray:
+        return self.columns['arrival_time']
+
+    @property
+    def start_time(self) -> float:
+        return self.meta['start_time'] or 0.0
+
+    @property
+    def end_time(self) -> float:
+        return self.meta['end_time'] or 0.0
+
+    def rows(self, start: float, end: float) -> slice:
+        """Строки с временем прихода в [start, end) (бинарный поиск по memmap)"""
+        lo, hi = np.searchsorted(self.arrival_time, [start, end], side='left')
+        return slice(int(lo), int(hi))
+
+    def batch(self, rows: slice, arrival_time: int, num_devices: Optional[int] = None) -> TaskBatch:
+        """
+        Строки rows как TaskBatch (копия в памяти в типах TaskBatch)
+
+        arrival_time - шаг моделирования; num_devices - свернуть device_id
+        трассы по модулю числа устройств среды
+        """
+        device_id = self.columns['device_id'][rows].astype(np.int64)
+        if num_devices is not None:
+            device_id %= num_devices
+        k = len(device_id)
+        return TaskBatch(
+            id=np.arange(rows.start, rows.start + k, dtype=np.int64),
+            device_id=device_id,
+            cpu_required=self.columns['cpu_required'][rows].astype(np.int64),
+            memory_required=self.columns['memory_required'][rows].astype(np.int64),
+            priority=self.columns['priority'][rows].astype(np.int8),
+            arrival_time=np.full(k, arrival_time, dtype=np.int64),
+            importance=self.columns['importance'][rows].astype(np.float64)
+        )
+
+    def replay(
+        self,
+        time_scale: float = 1.0,
+        start_time: int = 1,
+        num_devices: Optional[int] = None,
+        origin: Optional[float] = None
+    ) -> 'TraceReplay':
+        """Воспроизведение трассы по шагам (см. TraceReplay)"""
+        return TraceReplay(self, time_scale, start_time, num_devices, origin)
+
+class TraceReplay:
+    """
+    Трасса как расписание приходов EdgeNetwork (интерфейс ArrivalSchedule)
+
+    Шаг start_time + s получает задачи с временем прихода в
+    [origin + s * time_scale, origin + (s + 1) * time_scale): time_scale -
+    единиц времени трассы на шаг, значения > 1 ускоряют воспроизведение.
+    """
+
+    def __init__(
+        self,
+        trace: TaskTrace,
+        time_scale: float = 1.0,
+        start_time: int = 1,
+        num_devices: Optional[int] = None,
+        origin: Optional[float] = None
+    ):
+        if time_scale <= 0:
+            raise ValueError("time_scale must be positive")
+        self.trace = trace
+        self.time_scale = float(time_scale)
+        self.start_time = start_time
+        self.num_devices = num_devices
+        self.origin = trace.start_time if origin is None else float(origin)
+
+    @property
+    def num_steps(self) -> int:
+        if len(self.trace) == 0 or self.trace.end_time < self.origin:
+            return 0
+        return math.floor((self.trace.end_time - self.origin) / self.time_scale) + 1
+
+    def _bound(self, s) -> np.ndarray:
+        """Время трассы начала шага s (одна формула для соседних окон)"""
+        return self.origin + np.asarray(s) * self.time_scale
+
+    def window(self, time: int) -> TaskBatch:
+        """Задачи, приходящие на шаге time (пусто вне трассы)"""
+        s = time - self.start_time
+        if not 0 <= s < self.num_steps:
+            return TaskBatch.empty()
+        rows = self.trace.rows(self._bound(s), self._bound(s + 1))
+        return self.trace.batch(rows, time, self.num_devices)
+
+    def counts(self) -> np.ndarray:
+        """Число приходов на каждом шаге [num_steps]"""
+        bounds = self._bound(np.arange(self.num_steps + 1))
+        return np.diff(np.searchsorted(self.trace.arrival_time, bounds, side='left'))
@@ -0,0 +1,80 @@
+"""
+N независимых edge-сетей, шагающих синхронно
+Наблюдения, вознаграждения и метрики всех сред возвращаются массивами
+[N, ...], чтобы выбор действий и обучение QMIX работали с целыми батчами
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+from .edge_network import EdgeNetwork, OBS_FEATURES
+from ..config import ENV_CONFIG
+
+class VecEdgeNetwork:
+    """
+    Векторизованная обёртка над num_envs экземплярами EdgeNetwork
+
+    Каждая среда получает собственный поток случайных чисел из
+    SeedSequence(seed), поэтому траектории воспроизводимы и независимы.
+    """
+
+    METRICS = ('accepted', 'rejected', 'completed', 'avg_latency')
+
+    def __init__(
+        self,
+        num_envs: int,
+        config: ENV_CONFIG = None,
+        engine: str = 'vectorized',
+        seed: Optional[int] = None
+    ):
+        self.num_envs = num_envs
+        self.config = config or ENV_CONFIG
+        self.engine = engine
+        self.num_agents = self.config.num_edges
+        self._seed_sequence = np.random.SeedSequence(seed)
+        self.envs: List[EdgeNetwork] = []
+        self.reset()
+
+    def reset(self) -> np.ndarray:
+        """
+        Создать новые среды (каждая со следующим независимым зерном)
+
+        Returns:
+            observations: [N x num_agents x OBS_FEATURES]
+        """
+        seeds = [int(child.generate_state(1)[0]) for child in self._seed_sequence.spawn(self.num_envs)]
+        self.envs = [EdgeNetwork(self.config, engine=self.engine, seed=s) for s in seeds]
+        return self.get_observations()
+
+    def step(self, actions: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """
+        Сделать шаг во всех средах
+
+        Args:
+            actions: действия агентов [N x num_agents] (см. EdgeNetwork.offer_tasks);
+                None - задачи только генерируются
+
+        Returns:
+            observations: [N x num_agents x OBS_FEATURES]
+            rewards: локальные вознаграждения [N x num_agents]
+            metrics: метрики шага, каждая [N]
+        """
+        rewards = np.zeros((self.num_envs, self.num_agents))
+        metrics = {name: np.zeros(self.num_envs) for name in self.METRICS}
+        for k, env in enumerate(self.envs):
+            step_metrics = env.step(None if actions is None else actions[k])
+            for name in self.METRICS:
+                metrics[name][k] = step_metrics[name]
+            if 'rewards' in step_metrics:
+                rewards[k] = step_metrics['rewards']
+        return self.get_observations(), rewards, metrics
+
+    def get_observations(self) -> np.ndarray:
+        """Наблюдения всех сред [N x num_agents x OBS_FEATURES]"""
+        obs = np.empty((self.num_envs, self.num_agents, OBS_FEATURES))
+        for k, env in enumerate(self.envs):
+            obs[k] = env.get_observations()
+        return obs
+
+    def get_states(self) -> List[Dict]:
+        """Состояния всех сред (EdgeNetwork.get_state)"""
+        return [env.get_state() for env in self.envs]
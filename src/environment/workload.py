@@ -0,0 +1,142 @@
+"""
+Нагрузка: расписание прихода задач на весь эпизод
+Интенсивность может меняться во времени (суточный цикл, всплески, 2x нагрузка
+сценария 2). Все приходы эпизода генерируются одним векторизованным проходом
+и хранятся как TaskBatch с индексами начала каждого шага, поэтому шаг среды
+только берёт срез следующего окна.
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, Tuple
+from .task import PRIORITIES, TaskBatch
+from ..config import TASK_CONFIG
+
+# Профиль интенсивности: время (шаги, массив) -> ожидаемое число приходов за единицу времени
+RateProfile = Callable[[np.ndarray], np.ndarray]
+
+def constant_rate(rate: float) -> RateProfile:
+    """Постоянная интенсивность"""
+    return lambda t: np.full(np.shape(t), float(rate))
+
+def diurnal_rate(base: float, amplitude: float, period: float, phase: float = 0.0) -> RateProfile:
+    """Суточный цикл: base * (1 + amplitude * sin(2π (t - phase) / period)), amplitude <= 1"""
+    return lambda t: base * (1 + amplitude * np.sin(2 * np.pi * (np.asarray(t) - phase) / period))
+
+def burst_rate(base: float, bursts: Sequence[Tuple[float, float, float]]) -> RateProfile:
+    """Ступенчатые всплески: base, умноженная на factor на интервалах [start, end)"""
+    def profile(t):
+        t = np.asarray(t, dtype=np.float64)
+        rate = np.full(t.shape, float(base))
+        for start, end, factor in bursts:
+            rate[(t >= start) & (t < end)] *= factor
+        return rate
+    return profile
+
+def scaled_rate(profile: RateProfile, factor: float) -> RateProfile:
+    """Профиль, умноженный на factor (например, 2x нагрузка сценария 2)"""
+    return lambda t: factor * profile(t)
+
+def sample_tasks(
+    rng,
+    arrival_time: np.ndarray,  # [k]: шаг прихода каждой задачи
+    first_id: int,
+    num_devices: int,
+    task_config=TASK_CONFIG
+) -> TaskBatch:
+    """
+    Случайные параметры k задач (по одному вызову генератора на поле)
+
+    rng - np.random.RandomState или модуль np.random
+    """
+    k = len(arrival_time)
+    return TaskBatch(
+        id=np.arange(first_id, first_id + k, dtype=np.int64),
+        device_id=rng.randint(0, num_devices, k).astype(np.int64),
+        cpu_required=rng.randint(task_config.cpu_min, task_config.cpu_max + 1, k).astype(np.int64),
+        memory_required=rng.randint(task_config.memory_min, task_config.memory_max + 1, k).astype(np.int64),
+        priority=rng.randint(0, len(PRIORITIES), k).astype(np.int8),
+        arrival_time=np.asarray(arrival_time, dtype=np.int64),
+        importance=rng.uniform(0.5, 1.0, k)
+    )
+
+@dataclass
+class ArrivalSchedule:
+    """
+    Приходы задач эпизода: задачи шага start_time + s - строки
+    offsets[s]:offsets[s + 1] пакета tasks
+    """
+    tasks: TaskBatch
+    offsets: np.ndarray  # [num_steps + 1]
+    start_time: int = 1  # EdgeNetwork.step генерирует задачи начиная с времени 1
+
+    @property
+    def num_steps(self) -> int:
+        return len(self.offsets) - 1
+
+    def window(self, time: int) -> TaskBatch:
+        """Задачи, приходящие на шаге time (пусто вне расписания)"""
+        s = time - self.start_time
+        if not 0 <= s < self.num_steps:
+            return TaskBatch.empty()
+        return self.tasks.select(slice(self.offsets[s], self.offsets[s + 1]))
+
+    def counts(self) -> np.ndarray:
+        """Число приходов на каждом шаге [num_steps]"""
+        return np.diff(self.offsets)
+
+def build_schedule(
+    num_steps: int,
+    rate: RateProfile,
+    num_devices: int,
+    rng=None,
+    method: str = 'thinning',
+    start_time: int = 1,
+    rate_max: Optional[float] = None,
+    task_config=TASK_CONFIG
+) -> ArrivalSchedule:
+    """
+    Сгенерировать приходы на num_steps шагов одним проходом
+
+    Методы:
+        'thinning' - неоднородный пуассоновский процесс в непрерывном времени
+                     (прореживание Льюиса-Шедлера): однородный процесс с
+                     интенсивностью max λ, каждая точка t сохраняется с
+                     вероятностью λ(t) / max λ; точки округляются вниз до шага
+        'per_step' - число приходов шага s ~ Poisson(λ(s)), как generate_tasks
+
+    Args:
+        num_steps: длина эпизода (шагов)
+        rate: профиль интенсивности (приходов за шаг)
+        num_devices: число устройств
+        rng: np.random.RandomState (None - глобальный np.random)
+        method: 'thinning' или 'per_step'
+        start_time: время первого шага расписания
+        rate_max: верхняя граница λ для прореживания
+            (по умолчанию максимум профиля на сетке с шагом 1/16)
+
+    Returns:
+        ArrivalSchedule: приходы эпизода
+    """
+    rng = np.random if rng is None else rng
+    if method == 'per_step':
+        counts = rng.poisson(np.maximum(rate(np.arange(num_steps)), 0))
+    elif method == 'thinning':
+        if rate_max is None:
+            grid = np.linspace(0, num_steps, 16 * num_steps + 1)
+            rate_max = float(np.max(rate(grid)))
+        if rate_max <= 0:
+            counts = np.zeros(num_steps, dtype=np.int64)
+        else:
+            total = rng.poisson(rate_max * num_steps)
+            times = rng.uniform(0, num_steps, total)
+            keep = rng.uniform(0, rate_max, total) < rate(times)
+            counts = np.bincount(times[keep].astype(np.int64), minlength=num_steps)[:num_steps]
+    else:
+        raise ValueError(f"unknown schedule method '{method}'")
+
+    offsets = np.zeros(num_steps + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    arrival_time = np.repeat(np.arange(start_time, start_time + num_steps), counts)
+    tasks = sample_tasks(rng, arrival_time, 0, num_devices, task_config)
+    return ArrivalSchedule(tasks=tasks, offsets=offsets, start_time=start_time)
@@ -1,12 +1,10 @@
 import numpy as np
 from typing import List
+from ..mechanisms import kernels
 
 def calculate_gini_coefficient(payments: List[float]) -> float:
     """Коэффициент Джини для платежей"""
-    payments = np.array(sorted(payments))
-    n = len(payments)
-    cumsum = np.cumsum(payments)
-    return (2 * np.sum((np.arange(1, n+1)) * payments)) / (n * np.sum(payments)) - (n + 1) / n
+    return kernels.gini(np.asarray(payments, dtype=np.float64))
 
 def calculate_fairness_index(allocations: np.ndarray) -> float:
     """Индекс справедливости Джини для распределений"""
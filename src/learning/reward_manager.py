@@ -8,6 +8,11 @@ from typing import Dict, List
 class RewardManager:
     """Класс для управления вознаграждениями агентов"""
     
+    # Локальное вознаграждение (общее для compute_local_reward и compute_local_rewards)
+    REJECTION_REWARD = -0.5  # Штраф за отклонение
+    TIME_PENALTY = 0.1       # За единицу времени обработки
+    ENERGY_PENALTY = 0.05    # За единицу энергии
+    
     def __init__(self, num_agents: int, num_devices: int):
         self.num_agents = num_agents
         self.num_devices = num_devices
@@ -35,19 +40,30 @@ class RewardManager:
             reward: локальное вознаграждение
         """
         if not task_accepted:
-            return -0.5  # Штраф за отклонение
+            return self.REJECTION_REWARD
         
         # Положительное вознаграждение за принятие ценной задачи
         value_reward = task_value
         
         # Штраф за время обработки
-        time_penalty = 0.1 * processing_time
+        time_penalty = self.TIME_PENALTY * processing_time
         
         # Штраф за энергию
-        energy_penalty = 0.05 * energy_used
+        energy_penalty = self.ENERGY_PENALTY * energy_used
         
         return value_reward - time_penalty - energy_penalty
     
+    def compute_local_rewards(
+        self,
+        tasks_accepted: np.ndarray,
+        task_values: np.ndarray,
+        processing_times: np.ndarray,
+        energy_used=0.0
+    ) -> np.ndarray:
+        """Локальные вознаграждения за k задач (как compute_local_reward, векторно) [k]"""
+        rewards = task_values - self.TIME_PENALTY * processing_times - self.ENERGY_PENALTY * energy_used
+        return np.where(tasks_accepted, rewards, self.REJECTION_REWARD)
+    
     def compute_global_reward(
         self,
         social_welfare: float,
@@ -1,16 +1,21 @@
 import torch
 import torch.optim as optim
 import numpy as np
+from typing import Optional
 from ..agents.networks import GRUAgent, MixingNetwork
 from ..agents.experience_buffer import ExperienceBuffer
+from ..agents.memmap_buffer import MemmapExperienceBuffer
+from ..agents.prioritized_buffer import PrioritizedExperienceBuffer
+from ..agents.sequence_buffer import EpisodeSequenceBuffer
 from ..mechanisms.payments import calculate_vcg_payments
 from .metrics import calculate_td_error
-from ..config import QMIX_CONFIG, VCG_CONFIG
+from ..config import QMIX_CONFIG, TrainingConfig
 
 class QMIXTrainer:
     """Тренер для обучения QMIX агентов"""
     
-    def __init__(self, num_agents: int, obs_size: int, action_size: int):
+    def __init__(self, num_agents: int, obs_size: int, action_size: int, config: Optional[TrainingConfig] = None):
+        self.config = config or QMIX_CONFIG
         self.num_agents = num_agents
         self.obs_size = obs_size
         self.action_size = action_size
@@ -32,36 +37,85 @@ class QMIXTrainer:
             target.load_state_dict(agent.state_dict())
         
         # Mixing network
-        self.mixing_network = MixingNetwork(num_agents, action_size, 64)
-        self.target_mixing_network = MixingNetwork(num_agents, action_size, 64)
+        # Состояние гиперсетей - наблюдение, усреднённое по агентам [obs_size]
+        self.mixing_network = MixingNetwork(num_agents, action_size, 64, state_size=obs_size)
+        self.target_mixing_network = MixingNetwork(num_agents, action_size, 64, state_size=obs_size)
         self.target_mixing_network.load_state_dict(self.mixing_network.state_dict())
         
         # Оптимизаторы
         self.agent_optimizers = [
-            optim.Adam(agent.parameters(), lr=QMIX_CONFIG.learning_rate)
+            optim.Adam(agent.parameters(), lr=self.config.learning_rate)
             for agent in self.agent_networks
         ]
         self.mixing_optimizer = optim.Adam(
             self.mixing_network.parameters(),
-            lr=QMIX_CONFIG.learning_rate
+            lr=self.config.learning_rate
         )
         
         # Буфер опыта
-        self.buffer = ExperienceBuffer(QMIX_CONFIG.buffer_size)
+        self.sequence_replay = self.config.sequence_replay
+        if self.config.replay_dir is not None and (self.sequence_replay or self.config.prioritized_replay):
+            raise ValueError("replay_dir supports only uniform replay")
+        if self.sequence_replay:
+            if self.config.prioritized_replay:
+                raise ValueError("prioritized_replay is not supported with sequence_replay")
+            if self.config.replay_compression is not None:
+                raise ValueError("replay_compression is not supported with sequence_replay")
+            self.buffer = EpisodeSequenceBuffer(
+                max(1, self.config.buffer_size // self.config.sequence_length),
+                seq_len=self.config.sequence_length,
+                burn_in=self.config.burn_in,
+                store_hidden=self.config.store_hidden
+            )
+        elif self.config.prioritized_replay:
+            self.buffer = PrioritizedExperienceBuffer(
+                self.config.buffer_size,
+                alpha=self.config.priority_alpha,
+                beta_start=self.config.priority_beta_start,
+                beta_steps=self.config.priority_beta_steps,
+                compression=self.config.replay_compression
+            )
+        elif self.config.replay_dir is not None:
+            self.buffer = MemmapExperienceBuffer(
+                self.config.replay_dir,
+                self.config.buffer_size,
+                compression=self.config.replay_compression
+            )
+        else:
+            self.buffer = ExperienceBuffer(self.config.buffer_size, compression=self.config.replay_compression)
         self.update_counter = 0
-        self.epsilon = QMIX_CONFIG.epsilon_start
+        self.epsilon = self.config.epsilon_start
+        
+        # Скрытые состояния GRU при выборе действий (только для sequence_replay)
+        self.hidden_states = torch.zeros(num_agents, 64)
+        self._step_hidden = self.hidden_states.numpy().copy()  # состояние перед текущим шагом
     
     def add_experience(self, state, actions, rewards, next_state, done):
         """Добавить опыт в буфер"""
-        self.buffer.add(state, actions, rewards, next_state, done)
+        if self.sequence_replay:
+            self.buffer.add(state, actions, rewards, next_state, done, hidden=self._step_hidden)
+            if done:
+                self.reset_hidden_states()
+        else:
+            self.buffer.add(state, actions, rewards, next_state, done)
+    
+    def reset_hidden_states(self):
+        """Сбросить скрытые состояния (начало эпизода)"""
+        self.hidden_states = torch.zeros(self.num_agents, 64)
     
     def select_actions(self, obs: np.ndarray) -> np.ndarray:
         """Выбрать действия для каждого агента (ε-жадная стратегия)"""
         actions = []
+        self._step_hidden = self.hidden_states.numpy().copy()
         with torch.no_grad():
             for i, agent_net in enumerate(self.agent_networks):
                 obs_tensor = torch.FloatTensor(obs[i:i+1]).unsqueeze(0)
-                q_values, _ = agent_net(obs_tensor)
+                if self.sequence_replay:
+                    # Рекуррентный агент продолжает с состояния предыдущего шага
+                    q_values, hidden = agent_net(obs_tensor, self.hidden_states[i:i+1])
+                    self.hidden_states[i] = hidden[0]
+                else:
+                    q_values, _ = agent_net(obs_tensor)
                 
                 if np.random.random() < self.epsilon:
                     action = np.random.randint(0, self.action_size)
@@ -74,18 +128,43 @@ class QMIXTrainer:
     
     def train_step(self):
         """Выполнить один шаг обучения"""
-        if not self.buffer.is_ready(QMIX_CONFIG.batch_size):
+        if not self.buffer.is_ready(self.config.batch_size):
             return None
         
-        # Выборка батча
-        batch = self.buffer.sample(QMIX_CONFIG.batch_size)
+        # Выборка батча (буфер сразу отдаёт тензоры)
+        batch = self.buffer.sample(self.config.batch_size)
+        if self.sequence_replay:
+            loss = self._sequence_loss(batch)
+        else:
+            loss = self._transition_loss(batch)
+        
+        # Оптимизация
+        self.mixing_optimizer.zero_grad()
+        loss.backward()
+        self.mixing_optimizer.step()
         
-        # Преобразовать в тензоры
-        states = torch.FloatTensor(np.array(batch['states']))
-        actions = torch.LongTensor(np.array(batch['actions']))
-        rewards = torch.FloatTensor(np.array(batch['rewards']))
-        next_states = torch.FloatTensor(np.array(batch['next_states']))
-        dones = torch.FloatTensor(np.array(batch['dones']))
+        # Обновить целевые сети
+        self.update_counter += 1
+        if self.update_counter % self.config.target_update_freq == 0:
+            for agent, target in zip(self.agent_networks, self.target_networks):
+                target.load_state_dict(agent.state_dict())
+            self.target_mixing_network.load_state_dict(self.mixing_network.state_dict())
+        
+        # Снизить epsilon
+        self.epsilon = max(
+            self.config.epsilon_end,
+            self.epsilon * self.config.epsilon_decay
+        )
+        
+        return float(loss.item())
+    
+    def _transition_loss(self, batch) -> torch.Tensor:
+        """Потери по батчу отдельных переходов (GRU с нулевым состоянием на шаг)"""
+        states = batch['states']
+        actions = batch['actions']
+        rewards = batch['rewards']
+        next_states = batch['next_states']
+        dones = batch['dones']
         
         # Вычислить текущие Q-значения
         q_values_list = []
@@ -111,30 +190,63 @@ class QMIXTrainer:
         with torch.no_grad():
             global_q_target = self.target_mixing_network(q_targets, next_states.mean(dim=1))
         
-        # TD-ошибка
-        target = rewards.mean(dim=1) + QMIX_CONFIG.gamma * global_q_target.max(dim=1) * (1 - dones)
-        loss = ((global_q.max(dim=1) - target) ** 2).mean()
-        
-        # Оптимизация
-        self.mixing_optimizer.zero_grad()
-        loss.backward()
-        self.mixing_optimizer.step()
-        
-        # Обновить целевые сети
-        self.update_counter += 1
-        if self.update_counter % QMIX_CONFIG.target_update_freq == 0:
-            for agent, target in zip(self.agent_networks, self.target_networks):
-                target.load_state_dict(agent.state_dict())
-            for target in self.target_networks:
-                target.load_state_dict(self.mixing_network.state_dict())
-        
-        # Снизить epsilon
-        self.epsilon = max(
-            QMIX_CONFIG.epsilon_end,
-            self.epsilon * QMIX_CONFIG.epsilon_decay
+        # TD-ошибка (|δ| по каждому переходу батча)
+        td_errors = calculate_td_error(
+            global_q.max(dim=1).values, rewards.mean(dim=1),
+            global_q_target.max(dim=1).values, self.config.gamma, dones
         )
+        if 'weights' in batch:
+            # Приоритетная выборка: взвешивание весами важности и новые приоритеты
+            loss = (batch['weights'] * td_errors ** 2).mean()
+            self.buffer.update_priorities(batch['indices'].numpy(), td_errors.detach().numpy())
+        else:
+            loss = (td_errors ** 2).mean()
+        return loss
+    
+    def _sequence_loss(self, batch) -> torch.Tensor:
+        """
+        Потери по батчу фрагментов эпизодов
+        
+        GRU каждого агента разворачивается по всему фрагменту одним вызовом
+        после прогрева на префиксе; дополненные шаги исключаются маской.
+        """
+        burn_in = self.buffer.burn_in
+        states, next_states = batch['states'], batch['next_states']  # [B, burn_in + T, N, obs]
+        burn_in_lengths = batch['burn_in_lengths']
+        hidden = batch.get('hidden')  # [B, N, H] или None
+        
+        q_values_list, q_targets_list = [], []
+        for i, (agent_net, target_net) in enumerate(zip(self.agent_networks, self.target_networks)):
+            h0 = None if hidden is None else hidden[:, i]
+            q_vals, _ = agent_net.unroll(
+                states[:, burn_in:, i], h0, states[:, :burn_in, i], burn_in_lengths
+            )
+            q_values_list.append(q_vals)
+            with torch.no_grad():
+                q_targets, _ = target_net.unroll(
+                    next_states[:, burn_in:, i], h0, next_states[:, :burn_in, i], burn_in_lengths
+                )
+            q_targets_list.append(q_targets)
+        
+        q_values = torch.stack(q_values_list, dim=2)  # [B, T, num_agents, actions]
+        q_targets = torch.stack(q_targets_list, dim=2)
+        batch_size, seq_len = q_values.shape[:2]
+        
+        # Mixing network по всем шагам как по одному батчу [B * T]
+        global_q = self.mixing_network(
+            q_values.flatten(0, 1), states[:, burn_in:].mean(dim=2).flatten(0, 1)
+        ).view(batch_size, seq_len, -1)
+        with torch.no_grad():
+            global_q_target = self.target_mixing_network(
+                q_targets.flatten(0, 1), next_states[:, burn_in:].mean(dim=2).flatten(0, 1)
+            ).view(batch_size, seq_len, -1)
         
-        return float(loss.item())
+        td_errors = calculate_td_error(
+            global_q.max(dim=2).values, batch['rewards'][:, burn_in:].mean(dim=2),
+            global_q_target.max(dim=2).values, self.config.gamma, batch['dones'][:, burn_in:]
+        )
+        mask = batch['mask']
+        return (mask * td_errors ** 2).sum() / mask.sum().clamp(min=1)
     
     def update_with_vcg_rewards(self, vcg_payments: np.ndarray):
         """Обновить буфер опыта с VCG платежами"""
@@ -0,0 +1,465 @@
+"""
+Оптимальное распределение с учётом ёмкости edge-узлов
+Задача о назначениях как поток минимальной стоимости:
+источник -> устройство (1) -> узел (выгода w[i][j]) -> сток (ёмкость узла)
+"""
+
+import heapq
+import numpy as np
+import scipy.sparse as sp
+from typing import Optional, Sequence, Tuple
+
+_EPS = 1e-12
+
+def edge_slot_capacity(
+    edges: Sequence,
+    cpu_per_task: int,
+    memory_per_task: int
+) -> np.ndarray:
+    """
+    Ёмкость узлов в «слотах» (сколько задач ещё помещается на узел)
+
+    Args:
+        edges: список EdgeNode
+        cpu_per_task: CPU, требуемый одной задачей
+        memory_per_task: память, требуемая одной задачей
+
+    Returns:
+        capacity: вектор ёмкостей [n]
+    """
+    cpu = np.array([edge.cpu_available for edge in edges], dtype=np.int64)
+    memory = np.array([edge.memory_available for edge in edges], dtype=np.int64)
+    capacity = np.minimum(cpu // cpu_per_task, memory // memory_per_task)
+    return np.maximum(capacity, 0)
+
+class CapacitatedAssignment:
+    """
+    Оптимальное распределение устройств по узлам с ограниченной ёмкостью
+
+    Остаточная сеть потока сжимается до n вершин-узлов: дуга b -> c стоит
+    min(w[i][b] - w[i][c]) по устройствам i на узле b (переезд устройства).
+    Поскольку текущее решение оптимально, отрицательных циклов нет, и
+    кратчайшие пути ищутся Беллманом-Фордом за O(n^3).
+
+    Полезность и стоимость могут быть разреженными (CSR): тогда допустимы
+    только хранимые пары, а плотными становятся лишь строки устройств одного узла.
+    """
+
+    def __init__(self, valuations: np.ndarray, costs: np.ndarray, capacity: np.ndarray):
+        if sp.issparse(valuations) or sp.issparse(costs):
+            self.weights = sp.csr_matrix(valuations - costs, dtype=np.float64)
+            self.weights.sort_indices()
+        else:
+            self.weights = np.asarray(valuations, dtype=np.float64) - np.asarray(costs, dtype=np.float64)
+        self.capacity = np.asarray(capacity, dtype=np.int64)
+        m, n = self.weights.shape
+        if self.capacity.shape != (n,):
+            raise ValueError(f"capacity must have shape ({n},), got {self.capacity.shape}")
+
+        self.assignment = np.full(m, -1, dtype=np.int64)  # -1: устройство отклонено
+        self.load = np.zeros(n, dtype=np.int64)
+
+        # Сжатые дуги: стоимость, устройство-аргминимум, стоимость вытеснения
+        self._arcs = np.full((n, n), np.inf)
+        self._arc_device = np.full((n, n), -1, dtype=np.int64)
+        self._eject = np.full(n, np.inf)
+        self._eject_device = np.full(n, -1, dtype=np.int64)
+        self._arcs_ready = False
+        self._heaps = None  # кучи дуг для инкрементальных обновлений (см. update_device)
+
+        self._solve()
+
+    @property
+    def social_welfare(self) -> float:
+        """Суммарная выгода распределения"""
+        assigned = np.flatnonzero(self.assignment >= 0)
+        return float(self._pair_weights(assigned, self.assignment[assigned]).sum())
+
+    def allocation_matrix(self) -> np.ndarray:
+        """Бинарная матрица распределения [m x n] (CSR для разреженных ставок)"""
+        m, n = self.weights.shape
+        assigned = np.flatnonzero(self.assignment >= 0)
+        if sp.issparse(self.weights):
+            return sp.csr_matrix(
+                (np.ones(len(assigned), dtype=int), (assigned, self.assignment[assigned])),
+                shape=(m, n)
+            )
+        allocation = np.zeros((m, n), dtype=int)
+        allocation[assigned, self.assignment[assigned]] = 1
+        return allocation
+
+    def welfare_without_each(self) -> np.ndarray:
+        """
+        Оптимальное SW без каждого устройства [m] (для платежей Кларка)
+
+        Удаление устройства i освобождает один слот на его узле b; новое
+        оптимальное решение отличается от текущего одним кратчайшим путём,
+        заканчивающимся в b. Путь не выходит из b, поэтому выигрыш зависит
+        только от b: хватает n решений вместо m пересчётов с нуля.
+        """
+        m, n = self.weights.shape
+        sw = self.social_welfare
+        sw_without = np.full(m, sw)
+        self._ensure_arcs()
+
+        # Вход в сеть: лучшее неназначенное устройство для каждого узла;
+        # начать путь с уже занятого узла можно бесплатно (слот там не нужен)
+        entry, _ = self._entry_costs()
+        distance, _ = self._shortest_paths(np.minimum(entry, 0.0))
+        gain = -np.minimum(distance, 0.0)
+
+        assigned = np.flatnonzero(self.assignment >= 0)
+        edge = self.assignment[assigned]
+        sw_without[assigned] = sw - self._pair_weights(assigned, edge) + gain[edge]
+        return sw_without
+
+    def update_device(self, device: int, weights: np.ndarray):
+        """
+        Заменить выгоды устройства [n] и восстановить оптимум
+
+        Устройство снимается (освободившийся слот заполняется одним кратчайшим
+        путём) и вставляется заново с новыми выгодами - как в _solve.
+        При первом вызове сжатые дуги переводятся на кучи с ленивым удалением,
+        и каждое перемещение устройства стоит O(n log m) вместо пересчёта узла.
+        Поддерживаются только плотные матрицы.
+        """
+        if sp.issparse(self.weights):
+            raise ValueError("incremental updates require dense valuations")
+        if self._heaps is None:
+            self._build_heaps()
+
+        b = int(self.assignment[device])
+        # На время заполнения слота устройство недопустимо (нулевая выгода)
+        self.weights[device] = 0
+        self._move(device, -1)
+        if b >= 0:
+            self._refresh_edge(b)
+            self._fill_slot(b)
+
+        self.weights[device] = weights
+        self._move(device, -1)  # заново выставить устройство с новыми выгодами
+        self._insert(device)
+
+    def _ensure_arcs(self):
+        """Построить сжатые дуги для всех узлов (один раз, дальше они поддерживаются)"""
+        if not self._arcs_ready:
+            for b in range(self.weights.shape[1]):
+                self._refresh_edge(b)
+            self._arcs_ready = True
+
+    def _entry_costs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Стоимость входа (-w) лучшего отклонённого устройства на каждый узел и само устройство"""
+        n = self.weights.shape[1]
+        if self._heaps is not None:
+            for c in range(n):
+                self._fix_entry(c)
+            return self._entry.copy(), self._entry_device.copy()
+
+        cost = np.full(n, np.inf)
+        device = np.full(n, -1, dtype=np.int64)
+        unassigned = np.flatnonzero(self.assignment < 0)
+        if len(unassigned):
+            rows = self.weights[unassigned]
+            if sp.issparse(rows):
+                best = np.asarray(rows.argmax(axis=0)).ravel()
+                value = rows.max(axis=0).toarray().ravel()  # неявный 0 не даёт выигрыша
+            else:
+                best = np.argmax(rows, axis=0)
+                value = rows[best, np.arange(n)]
+            profitable = value > 0
+            cost[profitable] = -value[profitable]
+            device[profitable] = unassigned[best[profitable]]
+        return cost, device
+
+    def _fill_slot(self, b: int):
+        """Занять освободившийся слот узла b вдоль кратчайшего пути (если он выгоден)"""
+        n = self.weights.shape[1]
+        entry, entry_device = self._entry_costs()
+        start = np.minimum(entry, 0.0)
+        entry_device[entry >= 0] = -1
+
+        distance, predecessor = self._shortest_paths(start)
+        if not distance[b] < -_EPS:
+            return
+
+        path = [b]
+        while predecessor[path[-1]] >= 0 and len(path) <= n:
+            path.append(int(predecessor[path[-1]]))
+        path.reverse()
+
+        root = path[0]
+        movers = [int(self._arc_device[x, y]) for x, y in zip(path[:-1], path[1:])]
+        for mover, y in zip(movers, path[1:]):
+            self._move(mover, y)
+        if entry_device[root] >= 0:
+            # Путь начинается с нового устройства, входящего на root
+            self._move(int(entry_device[root]), root)
+
+        for edge in set(path):
+            self._refresh_edge(edge)
+
+    def _solve(self):
+        """Решить задачу: жадный старт + вставка оставшихся устройств по кратчайшим путям"""
+        m, n = self.weights.shape
+        if sp.issparse(self.weights):
+            # Неявные нули - недопустимые пары; при max <= 0 устройство всё равно отклоняется
+            best_edge = np.asarray(self.weights.argmax(axis=1)).ravel()
+        else:
+            best_edge = np.argmax(self.weights, axis=1)
+        best_weight = self._pair_weights(np.arange(m), best_edge)
+        candidates = np.flatnonzero(best_weight > 0)
+
+        # Каждый узел берёт лучших из претендентов, для которых он оптимален:
+        # устройства на своих argmax-узлах образуют оптимальное решение для своего подмножества
+        order = candidates[np.lexsort((-best_weight[candidates], best_edge[candidates]))]
+        edges_sorted = best_edge[order]
+        starts = np.searchsorted(edges_sorted, np.arange(n))
+        rank = np.arange(len(order)) - starts[edges_sorted]
+        admitted = rank < self.capacity[edges_sorted]
+        self.assignment[order[admitted]] = edges_sorted[admitted]
+        self.load = np.bincount(self.assignment[self.assignment >= 0], minlength=n)
+
+        overflow = order[~admitted]
+        if len(overflow) == 0:
+            return
+
+        self._ensure_arcs()
+        for device in overflow[np.argsort(-best_weight[overflow], kind='stable')]:
+            self._insert(int(device))
+
+    def _insert(self, device: int):
+        """Добавить устройство вдоль кратчайшего увеличивающего пути (если он выгоден)"""
+        distance, predecessor = self._shortest_paths(-self._feasible_weights([device])[0])
+        terminal = np.where(self.load < self.capacity, 0.0, self._eject)
+        total = distance + terminal
+        last = int(np.argmin(total))
+        if not total[last] < -_EPS:
+            return
+
+        path = [last]
+        while predecessor[path[-1]] >= 0 and len(path) <= len(predecessor):
+            path.append(int(predecessor[path[-1]]))
+        path.reverse()
+
+        movers = [int(self._arc_device[b, c]) for b, c in zip(path[:-1], path[1:])]
+        if self.load[last] >= self.capacity[last]:
+            self._move(int(self._eject_device[last]), -1)
+        for mover, c in zip(movers, path[1:]):
+            self._move(mover, c)
+        self._move(device, path[0])
+
+        for b in set(path):
+            self._refresh_edge(b)
+
+    def _move(self, device: int, target: int):
+        """Переназначить устройство (target = -1: отклонить)"""
+        source = self.assignment[device]
+        if source >= 0:
+            self.load[source] -= 1
+        if target >= 0:
+            self.load[target] += 1
+        self.assignment[device] = target
+        if self._heaps is not None:
+            self._version[device] += 1  # старые записи в кучах становятся недействительными
+            self._push(device)
+
+    def _refresh_edge(self, b: int):
+        """Пересчитать сжатые дуги из узла b и стоимость вытеснения с него"""
+        if self._heaps is not None:
+            self._fix_edge(b)
+            return
+
+        members = np.flatnonzero(self.assignment == b)
+        if len(members) == 0:
+            self._arcs[b] = np.inf
+            self._arc_device[b] = -1
+            self._eject[b] = np.inf
+            self._eject_device[b] = -1
+            return
+
+        own = self._pair_weights(members, np.full(len(members), b))
+        if sp.issparse(self.weights):
+            self._refresh_sparse_arcs(b, members, own)
+        else:
+            moves = own[:, None] - self._feasible_weights(members)  # [|b| x n]
+            moves[:, b] = np.inf
+            best = np.argmin(moves, axis=0)
+            self._arcs[b] = moves[best, np.arange(moves.shape[1])]
+            self._arc_device[b] = members[best]
+
+        cheapest = np.argmin(own)
+        self._eject[b] = own[cheapest]
+        self._eject_device[b] = members[cheapest]
+
+    def _build_heaps(self):
+        """
+        Перевести сжатые дуги на кучи (стоимость, устройство, версия)
+
+        Запись действительна, пока устройство на том же месте и его версия не
+        менялась; недействительные записи выбрасываются при подъёме на вершину.
+        """
+        m, n = self.weights.shape
+        self._version = np.zeros(m, dtype=np.int64)
+        self._heaps = [[[] for _ in range(n)] for _ in range(n)]
+        self._eject_heaps = [[] for _ in range(n)]
+        self._entry_heaps = [[] for _ in range(n)]
+        self._arc_version = np.zeros((n, n), dtype=np.int64)
+        self._eject_version = np.zeros(n, dtype=np.int64)
+        self._entry = np.full(n, np.inf)
+        self._entry_device = np.full(n, -1, dtype=np.int64)
+        self._entry_version = np.zeros(n, dtype=np.int64)
+
+        for b in range(n):
+            members = np.flatnonzero(self.assignment == b)
+            own = self.weights[members, b]
+            moves = own[:, None] - self._feasible_weights(members)
+            for c in range(n):
+                if c == b:
+                    continue
+                finite = np.isfinite(moves[:, c])
+                heap = list(zip(moves[finite, c].tolist(), members[finite].tolist(), [0] * int(finite.sum())))
+                heapq.heapify(heap)
+                self._heaps[b][c] = heap
+            self._eject_heaps[b] = list(zip(own.tolist(), members.tolist(), [0] * len(members)))
+            heapq.heapify(self._eject_heaps[b])
+
+        unassigned = np.flatnonzero(self.assignment < 0)
+        entries = -self._feasible_weights(unassigned)
+        for c in range(n):
+            finite = np.isfinite(entries[:, c])
+            heap = list(zip(entries[finite, c].tolist(), unassigned[finite].tolist(), [0] * int(finite.sum())))
+            heapq.heapify(heap)
+            self._entry_heaps[c] = heap
+
+        self._arc_device[:] = -1
+        self._eject_device[:] = -1
+        for b in range(n):
+            self._fix_edge(b)
+            self._fix_entry(b)
+        self._arcs_ready = True
+
+    def _push(self, device: int):
+        """Добавить записи устройства в кучи его текущего места"""
+        b = int(self.assignment[device])
+        version = int(self._version[device])
+        feasible = self._feasible_weights([device])[0]
+        if b < 0:
+            for c in np.flatnonzero(np.isfinite(feasible)):
+                cost = -float(feasible[c])
+                heapq.heappush(self._entry_heaps[c], (cost, device, version))
+                if cost < self._entry[c]:
+                    self._entry[c], self._entry_device[c], self._entry_version[c] = cost, device, version
+            return
+
+        own = float(self.weights[device, b])
+        moves = own - feasible
+        moves[b] = np.inf
+        for c in np.flatnonzero(np.isfinite(moves)):
+            cost = float(moves[c])
+            heapq.heappush(self._heaps[b][c], (cost, device, version))
+            if cost < self._arcs[b, c]:
+                self._arcs[b, c], self._arc_device[b, c], self._arc_version[b, c] = cost, device, version
+        heapq.heappush(self._eject_heaps[b], (own, device, version))
+        if own < self._eject[b]:
+            self._eject[b], self._eject_device[b], self._eject_version[b] = own, device, version
+
+    def _fix_edge(self, b: int):
+        """Заменить недействительные вершины дуг из узла b и вытеснения с него"""
+        devices = self._arc_device[b]
+        stale = (devices < 0) | (self.assignment[devices] != b) | (self._version[devices] != self._arc_version[b])
+        for c in np.flatnonzero(stale):
+            top = self._valid_top(self._heaps[b][c], b)
+            if top is None:
+                self._arcs[b, c], self._arc_device[b, c] = np.inf, -1
+            else:
+                self._arcs[b, c], self._arc_device[b, c], self._arc_version[b, c] = top
+
+        device = self._eject_device[b]
+        if device < 0 or self.assignment[device] != b or self._version[device] != self._eject_version[b]:
+            top = self._valid_top(self._eject_heaps[b], b)
+            if top is None:
+                self._eject[b], self._eject_device[b] = np.inf, -1
+            else:
+                self._eject[b], self._eject_device[b], self._eject_version[b] = top
+
+    def _fix_entry(self, c: int):
+        """Заменить недействительную вершину входа на узел c"""
+        device = self._entry_device[c]
+        if device >= 0 and self.assignment[device] < 0 and self._version[device] == self._entry_version[c]:
+            return
+        top = self._valid_top(self._entry_heaps[c], -1)
+        if top is None:
+            self._entry[c], self._entry_device[c] = np.inf, -1
+        else:
+            self._entry[c], self._entry_device[c], self._entry_version[c] = top
+
+    def _valid_top(self, heap: list, location: int) -> Optional[Tuple[float, int, int]]:
+        """Вершина кучи, чьё устройство всё ещё на месте location с той же версией"""
+        while heap:
+            cost, device, version = heap[0]
+            if self._version[device] == version and (
+                self.assignment[device] == location if location >= 0 else self.assignment[device] < 0
+            ):
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _refresh_sparse_arcs(self, b: int, members: np.ndarray, own: np.ndarray):
+        """Дуги из узла b только по хранимым парам (O(nnz) строк узла)"""
+        rows = self.weights[members].tocoo()
+        keep = (rows.data > 0) & (rows.col != b)
+        device, edge = rows.row[keep], rows.col[keep]
+        moves = own[device] - rows.data[keep]
+
+        self._arcs[b] = np.inf
+        self._arc_device[b] = -1
+        order = np.lexsort((moves, edge))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = edge[order][1:] != edge[order][:-1]
+        best = order[first]
+        self._arcs[b, edge[best]] = moves[best]
+        self._arc_device[b, edge[best]] = members[device[best]]
+
+    def _pair_weights(self, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Выгода пар (rows[k], cols[k])"""
+        if sp.issparse(self.weights):
+            values = self.weights[rows, cols]
+            if sp.issparse(values):
+                values = values.toarray()
+            return np.asarray(values, dtype=np.float64).ravel()
+        return self.weights[rows, cols]
+
+    def _feasible_weights(self, rows) -> np.ndarray:
+        """
+        Плотные строки выгоды [len(rows) x n], недопустимые пары = -inf
+
+        Невыгодные пары (w <= 0) недопустимы: такие назначения только уменьшают SW
+        """
+        weights = self.weights[rows]
+        if sp.issparse(weights):
+            weights = weights.toarray()
+        return np.where(weights > 0, weights, -np.inf)
+
+    def _shortest_paths(self, start: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Беллман-Форд по сжатому графу из виртуального источника с начальными стоимостями start
+
+        Релаксируются только дуги из вершин, улучшенных на прошлой итерации,
+        поэтому при малой достижимости итерация стоит O(|фронт| · n), а не O(n^2)
+        """
+        n = len(start)
+        distance = np.array(start, dtype=np.float64)
+        predecessor = np.full(n, -1, dtype=np.int64)
+        columns = np.arange(n)
+        frontier = np.flatnonzero(np.isfinite(distance))
+        for _ in range(n):
+            if len(frontier) == 0:
+                break
+            candidates = distance[frontier, None] + self._arcs[frontier]
+            via = np.argmin(candidates, axis=0)
+            relaxed = candidates[via, columns]
+            improved = relaxed < distance - _EPS
+            distance[improved] = relaxed[improved]
+            predecessor[improved] = frontier[via[improved]]
+            frontier = np.flatnonzero(improved)
+        return distance, predecessor
@@ -0,0 +1,224 @@
+"""
+Фаза сбора ставок MA-VCG аукциона
+Асинхронный сервис принимает ставки устройств (в процессе или по локальному
+сокету), собирает их в раунды по окну времени/размера, проводит раунд
+VCGAuction в executor вне цикла событий и отвечает каждому устройству
+"""
+
+import asyncio
+import json
+import time
+import numpy as np
+import scipy.sparse as sp
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .history import allocation_to_edge_index
+from .vcg_auction import VCGAuction
+
+@dataclass
+class Bid:
+    """Ставка устройства на все узлы"""
+    device_id: int
+    valuations: np.ndarray  # [n]: полезность узлов
+    costs: np.ndarray       # [n]: стоимость узлов
+
+@dataclass
+class BidOutcome:
+    """Ответ устройству по итогам раунда"""
+    device_id: int
+    edge: int        # назначенный узел (-1 - отклонено)
+    payment: float
+    round_id: int
+
+class BidCollector:
+    """
+    Сбор ставок в раунды аукциона (micro-batching)
+
+    Раунд закрывается, когда набралось max_batch ставок или прошло max_wait
+    секунд с первой ставки раунда. Устройства без ставки в раунде не
+    участвуют (пустые строки CSR [m x n]); повторная ставка устройства в том
+    же окне заменяет предыдущую. Раунды проводятся последовательно, пока
+    идёт раунд, ставки копятся в очереди к следующему.
+    """
+
+    def __init__(
+        self,
+        auction: VCGAuction,
+        max_batch: int = 256,
+        max_wait: float = 0.005,
+        executor: Optional[Executor] = None
+    ):
+        self.auction = auction
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.executor = executor  # None - пул потоков цикла событий по умолчанию
+
+        self.round_latencies: List[float] = []  # от первой ставки раунда до ответа (с)
+        self.round_sizes: List[int] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._round_id = 0
+
+    async def start(self):
+        """Запустить обработку очереди ставок"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Остановить обработку (ставки текущего раунда и очереди отменяются)"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                future.cancel()
+
+    async def submit(self, bid: Bid) -> BidOutcome:
+        """
+        Отправить ставку и дождаться результата раунда
+
+        Некорректная ставка отклоняется (ValueError) до постановки в очередь
+        и не влияет на раунд остальных устройств.
+        """
+        if self._worker is None:
+            raise RuntimeError("BidCollector is not started")
+        bid = self._validate(bid)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((bid, future, time.perf_counter()))
+        return await future
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+        """
+        Принимать ставки по TCP: одна JSON-строка на ставку
+        {"device_id", "valuations", "costs"} -> {"device_id", "edge", "payment", "round_id"}
+        """
+        await self.start()
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    def latency_percentiles(self, percentiles=(50, 99)) -> Dict[str, float]:
+        """Перцентили задержки раунда (с), например {'p50': ..., 'p99': ...}"""
+        if not self.round_latencies:
+            return {f"p{p}": 0.0 for p in percentiles}
+        values = np.percentile(self.round_latencies, percentiles)
+        return {f"p{p}": float(v) for p, v in zip(percentiles, values)}
+
+    async def _run(self):
+        """Цикл: собрать окно ставок -> провести раунд -> ответить"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            first_arrival = min(arrival for _, _, arrival in batch)
+            try:
+                valuations, costs, devices = self._round_matrices(batch)
+                result = await loop.run_in_executor(
+                    self.executor, self.auction.run_auction, valuations, costs, self._round_id
+                )
+            except asyncio.CancelledError:  # stop() во время раунда
+                self._cancel(batch)
+                raise
+            except Exception as error:  # ошибка решателя передаётся всем участникам раунда
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+
+            edge = allocation_to_edge_index(result.allocation, dtype=np.int64)
+            for bid, future, _ in batch:
+                if not future.done():
+                    future.set_result(BidOutcome(
+                        device_id=bid.device_id,
+                        edge=int(edge[bid.device_id]),
+                        payment=float(result.payments[bid.device_id]),
+                        round_id=self._round_id
+                    ))
+            self.round_latencies.append(time.perf_counter() - first_arrival)
+            self.round_sizes.append(len(devices))
+            self._round_id += 1
+
+    async def _collect_batch(self) -> list:
+        """Ставки одного раунда: до max_batch штук или до истечения max_wait"""
+        batch = [await self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            except asyncio.CancelledError:  # stop() во время сбора окна
+                self._cancel(batch)
+                raise
+        return batch
+
+    @staticmethod
+    def _cancel(batch: list):
+        """Отменить ожидающие ответа ставки раунда"""
+        for _, future, _ in batch:
+            if not future.done():
+                future.cancel()
+
+    def _validate(self, bid: Bid) -> Bid:
+        """Проверить ставку: устройство аукциона, векторы [n] из конечных чисел"""
+        m, n = self.auction.num_devices, self.auction.num_edges
+        if not 0 <= bid.device_id < m:
+            raise ValueError(f"device_id must be in [0, {m}), got {bid.device_id}")
+        vectors = {}
+        for name in ('valuations', 'costs'):
+            try:
+                value = np.asarray(getattr(bid, name), dtype=np.float64)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a numeric vector") from None
+            if value.shape != (n,):
+                raise ValueError(f"{name} must have shape ({n},), got {value.shape}")
+            if not np.all(np.isfinite(value)):
+                raise ValueError(f"{name} must be finite")
+            vectors[name] = value
+        return Bid(int(bid.device_id), vectors['valuations'], vectors['costs'])
+
+    def _round_matrices(self, batch: list) -> Tuple[sp.csr_matrix, sp.csr_matrix, np.ndarray]:
+        """Ставки раунда -> CSR [m x n] (строки только у участников)"""
+        m, n = self.auction.num_devices, self.auction.num_edges
+        latest = {bid.device_id: bid for bid, _, _ in batch}  # последняя ставка устройства
+        devices = np.fromiter(sorted(latest), dtype=np.int64, count=len(latest))
+        # Ставки проверены в submit
+        valuations = np.array([latest[d].valuations for d in devices], dtype=np.float64).reshape(-1, n)
+        costs = np.array([latest[d].costs for d in devices], dtype=np.float64).reshape(-1, n)
+        indptr = np.zeros(m + 1, dtype=np.int64)
+        indptr[devices + 1] = n
+        indptr = np.cumsum(indptr)
+        indices = np.tile(np.arange(n), len(devices))
+        return (
+            sp.csr_matrix((valuations.ravel(), indices, indptr), shape=(m, n)),
+            sp.csr_matrix((costs.ravel(), indices, indptr), shape=(m, n)),
+            devices
+        )
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Обслужить соединение: ставки и ответы построчно в JSON"""
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                    outcome = await self.submit(Bid(
+                        device_id=int(message['device_id']),
+                        valuations=message['valuations'],
+                        costs=message['costs']
+                    ))
+                    reply = outcome.__dict__
+                except (ValueError, KeyError, TypeError) as error:  # ошибка ставки - только этому клиенту
+                    reply = {'error': str(error)}
+                writer.write((json.dumps(reply) + '\n').encode())
+                await writer.drain()
+        finally:
+            writer.close()
@@ -0,0 +1,131 @@
+"""
+Компактная история раундов аукциона
+Распределение хранится как индекс узла на устройство (int16, -1 - отклонено)
+вместо плотной матрицы [m x n]
+"""
+
+import numpy as np
+import scipy.sparse as sp
+from pathlib import Path
+from typing import Iterator, List, Optional, Union
+from ..utils.column_ring import ColumnRing
+from .vcg_auction import AuctionResult
+
+def allocation_to_edge_index(allocation, dtype: np.dtype = np.int16) -> np.ndarray:
+    """
+    Матрица распределения [m x n] -> индекс узла на устройство [m]
+
+    Каждому устройству в результате аукциона назначено не более одного узла
+    """
+    if sp.issparse(allocation):
+        allocation = sp.csr_matrix(allocation)
+        allocation.eliminate_zeros()
+        assigned = np.diff(allocation.indptr) > 0
+        edge = np.full(allocation.shape[0], -1, dtype=dtype)
+        edge[assigned] = allocation.indices[allocation.indptr[:-1][assigned]]
+        return edge
+
+    allocation = np.asarray(allocation)
+    edge = np.argmax(allocation, axis=1).astype(dtype)
+    edge[~allocation.any(axis=1)] = -1
+    return edge
+
+def edge_index_to_allocation(edge: np.ndarray, num_edges: int) -> np.ndarray:
+    """Индекс узла на устройство [m] -> бинарная матрица распределения [m x n]"""
+    allocation = np.zeros((len(edge), num_edges), dtype=int)
+    assigned = np.flatnonzero(edge >= 0)
+    allocation[assigned, edge[assigned]] = 1
+    return allocation
+
+class AuctionHistory:
+    """
+    История раундов в предвыделенных массивах (utils/column_ring.py)
+
+    Режимы:
+        max_rounds=None, spill_dir=None - хранить всё (массивы растут удвоением)
+        max_rounds=N                    - кольцевой буфер последних N раундов
+        spill_dir=...                   - заполненный буфер (max_rounds или chunk_size
+                                          раундов) сбрасывается на диск в .npz
+
+    Совместима со списком AuctionResult: append, len, индексация и итерация
+    (раунды восстанавливаются по требованию).
+    """
+
+    load_chunk = staticmethod(ColumnRing.load_chunk)
+
+    def __init__(
+        self,
+        num_devices: int,
+        num_edges: int,
+        max_rounds: Optional[int] = None,
+        spill_dir: Optional[Union[str, Path]] = None,
+        chunk_size: int = 1024
+    ):
+        if num_edges > np.iinfo(np.int16).max:
+            raise ValueError(f"num_edges={num_edges} does not fit into int16 edge index")
+        self.num_devices = num_devices
+        self.num_edges = num_edges
+        self.max_rounds = max_rounds
+        self._rounds = ColumnRing(
+            {
+                'edge_index': (np.int16, (num_devices,)),
+                'payments': (np.float64, (num_devices,)),
+                'social_welfare': (np.float64, ()),
+                'timestamps': (np.int64, ()),
+            },
+            max_size=max_rounds, spill_dir=spill_dir, chunk_size=chunk_size, spill_prefix='auction_history'
+        )
+
+    def append(self, result: AuctionResult):
+        """Добавить раунд"""
+        self._rounds.append({
+            'edge_index': allocation_to_edge_index(result.allocation),
+            'payments': result.payments,
+            'social_welfare': result.social_welfare,
+            'timestamps': result.timestamp,
+        })
+
+    def spill(self):
+        """Сбросить раунды из памяти на диск (один .npz на сброс)"""
+        self._rounds.spill()
+
+    @property
+    def spill_dir(self) -> Optional[Path]:
+        return self._rounds.spill_dir
+
+    @property
+    def spilled_chunks(self) -> List[Path]:
+        return self._rounds.spilled_chunks
+
+    @property
+    def edge_index(self) -> np.ndarray:
+        """Индексы узлов раундов в памяти [T x m] в хронологическом порядке"""
+        return self._rounds['edge_index']
+
+    @property
+    def payments(self) -> np.ndarray:
+        return self._rounds['payments']
+
+    @property
+    def social_welfare(self) -> np.ndarray:
+        return self._rounds['social_welfare']
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._rounds['timestamps']
+
+    def __len__(self) -> int:
+        return len(self._rounds)
+
+    def __getitem__(self, k: int) -> AuctionResult:
+        row = self._rounds.row(k)
+        return AuctionResult(
+            allocation=edge_index_to_allocation(row['edge_index'], self.num_edges),
+            payments=row['payments'].copy(),
+            social_welfare=float(row['social_welfare']),
+            timestamp=int(row['timestamps'])
+        )
+
+    def __iter__(self) -> Iterator[AuctionResult]:
+        for k in range(len(self)):
+            yield self[k]
@@ -0,0 +1,127 @@
+"""
+Инкрементальный режим повторяющегося MA-VCG аукциона
+Между раундами меняются ставки лишь небольшой части устройств,
+поэтому распределение и платежи пересчитываются только для них
+"""
+
+import numpy as np
+from typing import Optional, Sequence
+from .allocation import CapacitatedAssignment
+from .payments import _float_dtype
+from .vcg_auction import AuctionResult
+
+class IncrementalAuction:
+    """
+    Состояние повторяющегося аукциона с кэшем распределения и платежей
+
+    Без ограничения ёмкости распределение устройства зависит только от его
+    строки ставок, и обновление стоит O(k·n) для k изменившихся устройств.
+    С ёмкостью каждое изменение - снятие и повторная вставка устройства в
+    оптимальное решение CapacitatedAssignment (по одному кратчайшему пути).
+
+    Результат совпадает с полным пересчётом VCGAuction.run_auction; при
+    равных альтернативах с ёмкостью может быть выбрано другое, столь же
+    оптимальное распределение.
+    """
+
+    def __init__(
+        self,
+        valuations: np.ndarray,  # [m x n]: полезность
+        costs: np.ndarray,       # [m x n]: стоимость
+        edge_capacity: Optional[np.ndarray] = None
+    ):
+        self.valuations = np.array(valuations)
+        self.costs = np.array(costs)
+        m, n = self.valuations.shape
+        self.dtype = _float_dtype(self.valuations.dtype, self.costs.dtype)
+
+        self.edge = np.full(m, -1, dtype=np.int64)  # узел устройства (-1: отклонено)
+        self.allocation = np.zeros((m, n), dtype=int)
+        self.row_value = np.zeros(m, dtype=self.dtype)
+        self.row_cost = np.zeros(m, dtype=self.dtype)
+
+        self._solver = None
+        if edge_capacity is None:
+            self._assign_rows(np.arange(m))
+        else:
+            self._solver = CapacitatedAssignment(self.valuations, self.costs, edge_capacity)
+            self._sync_rows(np.arange(m))
+
+    def update(
+        self,
+        device_ids: Sequence[int],
+        valuations: np.ndarray,  # [k x n]: новые строки полезности
+        costs: np.ndarray,       # [k x n]: новые строки стоимости
+        timestamp: int
+    ) -> AuctionResult:
+        """
+        Применить изменения ставок k устройств и вернуть результат раунда
+
+        Args:
+            device_ids: устройства, изменившие ставки [k]
+            valuations: новые строки полезности [k x n]
+            costs: новые строки стоимости [k x n]
+            timestamp: текущее время
+
+        Returns:
+            AuctionResult: результат аукциона (массивы - копии состояния)
+        """
+        device_ids = np.asarray(device_ids, dtype=np.int64)
+        self.valuations[device_ids] = valuations
+        self.costs[device_ids] = costs
+
+        if self._solver is None:
+            self._assign_rows(device_ids)
+        else:
+            previous = self._solver.assignment.copy()
+            for device in device_ids:
+                device = int(device)
+                weights = (np.asarray(self.valuations[device], dtype=np.float64) -
+                           np.asarray(self.costs[device], dtype=np.float64))
+                self._solver.update_device(device, weights)
+            moved = np.flatnonzero(previous != self._solver.assignment)
+            self._sync_rows(np.union1d(moved, device_ids))
+
+        return self.result(timestamp)
+
+    def result(self, timestamp: int) -> AuctionResult:
+        """Текущий результат аукциона по кэшированным строкам"""
+        current_sw = self.row_value.sum() - self.row_cost.sum()
+
+        # Та же формула, что и в calculate_clarke_payments, но по кэшу строк
+        if self._solver is None:
+            payments = self.row_cost - self.row_value
+        else:
+            payments = (self._solver.welfare_without_each() - current_sw).astype(self.dtype)
+        payments += self.row_value
+
+        return AuctionResult(
+            allocation=self.allocation.copy(),
+            payments=payments,
+            social_welfare=float(current_sw),
+            timestamp=timestamp
+        )
+
+    def _assign_rows(self, rows: np.ndarray):
+        """Жадный выбор лучшего узла для строк rows (как _compute_optimal_allocation)"""
+        utility = self.valuations[rows] - self.costs[rows]
+        best_edge = np.argmax(utility, axis=1)
+        accepted = utility[np.arange(len(rows)), best_edge] > 0
+        self.edge[rows] = np.where(accepted, best_edge, -1)
+        self._write_rows(rows)
+
+    def _sync_rows(self, rows: np.ndarray):
+        """Забрать распределение строк rows из CapacitatedAssignment"""
+        self.edge[rows] = self._solver.assignment[rows]
+        self._write_rows(rows)
+
+    def _write_rows(self, rows: np.ndarray):
+        """Обновить матрицу распределения и кэш ценности/стоимости для строк rows"""
+        edge = self.edge[rows]
+        accepted = edge >= 0
+        column = np.maximum(edge, 0)
+
+        self.allocation[rows] = 0
+        self.allocation[rows[accepted], edge[accepted]] = 1
+        self.row_value[rows] = np.where(accepted, self.valuations[rows, column], 0)
+        self.row_cost[rows] = np.where(accepted, self.costs[rows, column], 0)
@@ -0,0 +1,96 @@
+"""
+Вычислительные ядра аукциона: жадное распределение, построчные суммы для
+платежей и коэффициент Джини
+
+Если установлен Numba, по умолчанию используются JIT-ядра (один проход по
+строкам без временных матриц [m x n]); иначе - векторизованный NumPy.
+Бэкенд можно выбрать явно аргументом backend или функцией set_backend
+(общей с ядрами дерева сумм, см. utils/jit.py).
+"""
+
+import numpy as np
+from typing import Optional
+from ..utils import jit as _backend
+from ..utils.jit import NUMBA_AVAILABLE, BACKENDS, set_backend, jit as _jit, resolve as _resolve
+
+def __getattr__(name: str):
+    if name == 'BACKEND':  # текущий бэкенд по умолчанию (меняется set_backend)
+        return _backend.BACKEND
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def greedy_edges(
+    valuations: np.ndarray,  # [m x n]: полезность
+    costs: np.ndarray,       # [m x n]: стоимость
+    backend: Optional[str] = None
+) -> np.ndarray:
+    """
+    Лучший узел каждого устройства по выгоде valuations - costs
+
+    Returns:
+        edge: индекс узла [m] (int64), -1 - все узлы невыгодны (выгода <= 0)
+    """
+    if _resolve(backend) == 'numba':
+        return _greedy_edges_numba(np.ascontiguousarray(valuations), np.ascontiguousarray(costs))
+
+    utility = valuations - costs
+    best_edge = np.argmax(utility, axis=1)
+    accepted = utility[np.arange(len(utility)), best_edge] > 0
+    return np.where(accepted, best_edge, -1)
+
+def row_dot(
+    allocation: np.ndarray,  # [m x n]: распределение (0/1)
+    matrix: np.ndarray,      # [m x n]
+    dtype: np.dtype,
+    backend: Optional[str] = None
+) -> np.ndarray:
+    """Построчная сумма allocation * matrix [m] для плотных матриц"""
+    if _resolve(backend) == 'numba':
+        out = np.empty(allocation.shape[0], dtype=dtype)
+        _row_dot_numba(np.ascontiguousarray(allocation), np.ascontiguousarray(matrix), out)
+        return out
+    return np.einsum('ij,ij->i', np.asarray(allocation, dtype=dtype), matrix)
+
+def gini(values: np.ndarray, backend: Optional[str] = None) -> float:
+    """Коэффициент Джини неотрицательных значений"""
+    values = np.asarray(values, dtype=np.float64)
+    sorted_vals = np.sort(values)  # сортировка NumPy быстрее np.sort внутри Numba
+    if _resolve(backend) == 'numba':
+        return float(_gini_sorted_numba(sorted_vals))
+
+    n = len(sorted_vals)
+    return (2 * np.sum((np.arange(1, n+1)) * sorted_vals)) / (n * np.sum(sorted_vals)) - (n + 1) / n
+
+if NUMBA_AVAILABLE:
+    @_jit
+    def _greedy_edges_numba(valuations, costs):
+        m, n = valuations.shape
+        edge = np.empty(m, dtype=np.int64)
+        for i in range(m):
+            best = 0
+            best_utility = valuations[i, 0] - costs[i, 0]
+            for j in range(1, n):
+                utility = valuations[i, j] - costs[i, j]
+                if utility > best_utility:  # строго: первый максимум, как np.argmax
+                    best, best_utility = j, utility
+            edge[i] = best if best_utility > 0 else -1
+        return edge
+
+    @_jit
+    def _row_dot_numba(allocation, matrix, out):
+        m, n = allocation.shape
+        for i in range(m):
+            total = 0.0
+            for j in range(n):
+                if allocation[i, j] != 0:
+                    total += allocation[i, j] * matrix[i, j]
+            out[i] = total
+
+    @_jit
+    def _gini_sorted_numba(sorted_vals):
+        n = len(sorted_vals)
+        weighted = 0.0
+        total = 0.0
+        for k in range(n):
+            weighted += (k + 1) * sorted_vals[k]
+            total += sorted_vals[k]
+        return 2 * weighted / (n * total) - (n + 1) / n
@@ -0,0 +1,184 @@
+"""
+Точное распределение с несколькими ресурсами (CPU и память)
+MILP через scipy.optimize.milp (HiGHS) с ограничением по времени
+и LP-релаксацией с округлением как быстрым допустимым решением
+"""
+
+import time
+import numpy as np
+import scipy.sparse as sp
+from dataclasses import dataclass
+from typing import Optional, Sequence
+from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+
+@dataclass
+class ResourceConstraints:
+    """Потребности устройств и ёмкости узлов по CPU и памяти"""
+    cpu_demand: np.ndarray       # [m]: CPU задачи устройства
+    memory_demand: np.ndarray    # [m]: память задачи устройства
+    cpu_capacity: np.ndarray     # [n]: свободный CPU узла
+    memory_capacity: np.ndarray  # [n]: свободная память узла
+    time_budget: Optional[float] = None  # Лимит времени решения (с)
+    gap_tolerance: float = 1e-4  # Допустимый относительный разрыв до верхней границы
+
+    @classmethod
+    def from_edges(
+        cls,
+        edges: Sequence,
+        cpu_demand: np.ndarray,
+        memory_demand: np.ndarray,
+        time_budget: Optional[float] = None,
+        gap_tolerance: float = 1e-4
+    ) -> 'ResourceConstraints':
+        """Ёмкости из списка EdgeNode (свободные CPU и память)"""
+        return cls(
+            cpu_demand=np.asarray(cpu_demand, dtype=np.float64),
+            memory_demand=np.asarray(memory_demand, dtype=np.float64),
+            cpu_capacity=np.array([edge.cpu_available for edge in edges], dtype=np.float64),
+            memory_capacity=np.array([edge.memory_available for edge in edges], dtype=np.float64),
+            time_budget=time_budget,
+            gap_tolerance=gap_tolerance
+        )
+
+@dataclass
+class MultiResourceAllocation:
+    """Результат MILP-распределения"""
+    allocation: np.ndarray  # [m x n] (CSR для разреженных ставок)
+    social_welfare: float
+    upper_bound: float      # Доказанная верхняя граница SW (двойственная граница / LP)
+    status: str             # 'optimal' | 'time_limit' | 'lp_rounding'
+
+    @property
+    def gap(self) -> float:
+        """Относительный разрыв до верхней границы"""
+        return (self.upper_bound - self.social_welfare) / max(abs(self.upper_bound), 1e-12)
+
+def solve_multi_resource_allocation(
+    valuations: np.ndarray,
+    costs: np.ndarray,
+    resources: ResourceConstraints
+) -> MultiResourceAllocation:
+    """
+    Максимизировать SW при ограничениях CPU и памяти на каждом узле
+
+    max sum w[i][j] x[i][j],  x in {0, 1}
+    sum_j x[i][j] <= 1                                  (устройство - не более одного узла)
+    sum_i cpu[i] x[i][j] <= cpu_cap[j],  то же для памяти
+
+    Переменные заводятся только для выгодных пар (w > 0). Без лимита времени
+    MILP решается до оптимума. С лимитом сначала решается LP-релаксация:
+    её округление даёт допустимое решение, а значение - верхнюю границу.
+    Если разрыв больше gap_tolerance, оставшееся время отдаётся MILP, и
+    берётся лучшее из найденных решений. Лимит соблюдается HiGHS в его
+    контрольных точках, поэтому на очень больших задачах возможен перерасход.
+
+    Args:
+        valuations: матрица полезности [m x n] (плотная или CSR)
+        costs: матрица стоимости [m x n]
+        resources: потребности, ёмкости и параметры решателя
+
+    Returns:
+        MultiResourceAllocation: распределение, SW, верхняя граница и статус
+    """
+    started = time.perf_counter()
+    sparse_input = sp.issparse(valuations) or sp.issparse(costs)
+    weights = sp.coo_matrix(valuations - costs)
+    m, n = weights.shape
+    positive = weights.data > 0
+    rows, cols, w = weights.row[positive], weights.col[positive], weights.data[positive]
+    k = len(w)
+    if k == 0:
+        return _result(rows, cols, np.zeros(0, dtype=bool), w, (m, n), sparse_input, 0.0, 'optimal')
+
+    variables = np.arange(k)
+    cpu = np.asarray(resources.cpu_demand, dtype=np.float64)
+    memory = np.asarray(resources.memory_demand, dtype=np.float64)
+    A = sp.vstack([
+        sp.csr_matrix((np.ones(k), (rows, variables)), shape=(m, k)),
+        sp.csr_matrix((cpu[rows], (cols, variables)), shape=(n, k)),
+        sp.csr_matrix((memory[rows], (cols, variables)), shape=(n, k)),
+    ]).tocsr()
+    upper = np.concatenate([np.ones(m), resources.cpu_capacity, resources.memory_capacity])
+
+    def remaining() -> float:
+        return resources.time_budget - (time.perf_counter() - started)
+
+    chosen, status, upper_bound = None, 'lp_rounding', np.inf
+    if resources.time_budget is not None:
+        # Быстрое допустимое решение и граница из LP-релаксации
+        relaxation = linprog(
+            -w, A_ub=A, b_ub=upper, bounds=(0, 1), method='highs',
+            options={'time_limit': max(remaining(), 1e-3)}
+        )
+        fractional = relaxation.x if relaxation.x is not None else np.zeros(k)
+        if relaxation.status == 0:
+            upper_bound = -relaxation.fun
+        chosen = _round_fractional(fractional, w, rows, cols, cpu, memory, resources)
+        value = w[chosen].sum()
+        # Без границы (LP не решена за лимит) разрыв неизвестен - время отдаётся MILP
+        gap_closed = (np.isfinite(upper_bound) and
+                      upper_bound - value <= resources.gap_tolerance * max(abs(upper_bound), 1e-12))
+        if gap_closed or remaining() <= 0:
+            return _result(rows, cols, chosen, w, (m, n), sparse_input, min(upper_bound, w.sum()), status)
+
+    options = {'mip_rel_gap': resources.gap_tolerance}
+    if resources.time_budget is not None:
+        options['time_limit'] = remaining()
+    solution = milp(
+        -w,
+        integrality=np.ones(k),
+        bounds=Bounds(0, 1),
+        constraints=LinearConstraint(A, -np.inf, upper),
+        options=options
+    )
+
+    bound = getattr(solution, 'mip_dual_bound', None)
+    if bound is not None and np.isfinite(bound):
+        upper_bound = min(upper_bound, -bound)
+    if solution.x is not None:
+        incumbent = solution.x > 0.5
+        if chosen is None or w[incumbent].sum() >= w[chosen].sum():
+            chosen = incumbent
+            status = 'optimal' if solution.status == 0 else 'time_limit'
+    if chosen is None:
+        # MILP без лимита не нашёл решения (не должно случаться: x = 0 допустимо)
+        chosen = _round_fractional(np.zeros(k), w, rows, cols, cpu, memory, resources)
+    if not np.isfinite(upper_bound):
+        upper_bound = w.sum()
+    return _result(rows, cols, chosen, w, (m, n), sparse_input, upper_bound, status)
+
+def _round_fractional(
+    fractional: np.ndarray,
+    w: np.ndarray,
+    rows: np.ndarray,
+    cols: np.ndarray,
+    cpu: np.ndarray,
+    memory: np.ndarray,
+    resources: ResourceConstraints
+) -> np.ndarray:
+    """Жадное округление: пары по убыванию x (затем w), пока хватает ресурсов"""
+    cpu_left = np.array(resources.cpu_capacity, dtype=np.float64)
+    memory_left = np.array(resources.memory_capacity, dtype=np.float64)
+    assigned = np.zeros(len(cpu), dtype=bool)
+    chosen = np.zeros(len(w), dtype=bool)
+
+    for p in np.lexsort((-w, -fractional)):
+        i, j = rows[p], cols[p]
+        if assigned[i] or cpu[i] > cpu_left[j] or memory[i] > memory_left[j]:
+            continue
+        assigned[i] = chosen[p] = True
+        cpu_left[j] -= cpu[i]
+        memory_left[j] -= memory[i]
+    return chosen
+
+def _result(rows, cols, chosen, w, shape, sparse_input, upper_bound, status) -> MultiResourceAllocation:
+    """Собрать матрицу распределения из выбранных пар"""
+    allocation = sp.csr_matrix(
+        (np.ones(int(chosen.sum()), dtype=int), (rows[chosen], cols[chosen])), shape=shape
+    )
+    return MultiResourceAllocation(
+        allocation=allocation if sparse_input else allocation.toarray(),
+        social_welfare=float(w[chosen].sum()),
+        upper_bound=float(upper_bound),
+        status=status
+    )
@@ -0,0 +1,209 @@
+"""
+Разбиение раунда аукциона на независимые компоненты
+Если граф выгодных пар устройство-узел распадается на компоненты связности,
+распределение и платежи Кларка каждой компоненты не зависят от остальных,
+и компоненты решаются параллельно в пуле процессов
+"""
+
+import heapq
+import numpy as np
+import scipy.sparse as sp
+from concurrent.futures import Executor
+from dataclasses import dataclass, replace
+from multiprocessing import shared_memory
+from scipy.sparse.csgraph import connected_components
+from typing import List, Optional, Tuple
+from .milp_allocation import MultiResourceAllocation, ResourceConstraints
+from .payments import _float_dtype
+
+def feasible_components(valuations, costs) -> Tuple[int, np.ndarray, np.ndarray]:
+    """
+    Компоненты связности двудольного графа выгодных пар (w > 0)
+
+    Невыгодную пару не выбирает ни один алгоритм распределения, поэтому
+    устройства и узлы разных компонент друг на друга не влияют.
+
+    Returns:
+        count: число компонент
+        device_labels: компонента каждого устройства [m]
+        edge_labels: компонента каждого узла [n]
+    """
+    feasible = sp.csr_matrix(valuations - costs > 0)
+    m, n = feasible.shape
+    graph = sp.bmat([[None, feasible], [feasible.T, None]], format='csr')
+    count, labels = connected_components(graph, directed=False)
+    return count, labels[:m], labels[m:]
+
+@dataclass
+class _GroupTask:
+    """Группа компонент, решаемая одним процессом"""
+    rows: np.ndarray                 # устройства группы
+    cols: np.ndarray                 # узлы группы
+    valuations: object               # спецификация разделяемой памяти или подматрица CSR
+    costs: object
+    capacity: Optional[np.ndarray]
+    resources: Optional[ResourceConstraints]
+
+def solve_partitioned(
+    valuations,
+    costs,
+    capacity: Optional[np.ndarray] = None,
+    resources: Optional[ResourceConstraints] = None,
+    executor: Optional[Executor] = None,
+    num_groups: Optional[int] = None
+) -> Tuple[object, np.ndarray, float, Optional[MultiResourceAllocation]]:
+    """
+    Решить раунд по компонентам связности и собрать общий результат
+
+    Компоненты объединяются в num_groups групп примерно равной трудоёмкости
+    (устройства × узлы); группа - одна задача executor. Плотные матрицы
+    передаются процессам через разделяемую память, разреженные - подматрицами.
+    Без executor группы решаются в текущем процессе.
+
+    Returns:
+        allocation: распределение [m x n] (CSR для разреженных ставок)
+        payments: платежи [m]
+        social_welfare: суммарное SW
+        milp: сводный результат MILP (при resources), иначе None
+    """
+    sparse_input = sp.issparse(valuations) or sp.issparse(costs)
+    m, n = valuations.shape
+    count, device_labels, edge_labels = feasible_components(valuations, costs)
+    if num_groups is None:
+        num_groups = getattr(executor, '_max_workers', 1)
+    groups = _group_components(count, device_labels, edge_labels, num_groups)
+
+    shared = []
+    try:
+        if sparse_input:
+            valuations, costs = sp.csr_matrix(valuations), sp.csr_matrix(costs)
+            inputs = lambda rows, cols: (valuations[rows][:, cols], costs[rows][:, cols])
+        elif executor is not None and len(groups) > 1:
+            specs = [_share(np.asarray(matrix), shared) for matrix in (valuations, costs)]
+            inputs = lambda rows, cols: specs
+        else:
+            inputs = lambda rows, cols: (np.asarray(valuations)[np.ix_(rows, cols)],
+                                         np.asarray(costs)[np.ix_(rows, cols)])
+
+        tasks = []
+        for rows, cols in groups:
+            group_valuations, group_costs = inputs(rows, cols)
+            tasks.append(_GroupTask(
+                rows=rows,
+                cols=cols,
+                valuations=group_valuations,
+                costs=group_costs,
+                capacity=None if capacity is None else np.asarray(capacity)[cols],
+                resources=None if resources is None else _sub_resources(resources, rows, cols)
+            ))
+
+        if executor is not None and len(tasks) > 1:
+            solved = list(executor.map(_solve_group, tasks))
+        else:
+            solved = [_solve_group(task) for task in tasks]
+    finally:
+        for block in shared:
+            block.close()
+            block.unlink()
+
+    # Сборка: устройства вне групп (без выгодных пар) отклонены и не платят
+    edge = np.full(m, -1, dtype=np.int64)
+    payments = np.zeros(m, dtype=_float_dtype(valuations.dtype, costs.dtype))
+    social_welfare = 0.0
+    for task, (group_edge, group_payments, group_sw, _) in zip(tasks, solved):
+        assigned = group_edge >= 0
+        edge[task.rows[assigned]] = task.cols[group_edge[assigned]]
+        payments[task.rows] = group_payments
+        social_welfare += group_sw
+
+    accepted = np.flatnonzero(edge >= 0)
+    allocation = sp.csr_matrix(
+        (np.ones(len(accepted), dtype=int), (accepted, edge[accepted])), shape=(m, n)
+    )
+    if not sparse_input:
+        allocation = allocation.toarray()
+
+    milp = None
+    if resources is not None:
+        statuses = [result[3][1] for result in solved]
+        milp = MultiResourceAllocation(
+            allocation=allocation,
+            social_welfare=float(sum(result[3][0] for result in solved)),
+            upper_bound=float(sum(result[3][2] for result in solved)),
+            status=next((s for s in statuses if s != 'optimal'), 'optimal')
+        )
+    return allocation, payments, social_welfare, milp
+
+def _group_components(
+    count: int,
+    device_labels: np.ndarray,
+    edge_labels: np.ndarray,
+    num_groups: int
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """Разложить компоненты (крупные первыми) по наименее загруженным группам"""
+    devices = np.bincount(device_labels, minlength=count)
+    edges = np.bincount(edge_labels, minlength=count)
+    work = devices * edges
+    # Компоненты без выгодных пар (одиночные устройства и узлы) решать не нужно
+    components = [c for c in np.argsort(-work, kind='stable') if work[c] > 0]
+    if not components:
+        return []
+
+    bins = [(0, k, []) for k in range(max(1, min(num_groups, len(components))))]
+    for component in components:
+        load, k, members = heapq.heappop(bins)
+        members.append(component)
+        heapq.heappush(bins, (load + int(work[component]), k, members))
+
+    groups = []
+    for _, _, members in sorted(bins, key=lambda b: b[1]):
+        if members:
+            groups.append((np.flatnonzero(np.isin(device_labels, members)),
+                           np.flatnonzero(np.isin(edge_labels, members))))
+    return groups
+
+def _sub_resources(resources: ResourceConstraints, rows: np.ndarray, cols: np.ndarray) -> ResourceConstraints:
+    """Потребности и ёмкости подзадачи"""
+    return replace(
+        resources,
+        cpu_demand=np.asarray(resources.cpu_demand)[rows],
+        memory_demand=np.asarray(resources.memory_demand)[rows],
+        cpu_capacity=np.asarray(resources.cpu_capacity)[cols],
+        memory_capacity=np.asarray(resources.memory_capacity)[cols]
+    )
+
+def _share(array: np.ndarray, blocks: list) -> tuple:
+    """Скопировать массив в разделяемую память; вернуть (имя, форма, тип)"""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    blocks.append(block)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block.name, array.shape, array.dtype.str
+
+def _attach(spec: tuple, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Подматрица [rows x cols] массива из разделяемой памяти (копия)"""
+    name, shape, dtype = spec
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        full = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        sub = full[np.ix_(rows, cols)]
+        del full  # представление держит буфер; без удаления close() невозможен
+    finally:
+        block.close()
+    return sub
+
+def _solve_group(task: _GroupTask) -> tuple:
+    """Решить группу компонент (выполняется в процессе пула)"""
+    # Отложенный импорт: vcg_auction импортирует этот модуль
+    from .history import allocation_to_edge_index
+    from .vcg_auction import VCGAuction
+
+    valuations, costs = task.valuations, task.costs
+    if isinstance(valuations, tuple):
+        valuations = _attach(valuations, task.rows, task.cols)
+        costs = _attach(costs, task.rows, task.cols)
+
+    auction = VCGAuction(len(task.rows), len(task.cols))
+    allocation, payments, sw = auction._solve_round(valuations, costs, task.capacity, task.resources)
+    milp = auction.last_milp
+    summary = None if milp is None else (milp.social_welfare, milp.status, milp.upper_bound)
+    return allocation_to_edge_index(allocation, dtype=np.int64), payments, sw, summary
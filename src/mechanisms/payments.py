@@ -1,10 +1,13 @@
 import numpy as np
-from typing import Dict, List, Tuple
+import scipy.sparse as sp
+from typing import Dict, List, Optional, Tuple
+from . import kernels
 
 def calculate_vcg_payments(
     allocation: np.ndarray,  # Binary matrix [m x n]: allocation[i][j] = 1 if device i uses edge j
     utility_matrix: np.ndarray,  # [m x n]: U[i][j]
     cost_matrix: np.ndarray,  # [m x n]: C[i][j]
+    payments: Optional[np.ndarray] = None,  # [m]: буфер для результата
 ) -> Tuple[np.ndarray, float]:
     """
     Вычислить платежи VCG
@@ -13,32 +16,91 @@ def calculate_vcg_payments(
         allocation: матрица размещения [m x n]
         utility_matrix: матрица полезности [m x n]
         cost_matrix: матрица стоимости [m x n]
+        payments: необязательный буфер [m], в который записываются платежи
     
     Returns:
         payments: вектор платежей [m]
         total_sw: итоговое социальное благосустояние
     """
-    m, n = allocation.shape  # m - устройства, n - узлы
+    # Платёж в исходной формулировке: sw_without_i - (current_sw - sum(allocation[i] * U)),
+    # где allocation[i] транслируется на все строки U, т.е. вклад = allocation[i] @ U.sum(0)
+    column_utility = np.asarray(utility_matrix.sum(axis=0)).ravel()
+    contributions = np.asarray(allocation @ column_utility).ravel()
+    return calculate_clarke_payments(
+        allocation, utility_matrix, cost_matrix,
+        contributions=contributions, payments=payments
+    )
+
+def calculate_clarke_payments(
+    allocation: np.ndarray,  # [m x n]: распределение (0/1)
+    valuations: np.ndarray,  # [m x n]: полезность
+    costs: np.ndarray,  # [m x n]: стоимость
+    contributions: Optional[np.ndarray] = None,  # [m]: вклад устройства в SW
+    payments: Optional[np.ndarray] = None,  # [m]: буфер для результата
+    sw_without: Optional[np.ndarray] = None,  # [m]: оптимальное SW без устройства i
+) -> Tuple[np.ndarray, float]:
+    """
+    Вычислить все платежи Кларка за один проход O(m·n)
     
-    # Социальное благосустояние с текущим распределением
-    current_sw = np.sum(allocation * utility_matrix) - np.sum(allocation * cost_matrix)
+    SW без устройства i равно SW - (вклад строки i), поэтому копировать
+    распределение для каждого устройства не нужно: достаточно сумм по строкам.
+    Матрицы могут быть разреженными (scipy.sparse) - тогда суммы считаются
+    только по хранимым парам устройство-узел.
     
-    # Платежи VCG
-    payments = np.zeros(m)
+    Args:
+        allocation: матрица размещения [m x n]
+        valuations: матрица полезности [m x n]
+        costs: матрица стоимости [m x n]
+        contributions: ценность устройства, вычитаемая из SW [m]
+            (по умолчанию sum_j allocation[i][j] * valuations[i][j])
+        payments: необязательный буфер [m], в который записываются платежи
+        sw_without: SW после пересчёта распределения без устройства i [m]
+            (по умолчанию распределение фиксировано: SW - вклад строки i)
     
-    for i in range(m):
-        # Создать поддельное распределение без устройства i
-        allocation_without_i = allocation.copy()
-        allocation_without_i[i] = 0
-        
-        # SW без устройства i
-        sw_without_i = (np.sum(allocation_without_i * utility_matrix) - 
-                       np.sum(allocation_without_i * cost_matrix))
-        
-        # Платёж = внешний эффект
-        payments[i] = sw_without_i - (current_sw - np.sum(allocation[i] * utility_matrix))
+    Returns:
+        payments: вектор платежей [m]
+        total_sw: итоговое социальное благосустояние
+    """
+    dtype = _float_dtype(valuations.dtype, costs.dtype)
+    m = allocation.shape[0]
+    
+    # Суммы по строкам: ценность и стоимость каждого устройства
+    row_value = _row_dot(allocation, valuations, dtype)
+    row_cost = _row_dot(allocation, costs, dtype)
+    current_sw = row_value.sum() - row_cost.sum()
+    
+    if contributions is None:
+        contributions = row_value
+    
+    if payments is None:
+        payments = np.empty(m, dtype=dtype)
+    elif payments.shape != (m,):
+        raise ValueError(f"payments buffer must have shape ({m},), got {payments.shape}")
     
-    return payments, current_sw
+    if sw_without is None:
+        # Платёж = sw_without_i - (current_sw - contribution_i), где
+        # sw_without_i = current_sw - (row_value[i] - row_cost[i]); current_sw сокращается
+        np.subtract(row_cost, row_value, out=payments)
+    else:
+        np.subtract(sw_without, current_sw, out=payments, casting='same_kind')
+    payments += contributions
+    
+    return payments, float(current_sw)
+
+def _row_dot(allocation, matrix, dtype: np.dtype) -> np.ndarray:
+    """Построчная сумма allocation * matrix [m] (плотные или разреженные матрицы)"""
+    if sp.issparse(matrix):
+        return np.asarray(matrix.multiply(allocation).sum(axis=1), dtype=dtype).ravel()
+    if sp.issparse(allocation):
+        return np.asarray(allocation.multiply(matrix).sum(axis=1), dtype=dtype).ravel()
+    return kernels.row_dot(allocation, matrix, dtype)
+
+def _float_dtype(*dtypes: np.dtype) -> np.dtype:
+    """Вещественный тип результата (float32 сохраняется, целые -> float64)"""
+    dtype = np.result_type(*dtypes)
+    if not np.issubdtype(dtype, np.floating):
+        dtype = np.dtype(np.float64)
+    return dtype
 
 def update_utility_function(
     utility_matrix: np.ndarray,
@@ -4,30 +4,113 @@
 """
 
 import numpy as np
-from typing import List, Tuple
+import scipy.sparse as sp
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 from dataclasses import dataclass
+from . import kernels
+from .payments import calculate_clarke_payments
+from .allocation import CapacitatedAssignment
+from .partition import solve_partitioned
+from .milp_allocation import (
+    MultiResourceAllocation,
+    ResourceConstraints,
+    solve_multi_resource_allocation,
+)
 
 @dataclass
 class AuctionResult:
     """Результат одного раунда аукциона"""
-    allocation: np.ndarray  # [m x n]: устройства × узлы
+    allocation: np.ndarray  # [m x n]: устройства × узлы (CSR для разреженных ставок)
     payments: np.ndarray    # [m]: платежи для каждого устройства
     social_welfare: float   # Суммарное благосустояние
     timestamp: int
 
+@dataclass
+class BatchAuctionResult:
+    """Результаты T раундов аукциона в виде массивов (struct-of-arrays)"""
+    allocation: np.ndarray      # [T x m x n]: устройства × узлы (int8)
+    payments: np.ndarray        # [T x m]: платежи в каждом раунде
+    social_welfare: np.ndarray  # [T]: благосустояние каждого раунда
+    timestamps: np.ndarray      # [T]
+    
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    
+    def round(self, t: int) -> AuctionResult:
+        """Результат раунда t в виде AuctionResult"""
+        return AuctionResult(
+            allocation=self.allocation[t].astype(int),
+            payments=self.payments[t],
+            social_welfare=float(self.social_welfare[t]),
+            timestamp=int(self.timestamps[t])
+        )
+
+class PaymentStatistics:
+    """Накопительные статистики платежей по всем раундам (обновление за раунд, чтение O(1))"""
+    
+    def __init__(self):
+        self.rounds = 0
+        self.gini_sum = 0.0
+        self.gini_rounds = 0  # Раунды, где Джини определён (> 1 положительного платежа)
+        self.payment_total = 0.0
+        self.paying_devices = 0
+        self.welfare_total = 0.0
+    
+    def update(self, payments: np.ndarray, social_welfare: float):
+        """Учесть платежи и SW очередного раунда"""
+        self.rounds += 1
+        self.welfare_total += social_welfare
+        
+        positive = payments[payments > 0]  # Только положительные
+        self.payment_total += float(positive.sum())
+        self.paying_devices += len(positive)
+        if len(positive) > 1:
+            self.gini_sum += VCGAuction._compute_gini(positive)
+            self.gini_rounds += 1
+    
+    @property
+    def average_gini(self) -> float:
+        return self.gini_sum / self.gini_rounds if self.gini_rounds else 0.0
+    
+    @property
+    def average_payment(self) -> float:
+        """Средний положительный платёж"""
+        return self.payment_total / self.paying_devices if self.paying_devices else 0.0
+    
+    @property
+    def average_welfare(self) -> float:
+        return self.welfare_total / self.rounds if self.rounds else 0.0
+
 class VCGAuction:
     """Класс для проведения MA-VCG аукциона"""
     
-    def __init__(self, num_devices: int, num_edges: int):
+    def __init__(
+        self,
+        num_devices: int,
+        num_edges: int,
+        edge_capacity: Optional[np.ndarray] = None,  # [n]: слоты на узлах (None - без ограничений)
+        history=None,  # Хранилище раундов: список (по умолчанию) или AuctionHistory
+        resources: Optional[ResourceConstraints] = None,  # CPU/память устройств и узлов (MILP)
+        partition_workers: Optional[int] = None  # Процессов для решения по компонентам (None - выкл.)
+    ):
         self.num_devices = num_devices
         self.num_edges = num_edges
-        self.history: List[AuctionResult] = []
+        self.edge_capacity = edge_capacity
+        self.resources = resources
+        self.last_milp: Optional[MultiResourceAllocation] = None
+        self.partition_workers = partition_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.history: List[AuctionResult] = [] if history is None else history
+        self.payment_stats = PaymentStatistics()
     
     def run_auction(
         self,
         valuations: np.ndarray,  # [m x n]: полезность
         costs: np.ndarray,       # [m x n]: стоимость
-        timestamp: int
+        timestamp: int,
+        edge_capacity: Optional[np.ndarray] = None,
+        resources: Optional[ResourceConstraints] = None
     ) -> AuctionResult:
         """
         Провести один раунд аукциона
@@ -36,6 +119,10 @@ class VCGAuction:
             valuations: матрица полезности [m x n]
             costs: матрица стоимости [m x n]
             timestamp: текущее время
+            edge_capacity: ёмкость узлов на этот раунд [n]
+                (см. edge_slot_capacity; по умолчанию self.edge_capacity)
+            resources: потребности и ёмкости CPU/памяти на этот раунд
+                (по умолчанию self.resources); включают MILP-распределение
         
         Returns:
             AuctionResult: результат аукциона
@@ -44,11 +131,12 @@ class VCGAuction:
         # В реальности здесь была бы коммуникация с устройствами
         # Здесь используем полученные valuations
         
-        # Шаг 2: Фаза оптимизации (вычислить оптимальное распределение)
-        allocation = self._compute_optimal_allocation(valuations, costs)
+        capacity = self.edge_capacity if edge_capacity is None else edge_capacity
+        resources = self.resources if resources is None else resources
         
+        # Шаг 2: Фаза оптимизации (вычислить оптимальное распределение)
         # Шаг 3: Фаза платежей (вычислить VCG платежи)
-        payments, sw = self._compute_vcg_payments(allocation, valuations, costs)
+        allocation, payments, sw = self._solve_round(valuations, costs, capacity, resources)
         
         result = AuctionResult(
             allocation=allocation,
@@ -58,8 +146,114 @@ class VCGAuction:
         )
         
         self.history.append(result)
+        self.payment_stats.update(result.payments, result.social_welfare)
         return result
     
+    def run_auction_batch(
+        self,
+        valuations: np.ndarray,  # [T x m x n]: полезность по раундам
+        costs: np.ndarray,       # [T x m x n]: стоимость по раундам
+        timestamps: Optional[np.ndarray] = None,
+        edge_capacity: Optional[np.ndarray] = None
+    ) -> BatchAuctionResult:
+        """
+        Провести T независимых раундов аукциона одним вызовом
+        
+        Без ограничения ёмкости распределение и платежи всех раундов считаются
+        операциями над целыми массивами. С ёмкостью каждый раунд решается
+        CapacitatedAssignment (раунды не связаны между собой).
+        История аукциона (self.history) не пополняется.
+        
+        Args:
+            valuations: матрицы полезности [T x m x n]
+            costs: матрицы стоимости [T x m x n]
+            timestamps: время каждого раунда [T] (по умолчанию 0..T-1)
+            edge_capacity: ёмкость узлов [n] (по умолчанию self.edge_capacity)
+        
+        Returns:
+            BatchAuctionResult: результаты всех раундов
+        """
+        valuations = np.asarray(valuations)
+        costs = np.asarray(costs)
+        T, m, n = valuations.shape
+        timestamps = np.arange(T) if timestamps is None else np.asarray(timestamps)
+        capacity = self.edge_capacity if edge_capacity is None else edge_capacity
+        
+        if capacity is not None:
+            allocation = np.zeros((T, m, n), dtype=np.int8)
+            payments = np.zeros((T, m), dtype=np.result_type(valuations, costs, np.float32))
+            social_welfare = np.zeros(T)
+            for t in range(T):
+                result = self._solve_round(valuations[t], costs[t], capacity)
+                allocation[t], payments[t], social_welfare[t] = result
+            return BatchAuctionResult(allocation, payments, social_welfare, timestamps)
+        
+        # Жадный выбор лучшего узла для всех раундов и устройств сразу
+        utility = valuations - costs
+        best_edge = np.argmax(utility, axis=2)[..., None]  # [T x m x 1]
+        accepted = np.take_along_axis(utility, best_edge, axis=2)[..., 0] > 0
+        
+        allocation = np.zeros((T, m, n), dtype=np.int8)
+        np.put_along_axis(allocation, best_edge, accepted[..., None].astype(np.int8), axis=2)
+        
+        # Платёж Кларка при фиксированном распределении равен стоимости выбранного узла
+        # (см. calculate_clarke_payments): row_value - row_cost сокращается с вкладом
+        row_value = np.where(accepted, np.take_along_axis(valuations, best_edge, axis=2)[..., 0], 0)
+        row_cost = np.where(accepted, np.take_along_axis(costs, best_edge, axis=2)[..., 0], 0)
+        social_welfare = row_value.sum(axis=1) - row_cost.sum(axis=1)
+        
+        return BatchAuctionResult(allocation, row_cost, social_welfare, timestamps)
+    
+    def _solve_round(
+        self,
+        valuations: np.ndarray,
+        costs: np.ndarray,
+        capacity: Optional[np.ndarray] = None,
+        resources: Optional[ResourceConstraints] = None
+    ) -> Tuple[np.ndarray, np.ndarray, float]:
+        """Распределение, платежи и SW одного раунда без записи в историю"""
+        if self.partition_workers is not None:
+            # Независимые компоненты графа выгодных пар решаются параллельно
+            allocation, payments, sw, milp = solve_partitioned(
+                valuations, costs, capacity, resources,
+                executor=self._get_executor(), num_groups=self.partition_workers
+            )
+            if resources is not None:
+                self.last_milp = milp
+        elif resources is not None:
+            # MILP по CPU и памяти; платежи Кларка при фиксированном распределении
+            # (точные пересчёты без каждого устройства для MILP слишком дороги)
+            self.last_milp = solve_multi_resource_allocation(valuations, costs, resources)
+            allocation = self.last_milp.allocation
+            payments, sw = self._compute_vcg_payments(allocation, valuations, costs)
+        elif capacity is None:
+            allocation = self._compute_optimal_allocation(valuations, costs)
+            payments, sw = self._compute_vcg_payments(allocation, valuations, costs)
+        else:
+            # Точное распределение с учётом ёмкости (поток минимальной стоимости);
+            # SW без каждого устройства дорешивается от найденного оптимума
+            solver = CapacitatedAssignment(valuations, costs, capacity)
+            allocation = solver.allocation_matrix()
+            payments, sw = self._compute_vcg_payments(
+                allocation, valuations, costs,
+                sw_without=solver.welfare_without_each()
+            )
+        return allocation, payments, sw
+    
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Пул процессов для решения по компонентам (создаётся при первом раунде)"""
+        if self.partition_workers <= 1:
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.partition_workers)
+        return self._executor
+    
+    def close(self):
+        """Остановить пул процессов"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
     def _compute_optimal_allocation(
         self,
         valuations: np.ndarray,
@@ -68,76 +262,71 @@ class VCGAuction:
         """
         Вычислить оптимальное распределение задач
         Используется жадный алгоритм для каждого устройства
+        (оптимален, когда ёмкость узлов не ограничена)
         """
+        if sp.issparse(valuations) or sp.issparse(costs):
+            return self._compute_sparse_allocation(valuations, costs)
+        
         m, n = valuations.shape
         allocation = np.zeros((m, n), dtype=int)
         
-        # Для каждого устройства выбрать лучший узел
-        for i in range(m):
-            # Вычислить "выгоду" для каждого узла
-            utility = valuations[i] - costs[i]
-            
-            # Выбрать узел с максимальной выгодой
-            best_edge = np.argmax(utility)
-            
-            if utility[best_edge] > 0:  # Только если выгодно
-                allocation[i, best_edge] = 1
-            # Иначе устройство отклоняет все предложения
+        # Для каждого устройства выбрать узел с максимальной выгодой;
+        # если невыгодны все узлы (-1), устройство отклоняет все предложения
+        edge = kernels.greedy_edges(valuations, costs)
+        accepted = np.flatnonzero(edge >= 0)
+        allocation[accepted, edge[accepted]] = 1
         
         return allocation
     
+    def _compute_sparse_allocation(self, valuations, costs) -> sp.csr_matrix:
+        """
+        Жадное распределение по разреженным (CSR) ставкам
+        
+        Допустимы только хранимые пары устройство-узел, поэтому время и память
+        пропорциональны числу связей, а не m·n. Результат - CSR [m x n]
+        """
+        utility = sp.csr_matrix(valuations - costs)
+        utility.sort_indices()
+        m, n = utility.shape
+        
+        # Неявный ноль не проходит порог "> 0", поэтому argmax по строкам CSR корректен
+        best_edge = np.asarray(utility.argmax(axis=1)).ravel()
+        best_utility = utility.max(axis=1).toarray().ravel()
+        accepted = np.flatnonzero(best_utility > 0)
+        
+        return sp.csr_matrix(
+            (np.ones(len(accepted), dtype=int), (accepted, best_edge[accepted])),
+            shape=(m, n)
+        )
+    
     def _compute_vcg_payments(
         self,
         allocation: np.ndarray,
         valuations: np.ndarray,
-        costs: np.ndarray
+        costs: np.ndarray,
+        payments: Optional[np.ndarray] = None,
+        sw_without: Optional[np.ndarray] = None
     ) -> Tuple[np.ndarray, float]:
         """
         Вычислить VCG платежи
         
+        Внешний эффект каждого устройства считается за один проход
+        (SW без устройства i = SW - вклад строки i), см. calculate_clarke_payments.
+        Если распределение без устройства пересчитывалось, его SW передаётся в sw_without
+        
         Returns:
             payments: вектор платежей [m]
             social_welfare: итоговое социальное благосустояние
         """
-        m = allocation.shape
-        
-        # Социальное благосустояние с текущим распределением
-        current_sw = np.sum(allocation * valuations) - np.sum(allocation * costs)
-        
-        payments = np.zeros(m)
-        
-        for i in range(m):
-            # SW без устройства i
-            allocation_without_i = allocation.copy()
-            allocation_without_i[i] = 0
-            
-            sw_without_i = (np.sum(allocation_without_i * valuations) - 
-                           np.sum(allocation_without_i * costs))
-            
-            # Платёж = внешний эффект
-            current_contribution = np.sum(allocation[i] * valuations[i])
-            payments[i] = sw_without_i - (current_sw - current_contribution)
-        
-        return payments, current_sw
+        return calculate_clarke_payments(
+            allocation, valuations, costs, payments=payments, sw_without=sw_without
+        )
     
     def get_average_gini(self) -> float:
-        """Получить среднее значение Джини платежей"""
-        if not self.history:
-            return 0.0
-        
-        ginis = []
-        for result in self.history:
-            payments = result.payments[result.payments > 0]  # Только положительные
-            if len(payments) > 1:
-                gini = self._compute_gini(payments)
-                ginis.append(gini)
-        
-        return np.mean(ginis) if ginis else 0.0
+        """Получить среднее значение Джини платежей (по всем раундам, O(1))"""
+        return self.payment_stats.average_gini
     
     @staticmethod
     def _compute_gini(values: np.ndarray) -> float:
         """Вычислить коэффициент Джини"""
-        sorted_vals = np.sort(values)
-        n = len(sorted_vals)
-        cumsum = np.cumsum(sorted_vals)
-        return (2 * np.sum((np.arange(1, n+1)) * sorted_vals)) / (n * np.sum(sorted_vals)) - (n + 1) / n
+        return kernels.gini(values)
@@ -0,0 +1,111 @@
+"""
+Столбцы записей в предвыделенных массивах
+Общее хранилище историй (mechanisms/history.py, environment/history.py):
+кольцевой буфер, рост удвоением и сброс на диск в .npz
+"""
+
+import numpy as np
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+class ColumnRing:
+    """
+    Записи - строки столбцов [capacity x ...] одного буфера
+
+    Режимы:
+        max_size=None, spill_dir=None - хранить всё (массивы растут удвоением)
+        max_size=N                    - кольцевой буфер последних N записей
+        spill_dir=...                 - заполненный буфер (max_size или chunk_size
+                                        записей) сбрасывается на диск в .npz
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, Tuple[np.dtype, Tuple[int, ...]]],  # имя -> (тип, форма записи)
+        max_size: Optional[int] = None,
+        spill_dir: Optional[Union[str, Path]] = None,
+        chunk_size: int = 1024,
+        spill_prefix: str = 'history'
+    ):
+        if max_size is not None and max_size < 1:
+            raise ValueError("max_size must be >= 1 (None - unbounded)")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        self.max_size = max_size
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        self.spill_prefix = spill_prefix
+        self.spilled_chunks: List[Path] = []
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+
+        self.capacity = chunk_size if max_size is None else max_size
+        self.columns = {
+            name: np.empty((self.capacity,) + tuple(shape), dtype=dtype)
+            for name, (dtype, shape) in columns.items()
+        }
+        self._start = 0  # позиция самой старой записи в кольцевом буфере
+        self._size = 0
+
+    def append(self, row: Dict[str, object]):
+        """Добавить запись (значения всех столбцов)"""
+        if self._size == self.capacity:
+            if self.spill_dir is not None:
+                self.spill()
+            elif self.max_size is None:
+                self._grow()
+            else:
+                # Кольцевой буфер: перезаписать самую старую запись
+                self._start = (self._start + 1) % self.capacity
+                self._size -= 1
+
+        position = (self._start + self._size) % self.capacity
+        for name, column in self.columns.items():
+            column[position] = row[name]
+        self._size += 1
+
+    def spill(self):
+        """Сбросить записи из памяти на диск (один .npz на сброс)"""
+        if self._size == 0:
+            return
+        path = self.spill_dir / f"{self.spill_prefix}_{len(self.spilled_chunks):06d}.npz"
+        np.savez(path, **{name: self[name] for name in self.columns})
+        self.spilled_chunks.append(path)
+        self._start = 0
+        self._size = 0
+
+    @staticmethod
+    def load_chunk(path: Union[str, Path]) -> dict:
+        """Загрузить сброшенный на диск фрагмент"""
+        with np.load(path) as chunk:
+            return {key: chunk[key] for key in chunk.files}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """
+        Столбец записей в памяти в хронологическом порядке
+        (представление без копии, если буфер не перекручен)
+        """
+        column = self.columns[name]
+        end = self._start + self._size
+        if end <= self.capacity:
+            return column[self._start:end]
+        return np.concatenate([column[self._start:], column[:end - self.capacity]])
+
+    def row(self, k: int) -> Dict[str, np.ndarray]:
+        """Значения k-й по времени записи в памяти (отрицательные k - с конца)"""
+        if k < 0:
+            k += self._size
+        if not 0 <= k < self._size:
+            raise IndexError("history index out of range")
+        position = (self._start + k) % self.capacity
+        return {name: column[position] for name, column in self.columns.items()}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self):
+        """Удвоить ёмкость неограниченного буфера"""
+        self.capacity *= 2
+        for name, old in self.columns.items():
+            new = np.empty((self.capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            self.columns[name] = new
@@ -0,0 +1,39 @@
+"""
+Бэкенд вычислительных ядер: Numba (JIT) или NumPy
+
+Общий для ядер аукциона (mechanisms/kernels.py) и дерева сумм
+приоритетного буфера (agents/sum_tree.py). Если установлен Numba, по
+умолчанию используются JIT-ядра; бэкенд можно выбрать функцией set_backend.
+"""
+
+from typing import Optional
+
+try:
+    import numba
+except ImportError:  # Numba - необязательная зависимость
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+BACKENDS = ('numba', 'numpy') if NUMBA_AVAILABLE else ('numpy',)
+BACKEND = BACKENDS[0]
+
+if NUMBA_AVAILABLE:
+    # error_model='numpy': деление на ноль даёт inf/nan, как в NumPy-версии
+    jit = numba.njit(cache=True, nogil=True, error_model='numpy')
+else:
+    jit = None
+
+def set_backend(name: str):
+    """Выбрать бэкенд по умолчанию ('numba' или 'numpy')"""
+    global BACKEND
+    BACKEND = resolve(name)
+
+def resolve(backend: Optional[str]) -> str:
+    """Проверить имя бэкенда (None - бэкенд по умолчанию)"""
+    if backend is None:
+        return BACKEND
+    if backend not in ('numba', 'numpy'):
+        raise ValueError(f"unknown kernel backend '{backend}'")
+    if backend not in BACKENDS:
+        raise ValueError("numba backend requested but Numba is not installed")
+    return backend
@@ -0,0 +1,461 @@
+"""
+Тесты окружения edge-сети
+"""
+
+import copy
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from src.config import EdgeConfig
+from src.environment.edge_network import (
+    ACTION_ACCEPT, ACTION_ACCEPT_HIGH, ACTION_ACCEPT_LOW, EdgeNetwork, EdgeNode
+)
+from src.environment.edge_arrays import EdgeArrays
+from src.environment.vec_edge_network import VecEdgeNetwork
+from src.environment.workload import (
+    build_schedule, burst_rate, constant_rate, diurnal_rate, sample_tasks, scaled_rate
+)
+from src.environment.device import DeviceTable, DeviceView
+from src.environment.history import NetworkHistory
+from src.environment.task import Task, TaskBatch, TaskPriority
+from src.environment.task_registry import TaskRegistry
+from src.environment.trace import TaskTrace, TraceWriter, convert_csv
+
+class TestEdgeArrays(unittest.TestCase):
+    """Тесты векторизованного состояния узлов"""
+    
+    def test_step_releases_resources(self):
+        arrays = EdgeArrays(3, cpu_capacity=[1000, 2000, 500], memory_capacity=4096)
+        rng = np.random.default_rng(15)
+        nodes = rng.integers(0, 3, 200)
+        cpu = rng.integers(100, 3000, 200)
+        memory = rng.integers(16, 64, 200)
+        arrays.allocate(nodes, np.arange(200), cpu, memory)
+        processing_time = cpu / arrays.cpu_capacity[nodes]
+        
+        for t in range(1, 8):
+            completed, completed_nodes = arrays.step()
+            expected = np.flatnonzero((processing_time <= t) & (processing_time > t - 1))
+            np.testing.assert_array_equal(np.sort(completed), expected)
+            np.testing.assert_array_equal(completed_nodes, nodes[np.sort(completed)] if len(completed) else [])
+            running = processing_time > t
+            np.testing.assert_array_equal(arrays.cpu_used, np.bincount(nodes[running], cpu[running], 3))
+            np.testing.assert_array_equal(arrays.memory_used, np.bincount(nodes[running], memory[running], 3))
+        self.assertEqual(arrays.num_executing, int((processing_time > 7).sum()))
+
+class TestTaskRegistry(unittest.TestCase):
+    """Slot map ресурсов выполняющихся задач"""
+    
+    def test_slots_reused_and_grown(self):
+        registry = TaskRegistry(initial_slots=4)
+        slots = registry.register(np.arange(6), np.zeros(6), np.arange(6), np.full(6, 10), np.full(6, 20))
+        self.assertEqual(len(set(slots.tolist())), 6)
+        nodes, devices, cpu, memory = registry.release(slots[[1, 4]])
+        np.testing.assert_array_equal(devices, [1, 4])
+        self.assertEqual((cpu.sum(), memory.sum(), len(registry)), (20, 40, 4))
+        
+        slot = registry.register_one(7, 2, 3, 30, 40)
+        self.assertIn(slot, slots[[1, 4]].tolist())  # освобождённый слот переиспользуется
+        self.assertEqual(registry.release_one(slot), (2, 3, 30, 40))
+    
+    def test_tick_mode_releases_resources(self):
+        env = EdgeNetwork(seed=28)
+        for _ in range(200):
+            env.step(np.zeros(env.config.num_edges, dtype=np.int64))
+        for edge in env.edges:
+            self.assertEqual(edge.cpu_used, sum(env.registry.cpu[edge._slots[t]] for t in edge.executing_tasks))
+            self.assertLess(edge.load, 1.0)
+        self.assertEqual(len(env.registry), sum(len(edge.executing_tasks) for edge in env.edges))
+
+class TestEventDrivenNode(unittest.TestCase):
+    """Событийный режим EdgeNode"""
+    
+    def test_matches_tick_mode(self):
+        config = EdgeConfig(cpu_capacity=100, memory_capacity=10 ** 6)
+        tick, event = EdgeNode(0, config), EdgeNode(0, config, event_driven=True)
+        rng = np.random.default_rng(19)
+        task_id = 0
+        for t in range(30):
+            for _ in range(rng.integers(0, 4)):
+                task = Task(id=task_id, device_id=0, cpu_required=int(rng.integers(10, 450)),
+                            memory_required=int(rng.integers(1, 100)))
+                tick.allocate_task(task)
+                event.allocate_task(task)
+                task_id += 1
+            tick_done, _ = tick.step()
+            event_done, _ = event.step()
+            self.assertEqual(sorted(event_done), sorted(tick_done))
+            self.assertEqual(sorted(event.executing_tasks), sorted(tick.executing_tasks))
+        
+        # Оба режима освобождают ресурсы завершённых задач
+        registry = event.registry
+        self.assertEqual(event.cpu_used, sum(registry.cpu[event._slots[t]] for t in event.executing_tasks))
+        self.assertEqual((tick.cpu_used, tick.memory_used), (event.cpu_used, event.memory_used))
+        self.assertEqual(len(tick.registry), len(tick.executing_tasks))
+        self.assertEqual(event.next_completion_time(), min(event.executing_tasks.values()))
+
+class TestTaskBatch(unittest.TestCase):
+    """Столбцовая генерация задач"""
+    
+    def test_generated_batch(self):
+        env = EdgeNetwork(seed=20)
+        env.config = copy.copy(env.config)
+        env.config.lambda_arrival = 500
+        env.step()
+        batch = env.new_tasks
+        
+        self.assertEqual(len(batch), env.task_counter)
+        np.testing.assert_array_equal(batch.id, np.arange(len(batch)))
+        self.assertTrue(np.all((batch.cpu_required >= 50) & (batch.cpu_required <= 500)))
+        self.assertEqual(sum(d.num_submitted for d in env.devices), len(batch))
+        
+        # Ленивые объекты Task совпадают со столбцами
+        task = batch[7]
+        self.assertEqual((task.id, task.device_id, task.cpu_required), (7, batch.device_id[7], batch.cpu_required[7]))
+        self.assertAlmostEqual(task.value, batch.value[7])
+        submitted = env.devices[task.device_id].submitted_tasks
+        self.assertIn(7, [t.id for t in submitted])
+        self.assertTrue(all(t.device_id == task.device_id for t in submitted))
+
+class TestArrivalSchedule(unittest.TestCase):
+    """Заранее сгенерированные приходы с переменной интенсивностью"""
+    
+    def test_rate_profiles(self):
+        """Средние числа приходов следуют профилю (оба метода)"""
+        profile = burst_rate(20.0, [(100, 200, 3.0)])
+        for method in ('thinning', 'per_step'):
+            schedule = build_schedule(300, profile, 50, rng=np.random.RandomState(21), method=method)
+            counts = schedule.counts()
+            self.assertEqual(schedule.offsets[-1], len(schedule.tasks))
+            self.assertAlmostEqual(counts[:100].mean(), 20, delta=2)
+            self.assertAlmostEqual(counts[100:200].mean(), 60, delta=4)
+        
+        diurnal = build_schedule(400, scaled_rate(diurnal_rate(10.0, 0.8, period=200), 2.0), 50,
+                                 rng=np.random.RandomState(22))
+        counts = diurnal.counts()
+        self.assertGreater(counts[25:75].mean(), 2 * counts[125:175].mean())
+    
+    def test_network_replays_schedule(self):
+        schedule = build_schedule(10, constant_rate(30.0), 100, rng=np.random.RandomState(23))
+        env = EdgeNetwork(seed=24, schedule=schedule)
+        for t in range(1, 12):
+            env.step()
+            window = schedule.window(t)
+            np.testing.assert_array_equal(env.new_tasks.id, window.id)
+            self.assertTrue(np.all(env.new_tasks.arrival_time == t))
+        self.assertEqual(len(env.new_tasks), 0)  # за пределами расписания приходов нет
+        self.assertEqual(env.task_counter, len(schedule.tasks))
+
+class TestDeviceTable(unittest.TestCase):
+    """Счётчики устройств в массивах и окно последних задач"""
+    
+    def test_counters_and_recent_window(self):
+        rng = np.random.RandomState(27)
+        table = DeviceTable(10, recent_window=4)
+        submitted = [[] for _ in range(10)]
+        first_id = 0
+        for t in range(20):
+            batch = sample_tasks(rng, np.full(rng.poisson(8), t), first_id, 10)
+            first_id += len(batch)
+            table.submit_batch(batch)
+            for task in batch:
+                submitted[task.device_id].append(task)
+        
+        np.testing.assert_array_equal(table.num_submitted, [len(tasks) for tasks in submitted])
+        for d in range(10):
+            self.assertEqual(table.recent_tasks(d), submitted[d][-4:])
+        
+        table.task_completed(np.array([0, 0, 1]))
+        table.task_rejected(np.array([2]))
+        table.receive_payment(np.array([0, 1]), np.array([3.0, 1.5]))
+        np.testing.assert_allclose(table.success_rate()[:2], [2 / len(submitted[0]), 1 / len(submitted[1])])
+        np.testing.assert_allclose(table.avg_payment()[:3], [1.5, 1.5, 0.0])
+        
+        view = DeviceView(table, 0)
+        self.assertAlmostEqual(view.success_rate, table.success_rate()[0])
+        self.assertEqual((view.num_rejected, DeviceView(table, 2).num_rejected), (0, 1))
+        view.submit_task(submitted[3][0])
+        self.assertEqual(view.submitted_tasks[-1].id, submitted[3][0].id)
+        self.assertEqual(len(view.submitted_tasks), 4)
+
+class TestNetworkHistory(unittest.TestCase):
+    """Предвыделенная история шагов сети"""
+    
+    def _run(self, history, steps=50):
+        env = EdgeNetwork(seed=29, history=history)
+        loads = []
+        for _ in range(steps):
+            env.step(np.zeros(env.config.num_edges, dtype=np.int64))
+            loads.append([edge.load for edge in env.edges])
+        return env, np.array(loads)
+    
+    def test_unbounded_and_views(self):
+        env, loads = self._run(NetworkHistory(4, chunk_size=8))
+        history = env.history
+        self.assertEqual(len(history), 50)
+        np.testing.assert_array_equal(history['time'], np.arange(1, 51))
+        np.testing.assert_allclose(history.load, loads)
+        np.testing.assert_allclose(history['load_per_node'][2], loads[:, 2])
+        
+        columns = history.as_dict()
+        self.assertTrue(np.shares_memory(columns['load_3'], history._steps.columns['load']))
+        self.assertTrue(np.shares_memory(columns['accepted_tasks'], history._steps.columns['accepted_tasks']))
+    
+    def test_empty_ring_rejected(self):
+        with self.assertRaises(ValueError):  # 0 не означает "без ограничения"
+            NetworkHistory(4, max_steps=0)
+    
+    def test_ring_buffer_and_stride(self):
+        env, loads = self._run(NetworkHistory(4, max_steps=10, stride=3))
+        self.assertEqual(len(env.history), 10)
+        np.testing.assert_array_equal(env.history['time'], np.arange(1, 51, 3)[-10:])
+        np.testing.assert_allclose(env.history.load, loads[::3][-10:])
+    
+    def test_spill_to_disk(self):
+        with tempfile.TemporaryDirectory() as spill_dir:
+            env, loads = self._run(NetworkHistory(4, max_steps=16, spill_dir=spill_dir))
+            self.assertEqual(len(env.history.spilled_chunks), 3)
+            self.assertEqual(len(env.history), 2)
+            chunk = NetworkHistory.load_chunk(env.history.spilled_chunks[1])
+            np.testing.assert_array_equal(chunk['time'], np.arange(17, 33))
+            np.testing.assert_allclose(chunk['load'], loads[16:32])
+
+class TestTaskTrace(unittest.TestCase):
+    """Бинарные трассы прихода задач"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        rng = np.random.RandomState(25)
+        self.times = np.sort(rng.uniform(0, 100, 1000)).round(3)
+        self.devices = rng.randint(0, 500, 1000)
+        self.csv_path = os.path.join(self.tmp.name, 'trace.csv')
+        with open(self.csv_path, 'w') as f:
+            f.write('ts,device_id,cpu_required,memory_required,priority\n')
+            for k, (t, d) in enumerate(zip(self.times, self.devices)):
+                f.write(f"{t},{d},{100 + k % 50},{256},{('LOW', 'MEDIUM', 'HIGH')[k % 3]}\n")
+    
+    def test_convert_csv(self):
+        trace = convert_csv(self.csv_path, os.path.join(self.tmp.name, 'trace'),
+                            chunk_size=128, columns={'arrival_time': 'ts'})
+        self.assertEqual(len(trace), 1000)
+        self.assertIsInstance(trace.arrival_time, np.memmap)
+        np.testing.assert_allclose(trace.arrival_time, self.times)
+        np.testing.assert_array_equal(trace.columns['device_id'], self.devices)
+        np.testing.assert_array_equal(trace.columns['priority'][:3], [0, 1, 2])
+        self.assertTrue(np.all(trace.columns['importance'] == 1.0))
+    
+    def test_accelerated_replay(self):
+        trace = convert_csv(self.csv_path, os.path.join(self.tmp.name, 'trace'),
+                            columns={'arrival_time': 'ts'})
+        replay = trace.replay(time_scale=10.0, num_devices=100)
+        self.assertEqual(replay.num_steps, int(self.times[-1] // 10) + 1)
+        self.assertEqual(replay.counts().sum(), 1000)
+        
+        ids = []
+        for t in range(1, replay.num_steps + 1):
+            window = replay.window(t)
+            ids.append(window.id)
+            expected = np.floor((self.times[window.id] - trace.start_time) / 10) + 1
+            np.testing.assert_array_equal(expected, t)
+            self.assertTrue(np.all(window.device_id < 100))
+        np.testing.assert_array_equal(np.concatenate(ids), np.arange(1000))
+        
+        env = EdgeNetwork(seed=26, schedule=trace.replay(time_scale=10.0, num_devices=100))
+        for t in range(1, replay.num_steps + 1):
+            env.step()
+            np.testing.assert_array_equal(env.new_tasks.id, replay.window(t).id)
+        self.assertEqual(env.task_counter, 1000)
+    
+    def test_unsorted_rows_rejected(self):
+        with TraceWriter(os.path.join(self.tmp.name, 'bad')) as writer:
+            writer.append({'arrival_time': [1.0, 2.0], 'device_id': [0, 1], 'cpu_required': [100, 100],
+                           'memory_required': [128, 128], 'priority': [0, 1]})
+            with self.assertRaises(ValueError):
+                writer.append({'arrival_time': [1.5], 'device_id': [0], 'cpu_required': [100],
+                               'memory_required': [128], 'priority': [0]})
+        self.assertEqual(len(TaskTrace(os.path.join(self.tmp.name, 'bad'))), 2)
+    
+    def test_rejected_chunk_not_written(self):
+        path = os.path.join(self.tmp.name, 'partial')
+        with TraceWriter(path) as writer:
+            with self.assertRaises(ValueError):  # короткий столбец priority
+                writer.append({'arrival_time': [0.0, 1.0, 2.0], 'device_id': [0, 1, 2], 'cpu_required': [0, 1, 2],
+                               'memory_required': [0, 1, 2], 'priority': [0, 1]})
+            with self.assertRaises(ValueError):  # нет столбца priority
+                writer.append({'arrival_time': [0.0], 'device_id': [0], 'cpu_required': [0], 'memory_required': [0]})
+            writer.append({'arrival_time': [10.0, 11.0, 12.0], 'device_id': [10, 11, 12],
+                           'cpu_required': [10, 11, 12], 'memory_required': [10, 11, 12],
+                           'priority': [0, 1, 2], 'importance': [10, 11, 12]})
+        trace = TaskTrace(path)
+        self.assertEqual(len(trace), 3)
+        for name in ('arrival_time', 'device_id', 'cpu_required', 'memory_required', 'importance'):
+            np.testing.assert_array_equal(trace.columns[name], [10, 11, 12])
+        np.testing.assert_array_equal(trace.columns['priority'], [0, 1, 2])
+    
+    def _write_csv(self, name, rows):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w') as f:
+            f.write('arrival_time,device_id,cpu_required,memory_required,priority\n')
+            for row in rows:
+                f.write(','.join(map(str, row)) + '\n')
+        return path
+    
+    def test_failed_conversion_not_published(self):
+        # Несортированные строки во второй порции: трасса не должна открываться
+        csv_path = self._write_csv('unsorted.csv', [(1.0, 0, 100, 128, 0), (2.0, 1, 100, 128, 1), (1.5, 2, 100, 128, 2)])
+        path = os.path.join(self.tmp.name, 'unsorted')
+        with self.assertRaises(ValueError):
+            convert_csv(csv_path, path, chunk_size=2)
+        with self.assertRaises(FileNotFoundError):
+            TaskTrace(path)
+        
+        # Каталог с прежней трассой: её meta.json не остаётся поверх новых файлов
+        convert_csv(self._write_csv('good.csv', [(1.0, 0, 100, 128, 0)]), path)
+        with self.assertRaises(ValueError):
+            convert_csv(csv_path, path, chunk_size=2)
+        with self.assertRaises(FileNotFoundError):
+            TaskTrace(path)
+    
+    def test_priority_out_of_range(self):
+        for priority in (7, 200, -1):
+            csv_path = self._write_csv('priority.csv', [(1.0, 0, 100, 128, 0), (2.0, 1, 100, 128, priority)])
+            with self.assertRaises(ValueError):
+                convert_csv(csv_path, os.path.join(self.tmp.name, 'priority'))
+        with TraceWriter(os.path.join(self.tmp.name, 'writer')) as writer:
+            with self.assertRaises(ValueError):
+                writer.append({'arrival_time': [1.0], 'device_id': [0], 'cpu_required': [100],
+                               'memory_required': [128], 'priority': [3]})
+        self.assertEqual(len(TaskTrace(os.path.join(self.tmp.name, 'writer'))), 0)
+
+class TestEdgeNetworkEngines(unittest.TestCase):
+    """Объектный и векторизованный движки EdgeNetwork"""
+    
+    def _run(self, engine):
+        np.random.seed(16)
+        random.seed(16)
+        env = EdgeNetwork(engine=engine)
+        metrics, states = [], []
+        for _ in range(5):
+            metrics.append(env.step())
+            for device in env.devices:
+                for task in device.submitted_tasks:
+                    if task.arrival_time == env.current_time:
+                        env.allocate_task(task, task.id % len(env.edges))
+            states.append(copy.deepcopy(env.get_state()))  # get_state отдаёт представления
+        return env, metrics, states
+    
+    def test_vectorized_matches_object_interface(self):
+        obj, obj_metrics, obj_states = self._run('object')
+        vec, vec_metrics, vec_states = self._run('vectorized')
+        
+        self.assertEqual([m['completed'] for m in vec_metrics], [m['completed'] for m in obj_metrics])
+        for vec_state, obj_state in zip(vec_states, obj_states):
+            self.assertEqual(set(vec_state), set(obj_state))
+            self.assertEqual(vec_state['pending_tasks'], obj_state['pending_tasks'])
+            np.testing.assert_allclose(vec_state['node_loads'], obj_state['node_loads'])
+            np.testing.assert_array_equal(vec_state['available_resources'], obj_state['available_resources'])
+        for obj_edge, vec_edge in zip(obj.edges, vec.edges):
+            self.assertEqual(vec_edge.cpu_capacity, obj_edge.cpu_capacity)
+            self.assertEqual(sorted(vec_edge.executing_tasks), sorted(obj_edge.executing_tasks))
+    
+    def test_incremental_state(self):
+        """Агрегаты get_state совпадают с пересчётом по узлам"""
+        for engine in ('object', 'event', 'vectorized'):
+            env = EdgeNetwork(engine=engine, seed=30)
+            state = env.get_state()
+            for _ in range(20):
+                env.step(np.zeros(env.config.num_edges, dtype=np.int64))
+                if len(env.new_tasks):
+                    env.enqueue_task(env.new_tasks[0], 1)
+                self.assertIs(env.get_state()['node_loads'].base, state['node_loads'].base)
+                np.testing.assert_allclose(state['node_loads'], [edge.load for edge in env.edges])
+                np.testing.assert_array_equal(state['available_resources'],
+                                              [(e.cpu_available, e.memory_available) for e in env.edges])
+                self.assertEqual(env.get_state()['pending_tasks'], len(env.edges[1].task_queue))
+            with self.assertRaises(ValueError):
+                state['node_loads'][0] = 0.0
+    
+    def test_event_engine_completions(self):
+        _, obj_metrics, _ = self._run('object')
+        _, event_metrics, _ = self._run('event')
+        self.assertEqual([m['completed'] for m in event_metrics], [m['completed'] for m in obj_metrics])
+    
+    def test_offer_tasks_by_columns(self):
+        """offer_tasks работает по столбцам TaskBatch и совпадает с поочерёдным размещением Task"""
+        config = copy.copy(EdgeNetwork().config)
+        config.lambda_arrival, config.num_devices = 60, 200
+        for engine in ('object', 'event', 'vectorized'):
+            env = EdgeNetwork(config, engine=engine, seed=37)
+            rng = np.random.default_rng(38)
+            for _ in range(10):
+                env.step()
+                env.generate_tasks()
+                actions = rng.integers(0, 4, config.num_edges)
+                
+                # Эталон: задачи по одной, ресурсы через allocate_task
+                reference = copy.deepcopy(env)
+                expected_rewards, expected_accepted = np.zeros(config.num_edges), 0
+                for task in reference.new_tasks:
+                    node = task.device_id % config.num_edges
+                    high = task.priority == TaskPriority.HIGH
+                    allowed = (actions[node] == ACTION_ACCEPT or (actions[node] == ACTION_ACCEPT_HIGH and high) or
+                               (actions[node] == ACTION_ACCEPT_LOW and not high))
+                    if allowed and reference.allocate_task(task, node):
+                        expected_accepted += 1
+                        processing_time = task.get_processing_time(reference.edges[node].cpu_capacity)
+                        expected_rewards[node] += task.value - 0.1 * processing_time
+                    else:
+                        expected_rewards[node] -= 0.5
+                
+                with mock.patch.object(TaskBatch, '__getitem__', side_effect=AssertionError("Task materialized")):
+                    rewards, accepted, rejected = env.offer_tasks(actions)
+                self.assertEqual((accepted, rejected), (expected_accepted, len(env.new_tasks) - expected_accepted))
+                np.testing.assert_allclose(rewards, expected_rewards)
+                np.testing.assert_array_equal(env.get_state()['available_resources'],
+                                              [(e.cpu_available, e.memory_available) for e in reference.edges])
+                np.testing.assert_array_equal(env.offered, np.bincount(env.new_tasks.device_id % config.num_edges,
+                                                                       minlength=config.num_edges))
+    
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            EdgeNetwork(engine='gpu')
+
+class TestVecEdgeNetwork(unittest.TestCase):
+    """Тесты синхронного шага N сред"""
+    
+    def _rollout(self, seed):
+        vec = VecEdgeNetwork(3, seed=seed)
+        rng = np.random.default_rng(0)
+        outputs = [vec.get_observations()]
+        for _ in range(6):
+            actions = rng.integers(0, 4, (3, vec.num_agents))
+            outputs.append(vec.step(actions))
+        return vec, outputs
+    
+    def test_batched_shapes(self):
+        vec, outputs = self._rollout(seed=17)
+        observations, rewards, metrics = outputs[-1]
+        self.assertEqual(outputs[0].shape, (3, vec.num_agents, 4))
+        self.assertEqual(observations.shape, (3, vec.num_agents, 4))
+        self.assertEqual(rewards.shape, (3, vec.num_agents))
+        self.assertEqual(metrics['accepted'].shape, (3,))
+    
+    def test_seeded_streams(self):
+        """Одинаковое зерно - одинаковые траектории; среды между собой различаются"""
+        vec_a, outputs_a = self._rollout(seed=18)
+        vec_b, outputs_b = self._rollout(seed=18)
+        for (obs_a, rewards_a, _), (obs_b, rewards_b, _) in zip(outputs_a[1:], outputs_b[1:]):
+            np.testing.assert_array_equal(obs_a, obs_b)
+            np.testing.assert_array_equal(rewards_a, rewards_b)
+        
+        counters = [env.task_counter for env in vec_a.envs]
+        self.assertEqual(counters, [env.task_counter for env in vec_b.envs])
+        arrivals = [[t.device_id for d in env.devices for t in d.submitted_tasks] for env in vec_a.envs]
+        self.assertNotEqual(arrivals[0], arrivals[1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Тесты вычислительных ядер (совпадение Numba и NumPy бэкендов)
+"""
+
+import unittest
+import numpy as np
+from src.agents import sum_tree
+from src.mechanisms import kernels
+from src.mechanisms.vcg_auction import VCGAuction
+from src.learning.metrics import calculate_gini_coefficient
+
+@unittest.skipUnless(kernels.NUMBA_AVAILABLE, "Numba is not installed")
+class TestKernelParity(unittest.TestCase):
+    """Numba-ядра совпадают с NumPy-реализацией"""
+    
+    def setUp(self):
+        rng = np.random.default_rng(8)
+        self.valuations = rng.uniform(0.3, 1.0, (500, 7))
+        self.costs = rng.uniform(0.1, 0.9, (500, 7))
+        # Ничьи и полностью невыгодные строки
+        self.valuations[:20] = self.valuations[:20].round(1)
+        self.costs[:20] = self.costs[:20].round(1)
+        self.costs[20:40] = 2.0
+    
+    def test_greedy_edges(self):
+        for dtype in (np.float64, np.float32):
+            valuations, costs = self.valuations.astype(dtype), self.costs.astype(dtype)
+            np.testing.assert_array_equal(
+                kernels.greedy_edges(valuations, costs, backend='numba'),
+                kernels.greedy_edges(valuations, costs, backend='numpy')
+            )
+    
+    def test_row_dot(self):
+        edge = kernels.greedy_edges(self.valuations, self.costs, backend='numpy')
+        allocation = np.zeros(self.valuations.shape, dtype=int)
+        accepted = np.flatnonzero(edge >= 0)
+        allocation[accepted, edge[accepted]] = 1
+        for dtype in (np.float64, np.float32):
+            matrix = self.valuations.astype(dtype)
+            numba_rows = kernels.row_dot(allocation, matrix, np.dtype(dtype), backend='numba')
+            numpy_rows = kernels.row_dot(allocation, matrix, np.dtype(dtype), backend='numpy')
+            self.assertEqual(numba_rows.dtype, numpy_rows.dtype)
+            np.testing.assert_allclose(numba_rows, numpy_rows, rtol=1e-6)
+    
+    def test_gini(self):
+        values = np.random.default_rng(9).exponential(1.0, 1000)
+        self.assertAlmostEqual(
+            kernels.gini(values, backend='numba'), kernels.gini(values, backend='numpy')
+        )
+        self.assertAlmostEqual(kernels.gini(np.ones(10), backend='numba'), 0.0)
+    
+    def test_sum_tree(self):
+        rng = np.random.default_rng(34)
+        trees = {}
+        for backend in ('numba', 'numpy'):
+            sums, mins = np.zeros(2 * 64), np.full(2 * 64, np.inf)
+            sum_tree.sum_tree_update(sums, mins, 64 + np.arange(50), np.linspace(0.1, 5.0, 50), backend=backend)
+            sum_tree.sum_tree_update(sums, mins, np.array([64 + 3, 64 + 3, 64 + 49]), [2.0, 0.05, 1.0], backend=backend)
+            trees[backend] = (sums, mins)
+        np.testing.assert_allclose(trees['numba'][0], trees['numpy'][0])
+        np.testing.assert_array_equal(trees['numba'][1], trees['numpy'][1])
+        
+        sums = trees['numpy'][0]
+        values = np.append(rng.uniform(0, sums[1], 1000), sums[1])  # правая граница - не в пустые листья
+        leaves = sum_tree.sum_tree_find(sums, values, backend='numba')
+        np.testing.assert_array_equal(leaves, sum_tree.sum_tree_find(sums, values, backend='numpy'))
+        self.assertTrue(np.all(leaves < 50))
+    
+    def test_auction_backends_agree(self):
+        results = {}
+        for backend in kernels.BACKENDS:
+            previous = kernels.BACKEND
+            kernels.set_backend(backend)
+            try:
+                auction = VCGAuction(500, 7)
+                result = auction.run_auction(self.valuations, self.costs, timestamp=0)
+                results[backend] = (result, calculate_gini_coefficient(result.payments[:50]))
+            finally:
+                kernels.set_backend(previous)
+        
+        (jit, jit_gini), (reference, reference_gini) = results['numba'], results['numpy']
+        np.testing.assert_array_equal(jit.allocation, reference.allocation)
+        np.testing.assert_allclose(jit.payments, reference.payments, atol=1e-12)
+        self.assertAlmostEqual(jit.social_welfare, reference.social_welfare)
+        self.assertAlmostEqual(jit_gini, reference_gini)
+
+class TestKernelBackend(unittest.TestCase):
+    """Выбор бэкенда"""
+    
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            kernels.gini(np.ones(3), backend='cuda')
+    
+    def test_numpy_backend_always_available(self):
+        self.assertIn('numpy', kernels.BACKENDS)
+        self.assertEqual(kernels.BACKEND, kernels.BACKENDS[0])
+
+if __name__ == '__main__':
+    unittest.main()
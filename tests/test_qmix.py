@@ -2,9 +2,21 @@
 Тесты для QMIX обучения
 """
 
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
+import numpy as np
 import torch
+from src.agents.experience_buffer import ExperienceBuffer
+from src.agents.memmap_buffer import MemmapExperienceBuffer
 from src.agents.networks import GRUAgent, MixingNetwork
+from src.agents.prioritized_buffer import PrioritizedExperienceBuffer, SumTree
+from src.agents.sequence_buffer import EpisodeSequenceBuffer
+from src.config import TrainingConfig
+from src.learning.reward_manager import RewardManager
+from src.learning.trainer import QMIXTrainer
 
 class TestQMIXNetworks(unittest.TestCase):
     """Тесты архитектуры QMIX"""
@@ -24,7 +36,7 @@ class TestQMIXNetworks(unittest.TestCase):
     def test_mixing_network_forward(self):
         """Тест прямого прохода Mixing Network"""
         num_agents = 3
-        mixing_net = MixingNetwork(num_agents, action_size=4, hidden_size=64)
+        mixing_net = MixingNetwork(num_agents, action_size=4, hidden_size=64, state_size=10)
         
         # Локальные Q-значения [batch=2, num_agents=3, actions=4]
         q_values = torch.randn(2, 3, 4)
@@ -35,5 +47,357 @@ class TestQMIXNetworks(unittest.TestCase):
         
         self.assertEqual(global_q.shape, (2, 4))  # [batch, actions]
 
+class TestExperienceBuffer(unittest.TestCase):
+    """Кольцевой буфер опыта на массивах"""
+    
+    def test_ring_and_sample(self):
+        buffer = ExperienceBuffer(max_size=8, seed=31)
+        for t in range(12):
+            buffer.add(np.full((3, 4), t), np.full(3, t % 4), np.full(3, t), np.full((3, 4), t + 1), t == 11)
+        self.assertEqual(len(buffer), 8)
+        self.assertEqual(buffer.cursor, 4)
+        
+        batch = buffer.sample(8)
+        self.assertEqual(batch['states'].shape, (8, 3, 4))
+        self.assertEqual((batch['states'].dtype, batch['actions'].dtype), (torch.float32, torch.int64))
+        # Хранятся только последние 8 переходов, без повторов в батче
+        self.assertEqual(sorted(batch['states'][:, 0, 0].tolist()), list(range(4, 12)))
+        np.testing.assert_array_equal(batch['next_states'][:, 0, 0], batch['states'][:, 0, 0] + 1)
+        self.assertEqual(batch['dones'].sum().item(), 1.0)
+    
+    def test_add_batch(self):
+        buffer = ExperienceBuffer(max_size=5)
+        states = np.arange(7 * 2 * 4, dtype=np.float32).reshape(7, 2, 4)
+        buffer.add_batch(states, np.zeros((7, 2)), np.ones((7, 2)), states + 1, np.zeros(7))
+        self.assertEqual((len(buffer), buffer.cursor), (5, 0))
+        np.testing.assert_array_equal(np.sort(buffer.storage['states'][:, 0, 0]), states[2:, 0, 0])
+
+class TestMemmapBuffer(unittest.TestCase):
+    """Буфер опыта в файлах np.memmap"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'replay')
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def add(self, buffer, first, count):
+        for t in range(first, first + count):
+            buffer.add(np.full((2, 3), t), np.full(2, t % 4), np.full(2, t), np.full((2, 3), t + 1), False)
+    
+    def test_resume(self):
+        buffer = MemmapExperienceBuffer(self.path, max_size=6, seed=3)
+        self.add(buffer, 0, 4)
+        buffer.flush()
+        del buffer
+        
+        # Новый процесс обучения продолжает с тем же курсором и содержимым
+        buffer = MemmapExperienceBuffer(self.path, max_size=100)
+        self.assertEqual((buffer.max_size, len(buffer), buffer.cursor), (6, 4, 4))
+        self.add(buffer, 4, 4)
+        self.assertEqual((len(buffer), buffer.cursor), (6, 2))
+        batch = buffer.sample(6)
+        self.assertEqual(batch['states'].shape, (6, 2, 3))
+        self.assertEqual(batch['actions'].dtype, torch.int64)
+        self.assertEqual(sorted(batch['states'][:, 0, 0].tolist()), list(range(2, 8)))
+        
+        # 'w' начинает буфер заново
+        buffer = MemmapExperienceBuffer(self.path, max_size=3, mode='w')
+        self.assertEqual((buffer.max_size, len(buffer)), (3, 0))
+    
+    def test_readonly_reader(self):
+        writer = MemmapExperienceBuffer(self.path, max_size=10)
+        reader = MemmapExperienceBuffer(self.path, mode='r', seed=5)
+        self.assertEqual(len(reader), 0)
+        
+        self.add(writer, 0, 5)
+        writer.flush()
+        self.assertEqual(len(reader), 5)
+        batch = reader.sample(5)
+        self.assertEqual(sorted(batch['rewards'][:, 0].tolist()), list(range(5)))
+        with self.assertRaises(RuntimeError):
+            self.add(reader, 0, 1)
+
+class TestCompressedReplay(unittest.TestCase):
+    """Сжатое хранение переходов (float16 / int8, действия uint8, done битами)"""
+    
+    def fill(self, buffer, rng, scale=1.0):
+        states = rng.normal(size=(300, 5, 4)) * scale
+        actions = rng.integers(0, 6, (300, 5))
+        dones = rng.random(300) < 0.2
+        buffer.add_batch(states[:200], actions[:200], np.ones((200, 5)), states[:200] + 1, dones[:200])
+        for t in range(200, 300):
+            buffer.add(states[t], actions[t], np.ones(5), states[t] + 1, dones[t])
+        return states, actions, dones
+    
+    def test_round_trip(self):
+        for compression, tolerance in [('float16', 1e-2), ('int8', 0.05)]:
+            rng = np.random.default_rng(2)
+            plain = ExperienceBuffer(max_size=300)
+            buffer = ExperienceBuffer(max_size=300, compression=compression)
+            self.fill(plain, np.random.default_rng(2))
+            states, actions, dones = self.fill(buffer, rng)
+            self.assertLess(buffer.memory_usage() * 2, plain.memory_usage())
+            
+            batch = buffer._gather(np.arange(300))
+            self.assertEqual((batch['states'].dtype, batch['actions'].dtype), (torch.float32, torch.int64))
+            np.testing.assert_allclose(batch['states'].numpy(), states, atol=tolerance * np.abs(states).max())
+            np.testing.assert_array_equal(batch['actions'].numpy(), actions)
+            np.testing.assert_array_equal(batch['dones'].numpy(), dones.astype(np.float32))
+            self.assertEqual(buffer.sample(16)['next_states'].shape, (16, 5, 4))
+    
+    def test_int8_range_growth(self):
+        buffer = ExperienceBuffer(max_size=400, compression='int8')
+        rng = np.random.default_rng(4)
+        small, _, _ = self.fill(buffer, rng)
+        large = rng.normal(size=(50, 5, 4)) * 100
+        buffer.add_batch(large, np.zeros((50, 5)), np.zeros((50, 5)), large, np.zeros(50))
+        
+        # Диапазон расширен, ранее записанные наблюдения переквантованы
+        low, high = buffer.ranges['states']
+        self.assertTrue(np.all(low <= large.reshape(-1, 4).min(axis=0)))
+        self.assertTrue(np.all(high >= large.reshape(-1, 4).max(axis=0)))
+        step = (high - low) / 255
+        states = buffer._gather(np.arange(350))['states'].numpy()
+        self.assertTrue(np.all(np.abs(states - np.concatenate([small, large])) <= step))
+    
+    def test_uint8_actions(self):
+        buffer = ExperienceBuffer(max_size=4, compression='float16')
+        with self.assertRaises(ValueError):
+            buffer.add(np.zeros(3), np.array([256]), 0.0, np.zeros(3), False)
+    
+    def test_memmap_resume(self):
+        with tempfile.TemporaryDirectory() as path:
+            buffer = MemmapExperienceBuffer(path, max_size=300, compression='int8')
+            states, _, dones = self.fill(buffer, np.random.default_rng(6))
+            expected = buffer._gather(np.arange(300))
+            buffer.flush()
+            del buffer
+            
+            buffer = MemmapExperienceBuffer(path)
+            self.assertEqual(buffer.compression, 'int8')
+            batch = buffer._gather(np.arange(300))
+            np.testing.assert_array_equal(batch['states'].numpy(), expected['states'].numpy())
+            np.testing.assert_array_equal(batch['dones'].numpy(), dones.astype(np.float32))
+
+    def test_memmap_requantize_publish(self):
+        """Переквантование публикуется вместе с диапазоном; сбой до публикации не портит буфер"""
+        with tempfile.TemporaryDirectory() as path:
+            writer = MemmapExperienceBuffer(path, max_size=400, compression='int8')
+            reader = MemmapExperienceBuffer(path, mode='r', seed=7)
+            states, _, _ = self.fill(writer, np.random.default_rng(8))
+            reader.sample(8)
+            before = reader._gather(np.arange(300))['states'].numpy()
+            
+            large = states[:50] * 100
+            writer.add_batch(large, np.zeros((50, 5)), np.zeros((50, 5)), large, np.zeros(50))
+            # Читатель до refresh декодирует прежний файл прежним диапазоном
+            np.testing.assert_array_equal(reader._gather(np.arange(300))['states'].numpy(), before)
+            reader.sample(8)
+            low, high = writer.ranges['states']
+            after = reader._gather(np.arange(350))['states'].numpy()
+            self.assertTrue(np.all(np.abs(after - np.concatenate([states, large])) <= (high - low) / 255))
+            
+            # Сбой писателя между записью нового файла и публикацией meta.json
+            def crash():
+                raise RuntimeError("writer died")
+            writer._write_meta = crash
+            huge = states[:10] * 1e4
+            with self.assertRaises(RuntimeError):
+                writer.add_batch(huge, np.zeros((10, 5)), np.zeros((10, 5)), huge, np.zeros(10))
+            del writer
+            resumed = MemmapExperienceBuffer(path)
+            self.assertEqual(len(resumed), 350)
+            np.testing.assert_array_equal(resumed._gather(np.arange(350))['states'].numpy(), after)
+
+class TestPrioritizedBuffer(unittest.TestCase):
+    """Приоритетная выборка по дереву сумм"""
+    
+    def test_sum_tree_proportional(self):
+        tree = SumTree(10)
+        priorities = np.arange(1.0, 11.0)
+        tree.update(np.arange(10), priorities)
+        tree.update_one(3, 8.0)
+        priorities[3] = 8.0
+        self.assertAlmostEqual(tree.total, priorities.sum())
+        self.assertEqual(tree.min, 1.0)
+        
+        values = np.random.default_rng(32).uniform(0, tree.total, 200000)
+        frequencies = np.bincount(tree.find(values), minlength=10) / len(values)
+        np.testing.assert_allclose(frequencies, priorities / priorities.sum(), atol=0.005)
+    
+    def test_weights_and_priority_updates(self):
+        buffer = PrioritizedExperienceBuffer(max_size=100, alpha=1.0, beta_start=0.5, beta_steps=10, seed=33)
+        for t in range(100):
+            buffer.add(np.full((2, 3), t), np.zeros(2), np.zeros(2), np.zeros((2, 3)), False)
+        # Новые переходы - максимальный приоритет, выборка равномерна, веса = 1
+        batch = buffer.sample(16)
+        np.testing.assert_allclose(batch['weights'], 1.0)
+        
+        td_errors = np.full(100, 0.1)
+        td_errors[7] = 10.0
+        buffer.update_priorities(np.arange(100), td_errors)
+        batch = buffer.sample(64)
+        indices = batch['indices'].numpy()
+        self.assertGreater(np.mean(indices == 7), 0.4)
+        np.testing.assert_array_equal(batch['states'][:, 0, 0].numpy(), indices)
+        
+        buffer.num_samples -= 1  # beta на момент последней выборки
+        probabilities = buffer.tree[indices] / buffer.tree.total
+        expected = (100 * probabilities) ** -buffer.beta
+        expected /= (100 * buffer.tree.min / buffer.tree.total) ** -buffer.beta
+        np.testing.assert_allclose(batch['weights'], expected, rtol=1e-5)
+        self.assertLess(batch['weights'][indices == 7].max(), 1.0)
+        
+        buffer.num_samples = 10
+        self.assertEqual(buffer.beta, 1.0)
+    
+    def test_no_auction_imports(self):
+        # Буфер не тянет модули аукциона (и scipy.sparse) через ядра дерева сумм
+        code = ("import sys, src.agents.prioritized_buffer; "
+                "print(any(m.startswith(('scipy.sparse', 'src.mechanisms')) for m in sys.modules))")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(output.stdout.strip(), 'False')
+
+class TestSequenceReplay(unittest.TestCase):
+    """Фрагменты эпизодов с прогревом для GRU"""
+    
+    def test_chunks_prefix_and_mask(self):
+        buffer = EpisodeSequenceBuffer(max_sequences=10, seq_len=4, burn_in=3, store_hidden=True, seed=35)
+        for t in range(10):  # эпизод из 10 шагов: фрагменты 4 + 4 + 2
+            buffer.add(np.full((2, 3), t), np.zeros(2), np.full(2, t), np.full((2, 3), t + 1), t == 9,
+                       hidden=np.full((2, 5), t))
+        buffer.add(np.full((2, 3), 100), np.zeros(2), np.zeros(2), np.zeros((2, 3)), True,
+                   hidden=np.full((2, 5), 100))
+        self.assertEqual(len(buffer), 4)
+        
+        states = buffer.storage['states'][:, :, 0, 0]
+        np.testing.assert_array_equal(buffer.lengths[:4], [4, 4, 2, 1])
+        np.testing.assert_array_equal(buffer.burn_in_lengths[:4], [0, 3, 3, 0])
+        np.testing.assert_array_equal(states[0], [0, 0, 0, 0, 1, 2, 3])
+        np.testing.assert_array_equal(states[1], [1, 2, 3, 4, 5, 6, 7])
+        np.testing.assert_array_equal(states[2], [5, 6, 7, 8, 9, 0, 0])
+        np.testing.assert_array_equal(states[3], [0, 0, 0, 100, 0, 0, 0])  # новый эпизод - без префикса
+        # Скрытое состояние - перед первым шагом фрагмента (префикса, если он есть)
+        np.testing.assert_array_equal(buffer.storage['hidden'][:4, 0, 0], [0, 1, 5, 100])
+        
+        batch = buffer.sample(4)
+        self.assertEqual(batch['states'].shape, (4, 7, 2, 3))
+        self.assertEqual(batch['hidden'].shape, (4, 2, 5))
+        # Маска по первому шагу обучения каждого фрагмента
+        lengths = dict(zip(batch['states'][:, 3, 0, 0].tolist(), batch['mask'].sum(dim=1).tolist()))
+        self.assertEqual(lengths, {0: 4, 4: 4, 8: 2, 100: 1})
+    
+    def test_unroll_with_burn_in(self):
+        """Развёртка одним вызовом совпадает с пошаговым проходом GRU"""
+        torch.manual_seed(36)
+        agent = GRUAgent(obs_size=5, hidden_size=16, action_size=3)
+        obs, prefix = torch.randn(4, 6, 5), torch.randn(4, 3, 5)
+        lengths = torch.tensor([0, 3, 2, 1])
+        q_values, hidden = agent.unroll(obs, None, prefix, lengths)
+        self.assertEqual(q_values.shape, (4, 6, 3))
+        
+        for b in range(4):
+            h = torch.zeros(1, 16)
+            for t in range(int(lengths[b])):
+                _, h = agent(prefix[b:b+1, t:t+1], h)
+            for t in range(6):
+                q, h = agent(obs[b:b+1, t:t+1], h)
+                self.assertTrue(torch.allclose(q[0], q_values[b, t], atol=1e-5))
+            self.assertTrue(torch.allclose(h[0], hidden[b], atol=1e-5))
+
+class TestQMIXTrainer(unittest.TestCase):
+    """Обучение QMIXTrainer с разными буферами опыта"""
+    
+    NUM_AGENTS, OBS_SIZE, ACTIONS = 3, 5, 4
+    
+    def make_trainer(self, **options):
+        config = TrainingConfig(batch_size=4, buffer_size=64, target_update_freq=2, **options)
+        return QMIXTrainer(self.NUM_AGENTS, self.OBS_SIZE, self.ACTIONS, config=config)
+    
+    def play(self, trainer, num_steps=24, episode_length=7, seed=0):
+        rng = np.random.default_rng(seed)
+        obs = rng.random((self.NUM_AGENTS, self.OBS_SIZE))
+        for t in range(num_steps):
+            actions = trainer.select_actions(obs)
+            next_obs = rng.random((self.NUM_AGENTS, self.OBS_SIZE))
+            trainer.add_experience(obs, actions, rng.random(self.NUM_AGENTS), next_obs,
+                                   t % episode_length == episode_length - 1)
+            obs = next_obs
+    
+    def test_buffer_modes(self):
+        with tempfile.TemporaryDirectory() as replay_dir:
+            modes = {
+                'uniform': {},
+                'per': {'prioritized_replay': True},
+                'seq': {'sequence_replay': True, 'sequence_length': 4, 'burn_in': 2},
+                'seq_hidden': {'sequence_replay': True, 'sequence_length': 4, 'burn_in': 2, 'store_hidden': True},
+                'float16': {'replay_compression': 'float16'},
+                'int8': {'replay_compression': 'int8'},
+                'memmap': {'replay_dir': replay_dir},
+            }
+            for name, options in modes.items():
+                with self.subTest(mode=name):
+                    torch.manual_seed(41)
+                    trainer = self.make_trainer(**options)
+                    self.assertIsNone(trainer.train_step())  # буфер ещё пуст
+                    self.play(trainer)
+                    losses = [trainer.train_step() for _ in range(3)]
+                    self.assertTrue(all(np.isfinite(loss) for loss in losses))
+            
+            self.assertIsInstance(self.make_trainer(prioritized_replay=True).buffer, PrioritizedExperienceBuffer)
+            self.assertIsInstance(self.make_trainer(replay_dir=replay_dir).buffer, MemmapExperienceBuffer)
+            with self.assertRaises(ValueError):
+                self.make_trainer(sequence_replay=True, prioritized_replay=True)
+    
+    def test_sequence_loss_mask_and_burn_in(self):
+        """Дополненные шаги не входят в потери, префикс прогрева не получает градиента"""
+        torch.manual_seed(42)
+        trainer = self.make_trainer(sequence_replay=True, sequence_length=4, burn_in=2)
+        self.play(trainer, episode_length=6)  # эпизоды по 6 шагов: фрагменты 4 + 2
+        burn_in = trainer.buffer.burn_in
+        batch = trainer.buffer.sample(len(trainer.buffer))
+        padded = batch['mask'] == 0
+        self.assertTrue(padded.any() and (batch['burn_in_lengths'] > 0).any())
+        
+        # Мусор в дополненных шагах не меняет потери
+        perturbed = {name: value.clone() for name, value in batch.items()}
+        for name in ('states', 'next_states', 'rewards', 'dones'):
+            steps = perturbed[name][:, burn_in:]
+            steps[padded] = torch.rand_like(steps[padded]) * 100
+        self.assertTrue(torch.allclose(trainer._sequence_loss(batch), trainer._sequence_loss(perturbed)))
+        
+        # Градиент train_step по наблюдениям: только по реальным шагам обучения
+        states = batch['states'].clone().requires_grad_()
+        trainer.buffer.sample = lambda batch_size: dict(batch, states=states)
+        self.assertTrue(np.isfinite(trainer.train_step()))
+        self.assertTrue(torch.all(states.grad[:, :burn_in] == 0))
+        self.assertTrue(torch.all(states.grad[:, burn_in:][padded] == 0))
+        self.assertTrue(torch.any(states.grad[:, burn_in:][~padded] != 0))
+    
+    def test_priorities_updated(self):
+        trainer = self.make_trainer(prioritized_replay=True)
+        self.play(trainer)
+        total = trainer.buffer.tree.total
+        trainer.train_step()
+        self.assertNotEqual(trainer.buffer.tree.total, total)
+
+class TestRewardManager(unittest.TestCase):
+    """Локальные вознаграждения"""
+    
+    def test_vectorized_matches_scalar(self):
+        rng = np.random.default_rng(35)
+        accepted = rng.random(100) < 0.7
+        values, times, energy = rng.uniform(0, 5, 100), rng.uniform(0, 10, 100), rng.uniform(0, 3, 100)
+        manager = RewardManager(num_agents=4, num_devices=10)
+        expected = [manager.compute_local_reward(0, a, v, t, e) for a, v, t, e in zip(accepted, values, times, energy)]
+        np.testing.assert_allclose(manager.compute_local_rewards(accepted, values, times, energy), expected)
+        
+        manager.TIME_PENALTY = 0.3  # настройка одной константы меняет оба метода
+        self.assertAlmostEqual(manager.compute_local_rewards(np.array([True]), np.array([1.0]), np.array([2.0]))[0],
+                               manager.compute_local_reward(0, True, 1.0, 2.0, 0.0))
+
 if __name__ == '__main__':
     unittest.main()
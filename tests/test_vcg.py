@@ -2,9 +2,22 @@
 Тесты для VCG механизма
 """
 
+import asyncio
+import json
+import time
 import unittest
+from dataclasses import replace
+from types import SimpleNamespace
+from unittest import mock
 import numpy as np
 from src.mechanisms.vcg_auction import VCGAuction
+from src.mechanisms.payments import calculate_vcg_payments, calculate_clarke_payments
+from src.mechanisms.allocation import CapacitatedAssignment
+from src.mechanisms.incremental import IncrementalAuction
+from src.mechanisms.history import AuctionHistory
+from src.mechanisms.milp_allocation import ResourceConstraints, solve_multi_resource_allocation
+from src.mechanisms.partition import feasible_components
+from src.mechanisms.bid_collector import Bid, BidCollector
 
 class TestVCGAuction(unittest.TestCase):
     """Тесты VCG аукциона"""
@@ -37,6 +50,21 @@ class TestVCGAuction(unittest.TestCase):
         
         self.assertEqual(result.allocation.shape, (self.num_devices, self.num_edges))
     
+    def test_batch_matches_single_rounds(self):
+        """Пакетный аукцион совпадает с последовательными раундами"""
+        valuations = np.random.uniform(0.3, 1.0, (6, self.num_devices, self.num_edges))
+        costs = np.random.uniform(0.2, 0.6, (6, self.num_devices, self.num_edges))
+        
+        batch = self.auction.run_auction_batch(valuations, costs, timestamps=np.arange(10, 16))
+        
+        self.assertEqual(len(batch), 6)
+        for t in range(6):
+            single = self.auction.run_auction(valuations[t], costs[t], timestamp=10 + t)
+            np.testing.assert_array_equal(batch.allocation[t], single.allocation)
+            np.testing.assert_allclose(batch.payments[t], single.payments)
+            self.assertAlmostEqual(batch.social_welfare[t], single.social_welfare)
+            self.assertEqual(batch.round(t).timestamp, single.timestamp)
+    
     def test_payments_positive(self):
         """Тест что платежи разумны"""
         valuations = np.ones((self.num_devices, self.num_edges)) * 1.0
@@ -48,5 +76,489 @@ class TestVCGAuction(unittest.TestCase):
         self.assertTrue(np.all(result.payments >= -10))
         self.assertTrue(np.all(result.payments <= 10))
 
+class TestVCGPayments(unittest.TestCase):
+    """Тесты векторизованного вычисления платежей"""
+    
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.valuations = rng.uniform(0.5, 1.0, (40, 6))
+        self.costs = rng.uniform(0.2, 0.5, (40, 6))
+        self.allocation = np.zeros((40, 6), dtype=int)
+        self.allocation[np.arange(40), rng.integers(0, 6, 40)] = 1
+        self.allocation[::7] = 0
+    
+    def _reference_payments(self, contribution):
+        """Исходный цикл с копированием распределения для каждого устройства"""
+        A, U, C = self.allocation, self.valuations, self.costs
+        current_sw = np.sum(A * U) - np.sum(A * C)
+        payments = np.zeros(A.shape[0])
+        for i in range(A.shape[0]):
+            without_i = A.copy()
+            without_i[i] = 0
+            sw_without_i = np.sum(without_i * U) - np.sum(without_i * C)
+            payments[i] = sw_without_i - (current_sw - contribution(i))
+        return payments, current_sw
+    
+    def test_auction_payments_match_loop(self):
+        """Платежи аукциона совпадают с поэлементным циклом"""
+        expected, expected_sw = self._reference_payments(
+            lambda i: np.sum(self.allocation[i] * self.valuations[i])
+        )
+        payments, sw = VCGAuction(40, 6)._compute_vcg_payments(
+            self.allocation, self.valuations, self.costs
+        )
+        np.testing.assert_allclose(payments, expected)
+        self.assertAlmostEqual(sw, expected_sw)
+    
+    def test_calculate_vcg_payments_match_loop(self):
+        """calculate_vcg_payments совпадает с исходным циклом"""
+        expected, expected_sw = self._reference_payments(
+            lambda i: np.sum(self.allocation[i] * self.valuations)
+        )
+        payments, sw = calculate_vcg_payments(self.allocation, self.valuations, self.costs)
+        np.testing.assert_allclose(payments, expected)
+        self.assertAlmostEqual(sw, expected_sw)
+    
+    def test_float32_and_out_buffer(self):
+        """float32 сохраняется, результат пишется в переданный буфер"""
+        buffer = np.empty(40, dtype=np.float32)
+        payments, _ = calculate_clarke_payments(
+            self.allocation,
+            self.valuations.astype(np.float32),
+            self.costs.astype(np.float32),
+            payments=buffer
+        )
+        self.assertIs(payments, buffer)
+        np.testing.assert_allclose(
+            payments, (self.allocation * self.costs).sum(axis=1), rtol=1e-5
+        )
+
+class TestCapacitatedAllocation(unittest.TestCase):
+    """Тесты распределения с учётом ёмкости узлов"""
+    
+    @staticmethod
+    def _brute_force_sw(weights, capacity):
+        """Оптимум через задачу о назначениях со слотами узлов"""
+        from scipy.optimize import linear_sum_assignment
+        m = weights.shape[0]
+        slots = [j for j, k in enumerate(capacity) for _ in range(k)]
+        profit = np.zeros((m, len(slots) + m))  # + фиктивный столбец "отклонить"
+        profit[:, :len(slots)] = np.maximum(weights[:, slots], 0)
+        rows, cols = linear_sum_assignment(profit, maximize=True)
+        return profit[rows, cols].sum()
+    
+    def test_matches_brute_force(self):
+        """Распределение и SW без каждого устройства совпадают с полным перебором"""
+        rng = np.random.default_rng(1)
+        for _ in range(30):
+            m, n = rng.integers(2, 12), rng.integers(1, 4)
+            valuations = rng.uniform(0, 1, (m, n))
+            costs = rng.uniform(0, 0.6, (m, n))
+            capacity = rng.integers(0, 4, n)
+            solver = CapacitatedAssignment(valuations, costs, capacity)
+            weights = valuations - costs
+            
+            allocation = solver.allocation_matrix()
+            self.assertTrue(np.all(allocation.sum(axis=0) <= capacity))
+            self.assertTrue(np.all(allocation.sum(axis=1) <= 1))
+            self.assertAlmostEqual(solver.social_welfare, self._brute_force_sw(weights, capacity))
+            
+            sw_without = solver.welfare_without_each()
+            for i in range(m):
+                expected = self._brute_force_sw(np.delete(weights, i, axis=0), capacity)
+                self.assertAlmostEqual(sw_without[i], expected)
+    
+    def test_auction_respects_capacity(self):
+        """Аукцион с ёмкостью не перегружает узлы и берёт плату за вытеснение"""
+        valuations = np.ones((5, 3))
+        costs = np.ones((5, 3)) * 0.3
+        auction = VCGAuction(5, 3, edge_capacity=np.array([1, 1, 1]))
+        
+        result = auction.run_auction(valuations, costs, timestamp=0)
+        
+        self.assertTrue(np.all(result.allocation.sum(axis=0) <= 1))
+        self.assertEqual(result.allocation.sum(), 3)
+        self.assertAlmostEqual(result.social_welfare, 3 * 0.7)
+        # Победитель платит стоимость узла + выгоду вытесненного устройства
+        winners = result.allocation.sum(axis=1) == 1
+        np.testing.assert_allclose(result.payments[winners], 0.3 + 0.7)
+        np.testing.assert_allclose(result.payments[~winners], 0.0, atol=1e-12)
+    
+    def test_unbounded_capacity_matches_greedy(self):
+        """Без ограничений ёмкости результат совпадает с жадным распределением"""
+        rng = np.random.default_rng(2)
+        valuations = rng.uniform(0.5, 1.0, (20, 4))
+        costs = rng.uniform(0.2, 0.5, (20, 4))
+        
+        greedy = VCGAuction(20, 4).run_auction(valuations, costs, timestamp=0)
+        exact = VCGAuction(20, 4, edge_capacity=np.full(4, 20)).run_auction(valuations, costs, timestamp=0)
+        
+        np.testing.assert_array_equal(exact.allocation, greedy.allocation)
+        np.testing.assert_allclose(exact.payments, greedy.payments)
+
+class TestMultiResourceAllocation(unittest.TestCase):
+    """Тесты MILP-распределения по CPU и памяти"""
+    
+    def _instance(self, seed, m=6, n=2):
+        rng = np.random.default_rng(seed)
+        valuations = rng.uniform(0.3, 1.0, (m, n))
+        costs = rng.uniform(0.1, 0.8, (m, n))
+        resources = ResourceConstraints(
+            cpu_demand=rng.uniform(0.5, 2.0, m),
+            memory_demand=rng.uniform(256, 1024, m),
+            cpu_capacity=rng.uniform(1.0, 4.0, n),
+            memory_capacity=rng.uniform(512, 2048, n)
+        )
+        return valuations, costs, resources
+    
+    def _check_feasible(self, allocation, resources):
+        self.assertTrue(np.all(allocation.sum(axis=1) <= 1))
+        self.assertTrue(np.all(resources.cpu_demand @ allocation <= resources.cpu_capacity + 1e-9))
+        self.assertTrue(np.all(resources.memory_demand @ allocation <= resources.memory_capacity + 1e-9))
+    
+    def test_matches_brute_force(self):
+        """MILP совпадает с перебором всех распределений на малых задачах"""
+        from itertools import product
+        for seed in range(10):
+            valuations, costs, resources = self._instance(seed)
+            weights = valuations - costs
+            best = 0.0
+            for choice in product(range(-1, 2), repeat=6):
+                allocation = np.zeros((6, 2))
+                for i, j in enumerate(choice):
+                    if j >= 0:
+                        allocation[i, j] = 1
+                if (np.all(resources.cpu_demand @ allocation <= resources.cpu_capacity) and
+                        np.all(resources.memory_demand @ allocation <= resources.memory_capacity)):
+                    best = max(best, (weights * allocation).sum())
+            
+            result = solve_multi_resource_allocation(valuations, costs, resources)
+            self.assertEqual(result.status, 'optimal')
+            self.assertAlmostEqual(result.social_welfare, best)
+            self._check_feasible(result.allocation, resources)
+    
+    def test_time_budget_returns_feasible_allocation(self):
+        """С лимитом времени распределение допустимо, SW не выше верхней границы"""
+        valuations, costs, resources = self._instance(11, m=200, n=8)
+        resources.time_budget = 1.0
+        result = solve_multi_resource_allocation(valuations, costs, resources)
+        
+        self._check_feasible(result.allocation, resources)
+        self.assertLessEqual(result.social_welfare, result.upper_bound + 1e-9)
+        self.assertGreaterEqual(result.gap, -1e-9)
+    
+    def test_failed_relaxation_falls_through_to_milp(self):
+        """LP-релаксация без решения не даёт границы: время остаётся MILP"""
+        valuations, costs, resources = self._instance(13, m=20, n=3)
+        resources.time_budget = 10.0
+        failed = SimpleNamespace(status=1, x=None, fun=None)  # лимит времени LP
+        with mock.patch('src.mechanisms.milp_allocation.linprog', return_value=failed):
+            result = solve_multi_resource_allocation(valuations, costs, resources)
+        
+        self.assertEqual(result.status, 'optimal')
+        expected = solve_multi_resource_allocation(valuations, costs, replace(resources, time_budget=None))
+        self.assertAlmostEqual(result.social_welfare, expected.social_welfare)
+        self._check_feasible(result.allocation, resources)
+    
+    def test_auction_uses_resources(self):
+        """Аукцион с ресурсами соблюдает ограничения CPU и памяти"""
+        valuations, costs, resources = self._instance(12, m=20, n=3)
+        auction = VCGAuction(20, 3, resources=resources)
+        result = auction.run_auction(valuations, costs, timestamp=0)
+        
+        self._check_feasible(result.allocation, resources)
+        self.assertAlmostEqual(result.social_welfare, auction.last_milp.social_welfare)
+
+class TestPartitionedAuction(unittest.TestCase):
+    """Тесты решения раунда по независимым компонентам"""
+    
+    def setUp(self):
+        # 4 кластера: пары между кластерами невыгодны
+        rng = np.random.default_rng(13)
+        device_cluster = rng.integers(0, 4, 40)
+        edge_cluster = np.arange(8) % 4
+        same = device_cluster[:, None] == edge_cluster[None, :]
+        self.valuations = rng.uniform(0.3, 1.0, (40, 8))
+        self.costs = np.where(same, rng.uniform(0.1, 0.8, (40, 8)), 2.0)
+        self.edge_capacity = np.array([3, 1, 2, 0, 4, 2, 1, 3])
+    
+    def test_components(self):
+        count, device_labels, edge_labels = feasible_components(self.valuations, self.costs)
+        self.assertGreaterEqual(count, 4)
+        for j in range(8):
+            # Узлы одного кластера с выгодными парами - одна компонента
+            self.assertEqual(edge_labels[j], edge_labels[j % 4])
+    
+    def test_matches_single_solve(self):
+        """Решение по компонентам в пуле процессов совпадает с общим"""
+        for edge_capacity in (None, self.edge_capacity):
+            single = VCGAuction(40, 8, edge_capacity=edge_capacity)
+            partitioned = VCGAuction(40, 8, edge_capacity=edge_capacity, partition_workers=2)
+            try:
+                expected = single.run_auction(self.valuations, self.costs, timestamp=0)
+                result = partitioned.run_auction(self.valuations, self.costs, timestamp=0)
+            finally:
+                partitioned.close()
+            
+            self.assertAlmostEqual(result.social_welfare, expected.social_welfare)
+            np.testing.assert_allclose(result.payments, expected.payments, atol=1e-12)
+            if edge_capacity is None:
+                np.testing.assert_array_equal(result.allocation, expected.allocation)
+            else:
+                self.assertTrue(np.all(result.allocation.sum(axis=0) <= edge_capacity))
+
+class TestBidCollector(unittest.TestCase):
+    """Тесты асинхронного сбора ставок"""
+    
+    def setUp(self):
+        rng = np.random.default_rng(14)
+        self.valuations = rng.uniform(0.3, 1.0, (50, 4))
+        self.costs = rng.uniform(0.1, 0.8, (50, 4))
+    
+    def test_concurrent_bids_form_one_round(self):
+        """Одновременные ставки в одном окне дают один раунд, как run_auction"""
+        async def scenario():
+            collector = BidCollector(VCGAuction(50, 4), max_batch=50, max_wait=1.0)
+            await collector.start()
+            try:
+                return collector, await asyncio.gather(*[
+                    collector.submit(Bid(i, self.valuations[i], self.costs[i])) for i in range(50)
+                ])
+            finally:
+                await collector.stop()
+        
+        collector, outcomes = asyncio.run(scenario())
+        expected = VCGAuction(50, 4).run_auction(self.valuations, self.costs, timestamp=0)
+        
+        self.assertEqual(collector.round_sizes, [50])
+        self.assertEqual({o.round_id for o in outcomes}, {0})
+        for outcome in outcomes:
+            row = expected.allocation[outcome.device_id]
+            self.assertEqual(outcome.edge, int(np.argmax(row)) if row.any() else -1)
+            self.assertAlmostEqual(outcome.payment, expected.payments[outcome.device_id])
+        self.assertIn('p99', collector.latency_percentiles())
+    
+    def test_batch_size_window(self):
+        """Окно по размеру: 50 ставок при max_batch=16 - не меньше 4 раундов"""
+        async def scenario():
+            collector = BidCollector(VCGAuction(50, 4), max_batch=16, max_wait=1.0)
+            await collector.start()
+            try:
+                await asyncio.gather(*[
+                    collector.submit(Bid(i, self.valuations[i], self.costs[i])) for i in range(50)
+                ])
+            finally:
+                await collector.stop()
+            return collector
+        
+        collector = asyncio.run(scenario())
+        self.assertTrue(all(size <= 16 for size in collector.round_sizes))
+        self.assertEqual(sum(collector.round_sizes), 50)
+    
+    def test_socket_round_trip(self):
+        """Ставка по TCP (JSON-строки)"""
+        async def scenario():
+            collector = BidCollector(VCGAuction(50, 4), max_wait=0.001)
+            server = await collector.serve()
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write((json.dumps({
+                'device_id': 3,
+                'valuations': self.valuations[3].tolist(),
+                'costs': self.costs[3].tolist()
+            }) + '\n').encode())
+            reply = json.loads(await reader.readline())
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            await collector.stop()
+            return reply
+        
+        reply = asyncio.run(scenario())
+        utility = self.valuations[3] - self.costs[3]
+        self.assertEqual(reply['device_id'], 3)
+        self.assertEqual(reply['edge'], int(np.argmax(utility)) if utility.max() > 0 else -1)
+
+    def test_bad_bid_rejected_alone(self):
+        """Некорректная ставка отклоняется только у её отправителя"""
+        bad_bids = [
+            Bid(50, self.valuations[0], self.costs[0]),            # устройство вне аукциона
+            Bid(1, self.valuations[1][:3], self.costs[1]),         # вектор не [n]
+            Bid(2, self.valuations[2], [0.1, np.nan, 0.2, 0.3]),   # не конечные значения
+        ]
+        
+        async def scenario():
+            collector = BidCollector(VCGAuction(50, 4), max_batch=50, max_wait=0.05)
+            await collector.start()
+            try:
+                good = [collector.submit(Bid(i, self.valuations[i], self.costs[i])) for i in range(10, 20)]
+                bad = [collector.submit(bid) for bid in bad_bids]
+                return collector, await asyncio.gather(*good, *bad, return_exceptions=True)
+            finally:
+                await collector.stop()
+        
+        collector, outcomes = asyncio.run(scenario())
+        self.assertTrue(all(isinstance(o, ValueError) for o in outcomes[10:]))
+        self.assertEqual([o.device_id for o in outcomes[:10]], list(range(10, 20)))
+        self.assertEqual(collector.round_sizes, [10])
+        
+        # По TCP клиент получает ошибку и остаётся подключённым
+        async def socket_scenario():
+            collector = BidCollector(VCGAuction(50, 4), max_wait=0.001)
+            server = await collector.serve()
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+            replies = []
+            for device_id, valuations in [(3, [1.0, 2.0]), (3, self.valuations[3].tolist())]:
+                writer.write((json.dumps({'device_id': device_id, 'valuations': valuations,
+                                          'costs': self.costs[3].tolist()}) + '\n').encode())
+                replies.append(json.loads(await reader.readline()))
+            writer.close()
+            server.close()
+            await server.wait_closed()
+            await collector.stop()
+            return replies
+        
+        error, reply = asyncio.run(socket_scenario())
+        self.assertIn('error', error)
+        self.assertEqual(reply['device_id'], 3)
+    
+    def test_stop_during_round(self):
+        """stop() во время раунда отменяет ставки раунда и очереди - submit не зависает"""
+        class SlowAuction(VCGAuction):
+            def run_auction(self, *args, **kwargs):
+                time.sleep(0.2)
+                return super().run_auction(*args, **kwargs)
+        
+        async def scenario():
+            collector = BidCollector(SlowAuction(50, 4), max_batch=5, max_wait=0.001)
+            await collector.start()
+            pending = [asyncio.ensure_future(collector.submit(Bid(i, self.valuations[i], self.costs[i])))
+                       for i in range(8)]
+            await asyncio.sleep(0.05)  # первый раунд в executor, остальные ставки в очереди
+            await collector.stop()
+            return await asyncio.wait_for(asyncio.gather(*pending, return_exceptions=True), 1.0)
+        
+        outcomes = asyncio.run(scenario())
+        self.assertEqual(len(outcomes), 8)
+        self.assertTrue(all(isinstance(o, asyncio.CancelledError) for o in outcomes))
+
+class TestSparseAuction(unittest.TestCase):
+    """Тесты аукциона по разреженным (CSR) ставкам"""
+    
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.reachable = rng.random((30, 6)) < 0.4
+        self.valuations = np.where(self.reachable, rng.uniform(0.3, 1.0, (30, 6)), 0.0)
+        self.costs = np.where(self.reachable, rng.uniform(0.1, 0.8, (30, 6)), 0.0)
+        # В плотной постановке недостижимые пары делаем заведомо невыгодными
+        self.dense_valuations = np.where(self.reachable, self.valuations, -1.0)
+    
+    def _check_matches_dense(self, edge_capacity):
+        import scipy.sparse as sp
+        auction = VCGAuction(30, 6)
+        dense = auction.run_auction(self.dense_valuations, self.costs, 0, edge_capacity=edge_capacity)
+        sparse = auction.run_auction(
+            sp.csr_matrix(self.valuations), sp.csr_matrix(self.costs), 0,
+            edge_capacity=edge_capacity
+        )
+        
+        self.assertTrue(sp.issparse(sparse.allocation))
+        self.assertAlmostEqual(sparse.social_welfare, dense.social_welfare)
+        np.testing.assert_allclose(sparse.payments, dense.payments, atol=1e-12)
+        self.assertTrue(np.all(sparse.allocation.toarray()[~self.reachable] == 0))
+        return dense, sparse
+    
+    def test_greedy_matches_dense(self):
+        """Разреженное жадное распределение совпадает с плотным"""
+        dense, sparse = self._check_matches_dense(None)
+        np.testing.assert_array_equal(sparse.allocation.toarray(), dense.allocation)
+    
+    def test_capacitated_matches_dense(self):
+        """Распределение с ёмкостью по разреженным ставкам совпадает с плотным"""
+        self._check_matches_dense(np.array([2, 1, 3, 0, 2, 1]))
+
+class TestIncrementalAuction(unittest.TestCase):
+    """Тесты инкрементального режима повторяющегося аукциона"""
+    
+    def _run_rounds(self, edge_capacity):
+        rng = np.random.default_rng(4)
+        valuations = rng.uniform(0.3, 1.0, (25, 4))
+        costs = rng.uniform(0.1, 0.8, (25, 4))
+        state = IncrementalAuction(valuations, costs, edge_capacity=edge_capacity)
+        auction = VCGAuction(25, 4, edge_capacity=edge_capacity)
+        
+        for t in range(8):
+            changed = rng.choice(25, 3, replace=False)
+            valuations[changed] = rng.uniform(0.3, 1.0, (3, 4))
+            costs[changed] = rng.uniform(0.1, 0.8, (3, 4))
+            
+            yield (state.update(changed, valuations[changed], costs[changed], t),
+                   auction.run_auction(valuations, costs, t))
+    
+    def test_matches_full_resolve(self):
+        """Без ёмкости результат идентичен полному пересчёту"""
+        for incremental, full in self._run_rounds(None):
+            np.testing.assert_array_equal(incremental.allocation, full.allocation)
+            np.testing.assert_array_equal(incremental.payments, full.payments)
+            self.assertEqual(incremental.social_welfare, full.social_welfare)
+    
+    def test_capacitated_matches_full_resolve(self):
+        """С ёмкостью SW и платежи совпадают с полным пересчётом"""
+        capacity = np.array([3, 2, 4, 1])
+        for incremental, full in self._run_rounds(capacity):
+            self.assertTrue(np.all(incremental.allocation.sum(axis=0) <= capacity))
+            self.assertAlmostEqual(incremental.social_welfare, full.social_welfare)
+            np.testing.assert_allclose(incremental.payments, full.payments, atol=1e-12)
+
+class TestAuctionHistory(unittest.TestCase):
+    """Тесты компактной истории аукциона"""
+    
+    def _run(self, auction, rounds=12):
+        rng = np.random.default_rng(5)
+        results = []
+        for t in range(rounds):
+            valuations = rng.uniform(0.3, 1.0, (10, 3))
+            costs = rng.uniform(0.1, 0.8, (10, 3))
+            results.append(auction.run_auction(valuations, costs, timestamp=t))
+        return results
+    
+    def test_ring_buffer_keeps_last_rounds(self):
+        """Кольцевой буфер хранит последние раунды, Джини - по всем раундам"""
+        auction = VCGAuction(10, 3, history=AuctionHistory(10, 3, max_rounds=5))
+        results = self._run(auction)
+        
+        self.assertEqual(len(auction.history), 5)
+        self.assertEqual(auction.history.edge_index.dtype, np.int16)
+        np.testing.assert_array_equal(auction.history.timestamps, np.arange(7, 12))
+        for stored, original in zip(auction.history, results[-5:]):
+            np.testing.assert_array_equal(stored.allocation, original.allocation)
+            np.testing.assert_array_equal(stored.payments, original.payments)
+        
+        ginis = []
+        for result in results:
+            positive = result.payments[result.payments > 0]
+            if len(positive) > 1:
+                ginis.append(VCGAuction._compute_gini(positive))
+        self.assertAlmostEqual(auction.get_average_gini(), np.mean(ginis))
+    
+    def test_spill_to_disk(self):
+        """Заполненный буфер сбрасывается на диск"""
+        import tempfile
+        with tempfile.TemporaryDirectory() as spill_dir:
+            history = AuctionHistory(10, 3, max_rounds=4, spill_dir=spill_dir)
+            results = self._run(VCGAuction(10, 3, history=history), rounds=10)
+            
+            self.assertEqual(len(history.spilled_chunks), 2)
+            self.assertEqual(len(history), 2)
+            chunk = AuctionHistory.load_chunk(history.spilled_chunks[1])
+            np.testing.assert_array_equal(chunk['timestamps'], np.arange(4, 8))
+            np.testing.assert_array_equal(chunk['payments'][0], results[4].payments)
+    
+    def test_empty_ring_rejected(self):
+        with self.assertRaises(ValueError):  # 0 не означает "без ограничения"
+            AuctionHistory(10, 3, max_rounds=0)
+        with self.assertRaises(IndexError):
+            AuctionHistory(10, 3)[0]
+
 if __name__ == '__main__':
     unittest.main()